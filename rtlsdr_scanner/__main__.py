@@ -29,6 +29,15 @@ try:
 except:
     pass
 
+import sys
+
+from rtlsdr_scanner.startup import StartupProfile
+
+profile = None
+if '--profile-startup' in sys.argv:
+    profile = StartupProfile()
+    profile.install()
+
 try:
     import matplotlib
     matplotlib.interactive(True)
@@ -41,21 +50,13 @@ except ImportError as error:
     exit(1)
 
 import argparse
+import multiprocessing
 import os.path
 import signal
-import sys
+from urlparse import urlparse
 
-from rtlsdr_scanner.cli import Cli
 from rtlsdr_scanner.constants import APP_NAME
 from rtlsdr_scanner.file import File
-from rtlsdr_scanner.main_window import FrameMain, RtlSdrScanner
-
-if not hasattr(sys, 'frozen'):
-    try:
-        import visvis as vv
-        vv.use('wx')
-    except ImportError:
-        pass
 
 
 def __init_worker():
@@ -82,19 +83,131 @@ def __arguments():
                         type=int, default=0)
     parser.add_argument("-c", "--conf", help="Load a config file",
                         default=None)
+    parser.add_argument("--convert",
+                        help="Convert a scan file to another scan format "
+                        "(e.g. .rfs to .rfb) and exit",
+                        metavar=('SOURCE', 'DEST'), nargs=2, type=str)
+    parser.add_argument("--profile",
+                        help="Save per-stage pipeline timings to this file",
+                        metavar='FILE', type=str)
+    parser.add_argument("--profile-startup",
+                        help="Report the import time breakdown at startup",
+                        action='store_true')
     group = parser.add_mutually_exclusive_group()
     group.add_argument("-i", "--index", help="Device index (from 0)", type=int,
                        default=0)
-    group.add_argument("-r", "--remote", help="Server IP and port", type=str)
+    group.add_argument("-r", "--remote",
+                       help="Server IP and port, comma separated to scan with several servers",
+                       type=str)
+    group.add_argument("-m", "--multi",
+                       help="Device indices to scan with in parallel (e.g. 0,1,2)",
+                       type=str)
+    group.add_argument("--simulate",
+                       help="Use a simulated device described by a scenario file",
+                       metavar='SCENARIO', type=str)
+    group.add_argument("--nodes",
+                       help="Scanner node IPs and ports, comma separated",
+                       type=str)
+    parser.add_argument("--serve-node",
+                        help="Run as a headless scanner node on this port",
+                        metavar='PORT', type=int)
+    parser.add_argument("--metrics-bind",
+                        help="Address to serve node metrics on "
+                        "(default: 127.0.0.1)",
+                        metavar='ADDRESS', type=str, default='127.0.0.1')
+    benchmark = parser.add_argument_group('benchmark')
+    benchmark.add_argument("--benchmark",
+                           help="Benchmark sweeps using --simulate or "
+                           "--remote and save the results to this file",
+                           metavar='FILE', type=str)
+    benchmark.add_argument("--benchmark-scenarios",
+                           help="Comma separated scenarios to run "
+                           "(default: all)",
+                           metavar='NAMES', type=str)
+    benchmark.add_argument("--benchmark-spectrum",
+                           help="Measure how the spectrum functions scale "
+                           "and save the results to this file",
+                           metavar='FILE', type=str)
+    benchmark.add_argument("--benchmark-baseline",
+                           help="Previous --benchmark-spectrum results to "
+                           "check for scaling regressions",
+                           metavar='FILE', type=str)
+    benchmark.add_argument("--benchmark-render",
+                           help="Measure plot rendering for each display "
+                           "and save the results to this file",
+                           metavar='FILE', type=str)
+    benchmark.add_argument("--benchmark-sweeps",
+                           help="Sweeps to render (default: 16)",
+                           type=int)
+    benchmark.add_argument("--benchmark-bins",
+                           help="Points per sweep to render (default: 4096)",
+                           type=int)
+    emulator = parser.add_argument_group('rtl_tcp emulator')
+    emulator.add_argument("--serve-rtltcp",
+                          help="Emulate an rtl_tcp server on this port, "
+                          "using --simulate for the signals",
+                          metavar='PORT', type=int)
+    emulator.add_argument("--emu-latency", help="Command latency (s)",
+                          type=float, default=0)
+    emulator.add_argument("--emu-bandwidth", help="Bandwidth limit (kB/s)",
+                          type=float)
+    emulator.add_argument("--emu-stall",
+                          help="Stall the stream after AFTER seconds for "
+                          "DURATION seconds",
+                          metavar='AFTER,DURATION', type=str)
+    emulator.add_argument("--emu-disconnect",
+                          help="Disconnect clients after this time (s)",
+                          type=float)
     types = File.get_type_pretty(File.Types.SAVE)
     types += File.get_type_pretty(File.Types.PLOT)
-    help = 'Output file (' + types + ')'
+    help = 'Output file (' + types + ', exports may end in .gz)'
     parser.add_argument("file", help=help, nargs='?')
     args = parser.parse_args()
 
     error = None
     isGui = True
-    if args.start is not None or args.end is not None:
+    if args.convert is not None:
+        isGui = False
+        if not os.path.exists(args.convert[0]):
+            error = "Cannot find {}".format(args.convert[0])
+        elif File.get_type_index(os.path.splitext(args.convert[1])[1],
+                                 File.Types.SAVE) == -1:
+            error = "Destination extension should be {}".format(File.get_type_pretty(File.Types.SAVE))
+    elif args.benchmark_render is not None:
+        isGui = False
+        for value in [args.benchmark_sweeps, args.benchmark_bins]:
+            if value is not None and value < 1:
+                error = "Sweeps and bins should be at least 1"
+    elif args.benchmark_spectrum is not None:
+        isGui = False
+        if args.benchmark_baseline is not None and \
+                not os.path.exists(args.benchmark_baseline):
+            error = "Cannot find {}".format(args.benchmark_baseline)
+    elif args.benchmark is not None:
+        isGui = False
+        if args.benchmark_scenarios is not None:
+            from rtlsdr_scanner.benchmark import Benchmark
+            args.benchmark_scenarios = args.benchmark_scenarios.split(',')
+            for name in args.benchmark_scenarios:
+                if name not in Benchmark.SCENARIOS:
+                    error = "Unknown scenario '{}' ({})".format(name,
+                                                               ', '.join(Benchmark.SCENARIOS))
+        if args.remote is not None:
+            url = urlparse('//' + args.remote)
+            if url.hostname is None:
+                error = "Invalid hostname"
+            args.remote = (url.hostname, url.port or 1234)
+    elif args.serve_node is not None or args.serve_rtltcp is not None:
+        isGui = False
+        if args.emu_stall is not None:
+            try:
+                args.emu_stall = [float(value)
+                                  for value in args.emu_stall.split(',')]
+            except ValueError:
+                args.emu_stall = None
+            if args.emu_stall is None or len(args.emu_stall) != 2:
+                error = "Stall should be AFTER,DURATION"
+    elif args.start is not None or args.end is not None:
         if args.start is not None:
             if args.end is not None:
                 if args.file is not None:
@@ -116,18 +229,106 @@ def __arguments():
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     print APP_NAME + "\n"
 
     isGui, args = __arguments()
+    if profile is not None:
+        profile.stage('Libraries')
     if isGui:
+        from rtlsdr_scanner.main_window import FrameMain, RtlSdrScanner
+        if profile is not None:
+            profile.stage('Main window imports')
         app = RtlSdrScanner()
         app.SetClassName(APP_NAME)
         wx.Locale().Init2()
         frame = FrameMain(APP_NAME)
+        if profile is not None:
+            profile.stage('Main window created')
+            wx.CallAfter(profile.stage, 'First idle')
+            wx.CallAfter(profile.report)
         if args.file is not None:
             frame.open(os.path.abspath(args.dirname), args.filename)
         app.MainLoop()
+        if args.profile is not None:
+            from rtlsdr_scanner.metrics import metrics
+            metrics.save(args.profile)
+    elif args.convert is not None:
+        from rtlsdr_scanner.file import convert_plot
+        try:
+            convert_plot(*args.convert)
+        except IOError as error:
+            print 'Error: {}'.format(error)
+            exit(1)
+        print 'Converted {} to {}'.format(*args.convert)
+    elif args.benchmark_render is not None:
+        from rtlsdr_scanner.benchmark import RenderBenchmark
+        if profile is not None:
+            profile.report()
+        try:
+            benchmark = RenderBenchmark(args.benchmark_sweeps,
+                                        args.benchmark_bins)
+            benchmark.save(benchmark.run(), args.benchmark_render)
+        except KeyboardInterrupt:
+            print '\nAborted'
+            exit(1)
+    elif args.benchmark_spectrum is not None:
+        from rtlsdr_scanner.benchmark import SpectrumBenchmark
+        if profile is not None:
+            profile.report()
+        try:
+            benchmark = SpectrumBenchmark(args.benchmark_baseline)
+            results = benchmark.run()
+            benchmark.save(results, args.benchmark_spectrum)
+        except KeyboardInterrupt:
+            print '\nAborted'
+            exit(1)
+        if len(results['regressions']):
+            print 'Scaling regressions: {}'.format(', '.join(results['regressions']))
+            exit(1)
+        if args.benchmark_baseline is None:
+            print 'No baseline given, use {} as the baseline for later ' \
+                'runs'.format(args.benchmark_spectrum)
+    elif args.benchmark is not None:
+        from rtlsdr_scanner.benchmark import Benchmark
+        if profile is not None:
+            profile.report()
+        try:
+            benchmark = Benchmark(args.simulate, args.remote)
+            benchmark.save(benchmark.run(args.benchmark_scenarios),
+                           args.benchmark)
+        except KeyboardInterrupt:
+            print '\nAborted'
+            exit(1)
+        except IOError as error:
+            print 'Error: {}'.format(error)
+            exit(1)
+    elif args.serve_rtltcp is not None:
+        from rtlsdr_scanner.rtltcp_server import RtlTcpEmulator
+        if profile is not None:
+            profile.report()
+        bandwidth = args.emu_bandwidth
+        if bandwidth is not None:
+            bandwidth *= 1e3
+        try:
+            RtlTcpEmulator(args.serve_rtltcp, args.simulate, args.emu_latency,
+                           bandwidth, args.emu_stall,
+                           args.emu_disconnect).serve()
+        except KeyboardInterrupt:
+            print '\nStopped'
+    elif args.serve_node is not None:
+        from rtlsdr_scanner.node import Node
+        if profile is not None:
+            profile.report()
+        try:
+            Node(args.index, args.serve_node, args.simulate,
+                 args.metrics_bind).serve()
+        except KeyboardInterrupt:
+            print '\nStopped'
     else:
+        from rtlsdr_scanner.cli import Cli
+        if profile is not None:
+            profile.report()
         try:
             Cli(args)
         except KeyboardInterrupt:
@@ -0,0 +1,548 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import Queue
+from collections import OrderedDict
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import threading
+import time
+
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy
+
+from rtlsdr_scanner import spectrum as spectrumFuncs
+from rtlsdr_scanner.constants import SAMPLE_RATE, Display, PlotFunc
+from rtlsdr_scanner.devices import DeviceRTL
+from rtlsdr_scanner.events import Event
+from rtlsdr_scanner.misc import calc_samples
+from rtlsdr_scanner.plot_line import Plotter
+from rtlsdr_scanner.plot_spect import Spectrogram
+from rtlsdr_scanner.plot_status import PlotterStatus
+from rtlsdr_scanner.plot_time import PlotterTime
+from rtlsdr_scanner.rtlsim import RtlSim
+from rtlsdr_scanner.rtltcp import RtlTcp
+from rtlsdr_scanner.scan import ThreadScan, ThreadProcess, update_spectrum
+from rtlsdr_scanner.settings import Settings
+from rtlsdr_scanner.version import VERSION
+
+
+SCENARIO_DEFAULT = {'seed': 0,
+                    'noise': -60,
+                    'tones': [{'freq': 101.0, 'level': -20},
+                              {'freq': 150.0, 'level': -30},
+                              {'freq': 433.92, 'level': -25}],
+                    'carriers': [{'freq': 100.5, 'modulation': 'fm'},
+                                 {'freq': 120.0, 'modulation': 'am'}]}
+
+
+class TimedSdr(object):
+    def __init__(self, sdr):
+        self.sdr = sdr
+        self.tune = []
+        self.read = []
+
+    def set_center_freq(self, freq):
+        timeStart = time.time()
+        self.sdr.set_center_freq(freq)
+        self.tune.append(time.time() - timeStart)
+
+    def read_samples(self, samples):
+        timeStart = time.time()
+        data = self.sdr.read_samples(samples)
+        self.read.append(time.time() - timeStart)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.sdr, name)
+
+
+class Benchmark(object):
+    PERCENTILES = [50, 90, 99]
+
+    SCENARIOS = OrderedDict([
+        ('zoom', {'start': 100, 'stop': 102, 'nfft': 1024,
+                  'dwell': 0.008, 'sweeps': 10, 'retain': False}),
+        ('100MHz', {'start': 100, 'stop': 200, 'nfft': 1024,
+                    'dwell': 0.008, 'sweeps': 2, 'retain': False}),
+        ('1GHz', {'start': 100, 'stop': 1100, 'nfft': 1024,
+                  'dwell': 0.008, 'sweeps': 1, 'retain': False}),
+        ('continuous', {'start': 100, 'stop': 110, 'nfft': 1024,
+                        'dwell': 0.008, 'sweeps': 50, 'retain': True}),
+        ('fft1k', {'start': 100, 'stop': 120, 'nfft': 1024,
+                   'dwell': 0.032, 'sweeps': 2, 'retain': False}),
+        ('fft16k', {'start': 100, 'stop': 120, 'nfft': 16384,
+                    'dwell': 0.032, 'sweeps': 2, 'retain': False}),
+        ('fft32k', {'start': 100, 'stop': 120, 'nfft': 32768,
+                    'dwell': 0.032, 'sweeps': 2, 'retain': False})])
+
+    def __init__(self, scenario=None, remote=None):
+        self.scenario = scenario
+        self.remote = remote
+
+        self.settings = Settings(load=False)
+        device = DeviceRTL()
+        device.isDevice = False
+        if remote is not None:
+            device.server, device.port = remote
+        else:
+            device.type = DeviceRTL.SIM
+            device.scenario = scenario
+        self.settings.devicesRtl = [device]
+        self.settings.indexRtl = 0
+
+    def __open(self):
+        if self.remote is not None:
+            sdr = RtlTcp(self.remote[0], self.remote[1], Queue.Queue())
+        elif self.scenario is not None:
+            sdr = RtlSim(self.scenario)
+        else:
+            sdr = RtlSim(SCENARIO_DEFAULT)
+        sdr.set_sample_rate(SAMPLE_RATE)
+        sdr.set_gain(0)
+
+        return TimedSdr(sdr)
+
+    def __get_cpu(self):
+        cores = []
+        try:
+            with open('/proc/stat', 'rb') as f:
+                for line in f:
+                    fields = line.split()
+                    if fields[0].startswith('cpu') and fields[0] != 'cpu':
+                        values = [int(value) for value in fields[1:]]
+                        idle = values[3] + values[4]
+                        cores.append((sum(values) - idle, sum(values)))
+        except IOError:
+            pass
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+
+        return time.time(), usage.ru_utime + usage.ru_stime, cores
+
+    def __get_usage(self, cpuStart, cpuEnd):
+        elapsed = cpuEnd[0] - cpuStart[0]
+        process = (cpuEnd[1] - cpuStart[1]) / elapsed
+        cores = []
+        for (busyStart, totalStart), (busyEnd, totalEnd) in zip(cpuStart[2],
+                                                                cpuEnd[2]):
+            total = totalEnd - totalStart
+            if total:
+                cores.append(round(float(busyEnd - busyStart) / total, 3))
+            else:
+                cores.append(0.)
+
+        return {'process': round(process, 3), 'cores': cores}
+
+    @staticmethod
+    def get_stats(values):
+        if not len(values):
+            return None
+        values = numpy.array(values) * 1000.
+        stats = OrderedDict([('count', len(values)),
+                             ('mean', float(numpy.mean(values)))])
+        for percentile in Benchmark.PERCENTILES:
+            stats['p{}'.format(percentile)] = float(numpy.percentile(values,
+                                                                     percentile))
+        stats['max'] = float(numpy.max(values))
+
+        return stats
+
+    def __sweep(self, sdr, samples, sweep, spectrum, stages):
+        settings = self.settings
+        device = settings.devicesRtl[0]
+        notify = Queue.Queue()
+        queue = Queue.Queue()
+        updates = Queue.Queue()
+        lock = threading.Lock()
+        steps = 0
+
+        thread = ThreadScan(notify, queue, sdr, settings, 0, samples, False)
+        while True:
+            event = notify.get()
+            status = event.data.get_status()
+            if status == Event.DATA:
+                freq, scan, _device = queue.get()
+                timeStart = time.time()
+                ThreadProcess(updates, freq, scan, device.calibration,
+                              device.levelOff, settings.nfft,
+                              settings.overlap, settings.winFunc).run()
+                _timeStamp, freqCentre, data = updates.get().data.get_arg1()
+                stages['process'].append(time.time() - timeStart)
+
+                timeStart = time.time()
+                update_spectrum(updates, lock, settings.start, settings.stop,
+                                (sweep, freqCentre, data), device.offset,
+                                spectrum, not settings.retainScans)
+                updates.get()
+                stages['update'].append(time.time() - timeStart)
+                steps += 1
+            elif status == Event.ERROR:
+                thread.join()
+                raise IOError(event.data.get_arg2())
+            elif status == Event.FINISHED:
+                thread.join()
+                return steps
+
+    def __run(self, scenario):
+        settings = self.settings
+        settings.start = scenario['start']
+        settings.stop = scenario['stop']
+        settings.nfft = scenario['nfft']
+        settings.dwell = scenario['dwell']
+        settings.retainScans = scenario['retain']
+        samples = calc_samples(settings.dwell)
+
+        sdr = self.__open()
+        spectrum = OrderedDict()
+        stages = OrderedDict([('tune', sdr.tune),
+                              ('read', sdr.read),
+                              ('process', []),
+                              ('update', []),
+                              ('sweep', [])])
+        steps = 0
+
+        cpuStart = self.__get_cpu()
+        try:
+            for sweep in range(scenario['sweeps']):
+                timeStart = time.time()
+                steps += self.__sweep(sdr, samples, sweep, spectrum, stages)
+                stages['sweep'].append(time.time() - timeStart)
+        finally:
+            sdr.close()
+        cpuEnd = self.__get_cpu()
+        elapsed = cpuEnd[0] - cpuStart[0]
+
+        result = OrderedDict(scenario)
+        result['samples'] = samples
+        result['steps'] = steps
+        result['time'] = elapsed
+        result['sweepsPerSec'] = scenario['sweeps'] / elapsed
+        result['stepsPerSec'] = steps / elapsed
+        result['points'] = sum([len(sweep) for sweep in spectrum.itervalues()])
+        result['stages'] = OrderedDict([(stage, self.get_stats(values))
+                                        for stage, values in stages.iteritems()])
+        result['rssPeak'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result['cpu'] = self.__get_usage(cpuStart, cpuEnd)
+
+        return result
+
+    def run(self, names=None):
+        if names is None:
+            names = self.SCENARIOS.keys()
+
+        if self.remote is not None:
+            source = '{}:{}'.format(*self.remote)
+        elif self.scenario is not None:
+            source = self.scenario
+        else:
+            source = 'Simulated'
+
+        results = OrderedDict([('version', '.'.join([str(x) for x in VERSION])),
+                               ('python', platform.python_version()),
+                               ('machine', platform.machine()),
+                               ('cpus', len(self.__get_cpu()[2])),
+                               ('source', source),
+                               ('time', time.time()),
+                               ('scenarios', OrderedDict())])
+
+        for name in names:
+            print 'Benchmark {}...'.format(name),
+            result = self.__run(self.SCENARIOS[name])
+            results['scenarios'][name] = result
+            print '{:.2f} sweeps/s, {:.1f} steps/s'.format(result['sweepsPerSec'],
+                                                          result['stepsPerSec'])
+
+        return results
+
+    def save(self, results, filename):
+        with open(filename, 'wb') as f:
+            json.dump(results, f, indent=4)
+            f.write(os.linesep)
+
+
+class SpectrumBenchmark(object):
+    REPEATS = 3
+    TOLERANCE = 0.25
+    BINS = 1024
+    SWEEPS = 4
+    AXES = OrderedDict([('sweeps', [4, 8, 16, 32, 64]),
+                        ('bins', [1024, 2048, 4096, 8192, 16384])])
+
+    FUNCTIONS = OrderedDict([
+        ('Extent', lambda s, f: spectrumFuncs.Extent(s)),
+        ('Measure', lambda s, f: spectrumFuncs.Measure(s, f[0], f[1])),
+        ('reduce_points',
+         lambda s, f: spectrumFuncs.reduce_points(s,
+                                                  spectrumFuncs.count_points(s) / 4)),
+        ('slice_spectrum',
+         lambda s, f: spectrumFuncs.slice_spectrum(s, f[0], f[1])),
+        ('create_mesh', lambda s, f: spectrumFuncs.create_mesh(s, True)),
+        ('sort_spectrum', lambda s, f: spectrumFuncs.sort_spectrum(s)),
+        ('smooth_spectrum',
+         lambda s, f: spectrumFuncs.smooth_spectrum(s, 'Hamming', 16)),
+        ('diff_spectrum', lambda s, f: spectrumFuncs.diff_spectrum(s)),
+        ('delta_spectrum', lambda s, f: spectrumFuncs.delta_spectrum(s)),
+        ('get_peaks', lambda s, f: spectrumFuncs.get_peaks(s, -60))])
+
+    def __init__(self, baseline=None):
+        self.baseline = None
+        if baseline is not None:
+            with open(baseline, 'rb') as f:
+                self.baseline = json.load(f)
+
+    @staticmethod
+    def create_spectrum(sweeps, bins, seed=0):
+        random = numpy.random.RandomState(seed)
+        freqs = numpy.linspace(100, 200, bins).tolist()
+        spectrum = OrderedDict()
+        timeStamp = 1400000000
+        for sweep in range(sweeps):
+            levels = random.normal(-70, 5, bins)
+            levels[bins / 4::bins / 8] += 40
+            spectrum[timeStamp + sweep] = OrderedDict(zip(freqs,
+                                                          levels.tolist()))
+
+        return spectrum
+
+    @staticmethod
+    def measure(name, sweeps, bins, repeats, queue):
+        function = SpectrumBenchmark.FUNCTIONS[name]
+        spectrum = SpectrumBenchmark.create_spectrum(sweeps, bins)
+        freqs = (100, 200)
+        rssStart = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        elapsed = []
+        for _repeat in range(repeats):
+            timeStart = time.time()
+            function(spectrum, freqs)
+            elapsed.append(time.time() - timeStart)
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rssStart
+        queue.put((min(elapsed), rss))
+
+    def __measure(self, name, sweeps, bins):
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=SpectrumBenchmark.measure,
+                                          args=(name, sweeps, bins,
+                                                self.REPEATS, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+
+        return result
+
+    def __get_limit(self, name, axis):
+        if self.baseline is not None:
+            try:
+                exponent = self.baseline['functions'][name][axis]['exponent']
+                return exponent + self.TOLERANCE
+            except KeyError:
+                pass
+
+        return None
+
+    def run(self):
+        results = OrderedDict([('version', '.'.join([str(x) for x in VERSION])),
+                               ('python', platform.python_version()),
+                               ('machine', platform.machine()),
+                               ('time', time.time()),
+                               ('functions', OrderedDict()),
+                               ('regressions', [])])
+
+        for name in self.FUNCTIONS:
+            results['functions'][name] = OrderedDict()
+            for axis, sizes in self.AXES.iteritems():
+                times = []
+                memory = []
+                for size in sizes:
+                    if axis == 'sweeps':
+                        elapsed, rss = self.__measure(name, size, self.BINS)
+                    else:
+                        elapsed, rss = self.__measure(name, self.SWEEPS, size)
+                    times.append(elapsed)
+                    memory.append(rss)
+
+                exponent = numpy.polyfit(numpy.log(sizes),
+                                         numpy.log(numpy.maximum(times, 1e-6)),
+                                         1)[0]
+                limit = self.__get_limit(name, axis)
+                results['functions'][name][axis] = OrderedDict([('sizes', sizes),
+                                                                ('times', times),
+                                                                ('memory', memory),
+                                                                ('exponent', exponent),
+                                                                ('limit', limit)])
+                if limit is None:
+                    limitStr = 'no baseline'
+                else:
+                    limitStr = 'limit {:.2f}'.format(limit)
+                print '{:<16} {:<7} exponent {:.2f} ({}), ' \
+                    '{:.1f}ms at {}'.format(name, axis, exponent, limitStr,
+                                            times[-1] * 1000, sizes[-1])
+                if limit is not None and exponent > limit:
+                    results['regressions'].append('{} ({})'.format(name, axis))
+
+        return results
+
+    def save(self, results, filename):
+        with open(filename, 'wb') as f:
+            json.dump(results, f, indent=4)
+            f.write(os.linesep)
+
+
+class RenderBenchmark(object):
+    FRAMES = 10
+    SWEEPS = 16
+    BINS = 4096
+    WIDTH = 8
+    HEIGHT = 6
+    DPI = 100
+
+    FUNCS = ['none', 'avg', 'min', 'max', 'var', 'smooth', 'diff', 'delta']
+    DISPLAYS = OrderedDict([
+        ('plot', (Display.PLOT, [PlotFunc.NONE, PlotFunc.AVG, PlotFunc.MIN,
+                                 PlotFunc.MAX, PlotFunc.VAR, PlotFunc.SMOOTH,
+                                 PlotFunc.DIFF, PlotFunc.DELTA])),
+        ('spectrogram', (Display.SPECT, [PlotFunc.NONE, PlotFunc.SMOOTH,
+                                         PlotFunc.DIFF])),
+        ('surface', (Display.SURFACE, [PlotFunc.NONE, PlotFunc.SMOOTH,
+                                       PlotFunc.DIFF])),
+        ('status', (Display.STATUS, [PlotFunc.NONE])),
+        ('timeline', (Display.TIMELINE, [PlotFunc.NONE]))])
+
+    def __init__(self, sweeps=None, bins=None, frames=None):
+        self.sweeps = sweeps or self.SWEEPS
+        self.bins = bins or self.BINS
+        self.frames = frames or self.FRAMES
+
+        self.settings = Settings(load=False)
+        self.settings.start = 100
+        self.settings.stop = 200
+        self.spectrum = SpectrumBenchmark.create_spectrum(self.sweeps,
+                                                          self.bins)
+
+    def __create_plot(self, notify, figure):
+        display = self.settings.display
+        if display == Display.PLOT:
+            return Plotter(notify, figure, self.settings)
+        elif display == Display.SPECT:
+            return Spectrogram(notify, figure, self.settings)
+        elif display == Display.SURFACE:
+            from rtlsdr_scanner.plot_3d import Plotter3d
+            return Plotter3d(notify, figure, self.settings)
+        elif display == Display.STATUS:
+            return PlotterStatus(notify, figure, self.settings)
+
+        return PlotterTime(notify, figure, self.settings)
+
+    def __frame(self, plot, canvas, notify, stages):
+        timeStart = time.time()
+        spectrum = self.spectrum
+        if self.settings.pointsLimit:
+            spectrum = spectrumFuncs.reduce_points(spectrum,
+                                                   self.settings.pointsMax)
+        extent = spectrumFuncs.Extent(spectrum)
+        threadPlot = plot.set_plot(spectrum, extent, self.settings.annotate)
+        if threadPlot is not None:
+            threadPlot.join()
+        timePrepare = time.time() - timeStart
+
+        timeStart = time.time()
+        canvas.draw()
+        timeDraw = time.time() - timeStart
+
+        while not notify.empty():
+            notify.get()
+
+        stages['prepare'].append(timePrepare)
+        stages['draw'].append(timeDraw)
+        stages['frame'].append(timePrepare + timeDraw)
+
+    def __run(self, display, plotFunc):
+        self.settings.display = display
+        self.settings.plotFunc = plotFunc
+
+        notify = Queue.Queue()
+        figure = Figure(facecolor='white',
+                        figsize=(self.WIDTH, self.HEIGHT), dpi=self.DPI)
+        canvas = FigureCanvasAgg(figure)
+        plot = self.__create_plot(notify, figure)
+        figure.subplots_adjust(top=0.85)
+        plot.scale_plot(True)
+
+        stages = OrderedDict([('prepare', []),
+                              ('draw', []),
+                              ('frame', [])])
+        try:
+            for _frame in range(self.frames + 1):
+                self.__frame(plot, canvas, notify, stages)
+        finally:
+            plot.close()
+        for values in stages.itervalues():
+            del values[0]
+
+        return OrderedDict([(stage, Benchmark.get_stats(values))
+                            for stage, values in stages.iteritems()])
+
+    def run(self):
+        results = OrderedDict([('version', '.'.join([str(x) for x in VERSION])),
+                               ('python', platform.python_version()),
+                               ('matplotlib', matplotlib.__version__),
+                               ('machine', platform.machine()),
+                               ('time', time.time()),
+                               ('sweeps', self.sweeps),
+                               ('bins', self.bins),
+                               ('frames', self.frames),
+                               ('size', [self.WIDTH * self.DPI,
+                                         self.HEIGHT * self.DPI]),
+                               ('displays', OrderedDict())])
+
+        for name, (display, plotFuncs) in self.DISPLAYS.iteritems():
+            results['displays'][name] = OrderedDict()
+            for plotFunc in plotFuncs:
+                func = self.FUNCS[plotFunc]
+                stages = self.__run(display, plotFunc)
+                results['displays'][name][func] = stages
+                print '{:<12} {:<7} prepare {:.1f}ms, ' \
+                    'draw {:.1f}ms'.format(name, func,
+                                           stages['prepare']['mean'],
+                                           stages['draw']['mean'])
+
+        return results
+
+    def save(self, results, filename):
+        with open(filename, 'wb') as f:
+            json.dump(results, f, indent=4)
+            f.write(os.linesep)
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
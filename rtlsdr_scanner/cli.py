@@ -32,13 +32,17 @@ import threading
 import time
 from urlparse import urlparse
 
-from rtlsdr_scanner.constants import SAMPLE_RATE
+from rtlsdr_scanner.constants import SAMPLE_RATE, NODE_PORT
 from rtlsdr_scanner.devices import DeviceRTL, get_devices_rtl
-from rtlsdr_scanner.events import Event
-from rtlsdr_scanner.file import save_plot, export_plot, ScanInfo, File
+from rtlsdr_scanner.events import Event, EventThread, post_event
+from rtlsdr_scanner.file import save_plot, export_plot, ScanInfo, File, \
+    create_rfb
 from rtlsdr_scanner.location import ThreadLocation
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import nearest, calc_real_dwell, next_2_to_pow, get_dwells
-from rtlsdr_scanner.scan import ThreadScan, update_spectrum, ThreadProcess
+from rtlsdr_scanner.node import ThreadScanNode
+from rtlsdr_scanner.scan import ThreadScan, update_spectrum, ThreadProcess, \
+    ThreadScanMulti, LevelCorrection
 from rtlsdr_scanner.settings import Settings
 
 
@@ -53,8 +57,14 @@ class Cli(object):
         lo = args.lo
         index = args.index
         remote = args.remote
+        multi = args.multi
+        nodes = args.nodes
+        simulate = args.simulate
         directory, filename = os.path.split(args.file)
-        _null, ext = os.path.splitext(args.file)
+        name, ext = os.path.splitext(args.file)
+        compress = ext.lower() == '.gz'
+        if compress:
+            ext = os.path.splitext(name)[1]
 
         self.lock = threading.Lock()
 
@@ -70,6 +80,11 @@ class Cli(object):
         self.queueLocation = Queue.Queue()
 
         self.threadLocation = None
+        self.writer = None
+        self.writerName = None
+        self.devices = None
+        self.isNode = nodes is not None
+        self.levelCorrection = None
 
         error = None
 
@@ -81,13 +96,65 @@ class Cli(object):
             error = "Dwell should equal lower than {}s".format(max(get_dwells()[1::2]))
         elif nfft <= 0:
             error = "FFT bins should be positive"
-        elif ext != ".rfs" and File.get_type_index(ext) == -1:
+        elif File.get_type_index(ext, File.Types.SAVE) == -1 and \
+                File.get_type_index(ext) == -1:
             error = "File extension should be "
             error += File.get_type_pretty(File.Types.SAVE)
             error += File.get_type_pretty(File.Types.PLOT)
+        elif compress and File.get_type_index(ext) in [-1,
+                                                        File.PlotType.NPZ,
+                                                        File.PlotType.NPY]:
+            error = "Only text exports can be compressed"
         else:
             device = DeviceRTL()
-            if remote is None:
+            if multi is not None:
+                self.settings.devicesRtl = get_devices_rtl()
+                count = len(self.settings.devicesRtl)
+                try:
+                    self.devices = [int(dev) for dev in multi.split(',')]
+                except ValueError:
+                    error = "Invalid device list"
+                else:
+                    for dev in self.devices:
+                        if not 0 <= dev < count:
+                            error = "Device {} not found ({} devices in total)".format(dev,
+                                                                                 count)
+                    if len(set(self.devices)) < 2:
+                        error = "At least two devices are needed"
+                    elif error is None:
+                        index = self.devices[0]
+                        self.levelCorrection = LevelCorrection(index)
+            elif nodes is not None:
+                devices = []
+                for server in nodes.split(','):
+                    device = DeviceRTL()
+                    device.isDevice = False
+                    device.type = DeviceRTL.NODE
+                    url = urlparse('//' + server)
+                    if url.hostname is not None:
+                        device.server = url.hostname
+                    else:
+                        error = "Invalid hostname"
+                    if url.port is not None:
+                        device.port = url.port
+                    else:
+                        device.port = NODE_PORT
+                    self.settings.devicesRtl.append(device)
+                    devices.append(len(self.settings.devicesRtl) - 1)
+                index = devices[0]
+                self.devices = devices
+                if len(devices) > 1:
+                    self.levelCorrection = LevelCorrection(index)
+            elif simulate is not None:
+                if os.path.exists(simulate):
+                    device.isDevice = False
+                    device.type = DeviceRTL.SIM
+                    device.scenario = simulate
+                    self.settings.devicesRtl.append(device)
+                    index = len(self.settings.devicesRtl) - 1
+                else:
+                    error = 'Cannot find {}'.format(simulate)
+            elif remote is None:
                 self.settings.devicesRtl = get_devices_rtl()
                 count = len(self.settings.devicesRtl)
                 if index > count - 1:
@@ -96,18 +163,25 @@ class Cli(object):
                         error += "\t{}: {}\n".format(device.indexRtl,
                                                      device.name)
             else:
-                device.isDevice = False
-                url = urlparse('//' + remote)
-                if url.hostname is not None:
-                    device.server = url.hostname
-                else:
-                    error = "Invalid hostname"
-                if url.port is not None:
-                    device.port = url.port
-                else:
-                    device.port = 1234
-                self.settings.devicesRtl.append(device)
-                index = len(self.settings.devicesRtl) - 1
+                devices = []
+                for server in remote.split(','):
+                    device = DeviceRTL()
+                    device.isDevice = False
+                    url = urlparse('//' + server)
+                    if url.hostname is not None:
+                        device.server = url.hostname
+                    else:
+                        error = "Invalid hostname"
+                    if url.port is not None:
+                        device.port = url.port
+                    else:
+                        device.port = 1234
+                    self.settings.devicesRtl.append(device)
+                    devices.append(len(self.settings.devicesRtl) - 1)
+                index = devices[0]
+                if len(devices) > 1:
+                    self.devices = devices
+                    self.levelCorrection = LevelCorrection(index)
 
             if args.conf is not None:
                 if os.path.exists(args.conf):
@@ -119,7 +193,8 @@ class Cli(object):
 
             if end - 1 < start:
                 end = start + 1
-            if remote is None:
+            if remote is None and nodes is None and simulate is None and \
+                    error is None:
                 if len(self.settings.devicesRtl):
                     gain = nearest(gain, self.settings.devicesRtl[index].gains)
                 else:
@@ -134,8 +209,17 @@ class Cli(object):
         self.settings.dwell = calc_real_dwell(dwell)
         self.settings.scanDelay = args.delay
         self.settings.nfft = nfft
+        self.settings.indexRtl = index
         self.settings.devicesRtl[index].gain = gain
         self.settings.devicesRtl[index].lo = lo
+        if self.devices is not None:
+            for dev in self.devices:
+                device = self.settings.devicesRtl[dev]
+                if device.isDevice:
+                    device.gain = nearest(gain, device.gains)
+                else:
+                    device.gain = gain
+                device.lo = lo
 
         print "{} - {}MHz".format(start, end)
         print "{} Sweeps".format(sweeps)
@@ -145,6 +229,13 @@ class Cli(object):
         print "{}MHz LO".format(lo)
         if remote is not None:
             print remote
+        elif nodes is not None:
+            print nodes
+        elif simulate is not None:
+            print 'Simulated ({})'.format(simulate)
+        elif self.devices is not None:
+            for dev in self.devices:
+                print self.settings.devicesRtl[dev].name
         else:
             print self.settings.devicesRtl[index].name
 
@@ -156,19 +247,29 @@ class Cli(object):
                 self.__gps_stop()
                 exit(1)
 
+        fullName = os.path.join(directory, filename)
+        if ext == ".rfb":
+            self.writerName = fullName
+
+        metrics.clear()
         self.__scan(sweeps, self.settings, index)
 
-        fullName = os.path.join(directory, filename)
-        if ext == ".rfs":
+        if self.writerName is not None:
+            self.__get_writer().close()
+        elif ext == ".rfs":
             scanInfo = ScanInfo()
             scanInfo.set_from_settings(self.settings)
 
             save_plot(fullName, scanInfo, self.spectrum, self.locations)
         else:
             exportType = File.get_type_index(ext)
-            export_plot(fullName, exportType, self.spectrum)
+            export_plot(fullName, exportType, self.spectrum, self.locations)
 
         self.__gps_stop()
+        if args.profile is not None:
+            print metrics.format_summary()
+            metrics.save(args.profile)
+            print '\nProfile saved to {}'.format(args.profile)
         print "Done"
 
     def __gps_wait(self):
@@ -186,26 +287,62 @@ class Cli(object):
         if self.threadLocation and self.threadLocation.isAlive():
             self.threadLocation.stop()
 
+    def __get_writer(self):
+        if self.writer is None:
+            scanInfo = ScanInfo()
+            scanInfo.set_from_settings(self.settings)
+            self.writer = create_rfb(self.writerName, scanInfo)
+
+        return self.writer
+
     def __scan(self, sweeps, settings, index):
         samples = settings.dwell * SAMPLE_RATE
         samples = next_2_to_pow(int(samples))
 
         for sweep in range(0, sweeps):
             print '\nSweep {}:'.format(sweep + 1)
-            threadScan = ThreadScan(self.queueNotify, self.queueScan, None,
-                                    settings, index, samples, False)
+            metrics.start_sweep()
+            if self.isNode:
+                threadScan = ThreadScanNode(self.queueNotify, None, settings,
+                                            self.devices, samples, False,
+                                            self.levelCorrection)
+            elif self.devices is not None:
+                threadScan = ThreadScanMulti(self.queueNotify, self.queueScan,
+                                             None, settings, self.devices,
+                                             samples, False)
+            else:
+                threadScan = ThreadScan(self.queueNotify, self.queueScan, None,
+                                        settings, index, samples, False)
             while threadScan.isAlive() or self.steps > 0:
                 if not self.queueNotify.empty():
                     self.__process_event(self.queueNotify)
                 if not self.queueLocation.empty():
                     self.__process_event(self.queueLocation)
+            metrics.end_sweep()
+            if self.writerName is not None and len(self.spectrum):
+                writer = self.__get_writer()
+                timeStamp = max(self.spectrum)
+                writer.add_sweep(timeStamp, self.spectrum[timeStamp])
+                if timeStamp in self.locations:
+                    writer.add_location(timeStamp, self.locations[timeStamp])
+                writer.flush()
             if self.settings.scanDelay > 0 and sweep < sweeps - 1:
                 print '\nDelaying {}s'.format(self.settings.scanDelay)
                 time.sleep(self.settings.scanDelay)
             threadScan.rtl_close()
             print ""
+            if self.devices is not None and not self.isNode:
+                self.__print_stats(threadScan.get_stats())
         print ""
 
+    def __print_stats(self, stats):
+        for device, (steps, rate, duplicates, requeued, failed) in stats.iteritems():
+            name = self.settings.devicesRtl[device].get_desc()
+            print '{}: {} steps, {:.1f} steps/s, ' \
+                '{} duplicate, {} requeued{}'.format(name, steps, rate,
+                                                     duplicates, requeued,
+                                                     ' (failed)' if failed else '')
+
     def __process_event(self, queue):
         event = queue.get()
         status = event.data.get_status()
@@ -221,19 +358,27 @@ class Cli(object):
             if arg2 != -1:
                 self.settings.devicesRtl[self.settings.indexRtl].tuner = arg2
         elif status == Event.DATA:
-            cal = self.settings.devicesRtl[self.settings.indexRtl].calibration
-            levelOff = self.settings.devicesRtl[self.settings.indexRtl].levelOff
-            freq, scan = self.queueScan.get()
-            process = ThreadProcess(self.queueNotify,
-                                    freq, scan, cal, levelOff,
-                                    self.settings.nfft,
-                                    self.settings.overlap,
-                                    self.settings.winFunc)
-            process.start()
+            if arg2 is not None:
+                post_event(self.queueNotify,
+                           EventThread(Event.PROCESSED, arg2))
+            else:
+                freq, scan, device = self.queueScan.get()
+                cal = self.settings.devicesRtl[device].calibration
+                levelOff = self.settings.devicesRtl[device].levelOff
+                process = ThreadProcess(self.queueNotify,
+                                        freq, scan, cal, levelOff,
+                                        self.settings.nfft,
+                                        self.settings.overlap,
+                                        self.settings.winFunc,
+                                        device, self.levelCorrection)
+                process.start()
             self.__progress()
         elif status == Event.ERROR:
             print "Error: {}".format(arg2)
             exit(1)
+        elif status == Event.SCAN_WARN:
+            metrics.add_count('errors')
+            print "\nWarning: {}".format(arg2)
         elif status == Event.PROCESSED:
             offset = self.settings.devicesRtl[self.settings.indexRtl].offset
             Thread(target=update_spectrum, name='Update',
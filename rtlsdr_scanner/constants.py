@@ -35,6 +35,7 @@ SAMPLE_RATE = 2e6
 BANDWIDTH = 500e3
 
 LOCATION_PORT = 7786
+NODE_PORT = 7787
 
 MODE = ["Single", 0,
         "Continuous", 1,
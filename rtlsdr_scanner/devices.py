@@ -23,6 +23,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 from ctypes import c_ubyte, string_at
+import threading
 
 import rtlsdr
 import serial
@@ -67,13 +68,18 @@ class DeviceGPS(object):
 
 
 class DeviceRTL(object):
+    TCP, NODE, SIM = range(3)
+    TYPE = ['rtl_tcp', 'Node', 'Simulated']
+
     def __init__(self):
         self.isDevice = True
+        self.type = self.TCP
         self.indexRtl = None
         self.name = None
         self.serial = ''
         self.server = 'localhost'
         self.port = 1234
+        self.scenario = ''
         self.gains = []
         self.gain = 0
         self.calibration = 0
@@ -81,6 +87,7 @@ class DeviceRTL(object):
         self.offset = 250e3
         self.tuner = 0
         self.levelOff = 0
+        self.multi = False
 
     def set(self, device):
         self.gain = device.gain
@@ -89,6 +96,15 @@ class DeviceRTL(object):
         self.offset = device.offset
         self.tuner = device.tuner
         self.levelOff = device.levelOff
+        self.multi = device.multi
+
+    def get_desc(self):
+        if self.isDevice:
+            return self.name
+        if self.type == DeviceRTL.SIM:
+            return self.scenario
+
+        return '{}:{}'.format(self.server, self.port)
 
     def get_gains_str(self):
         gainsStr = []
@@ -111,6 +127,7 @@ def get_devices_rtl(currentDevices=None, statusBar=None):
         currentDevices = []
 
     devices = []
+    probes = []
     count = rtlsdr.librtlsdr.rtlsdr_get_device_count()
 
     for dev in range(0, count):
@@ -123,19 +140,24 @@ def get_devices_rtl(currentDevices=None, statusBar=None):
         rtlsdr.librtlsdr.rtlsdr_get_device_usb_strings(dev, buffer1, buffer2,
                                                        serial)
         device.serial = string_at(serial)
-        try:
-            sdr = rtlsdr.RtlSdr(dev)
-        except IOError:
-            continue
-        device.gains = sdr.valid_gains_db
         device.calibration = 0.0
         device.lo = 0.0
         for conf in currentDevices:
             if conf.isDevice and device.name == conf.name and device.serial == conf.serial:
                 device.set(conf)
+                if conf.tuner:
+                    device.gains = conf.gains
+
+        if not device.gains:
+            probes.append(ThreadProbe(device))
 
         devices.append(device)
 
+    for probe in probes:
+        probe.join()
+        if not probe.found:
+            devices.remove(probe.device)
+
     for conf in currentDevices:
         if not conf.isDevice:
             devices.append(conf)
@@ -146,6 +168,30 @@ def get_devices_rtl(currentDevices=None, statusBar=None):
     return devices
 
 
+class ThreadProbe(threading.Thread):
+    def __init__(self, device):
+        threading.Thread.__init__(self)
+        self.name = 'Probe'
+        self.device = device
+        self.found = False
+
+        self.start()
+
+    def run(self):
+        try:
+            sdr = rtlsdr.RtlSdr(self.device.indexRtl)
+            try:
+                gains = sdr.valid_gains_db
+                tuner = sdr.get_tuner_type()
+            finally:
+                sdr.close()
+            self.device.gains = gains
+            self.device.tuner = tuner
+            self.found = True
+        except IOError:
+            pass
+
+
 def format_device_rtl_name(name):
     remove = ["/", "\\"]
     for char in remove:
@@ -40,8 +40,8 @@ from rtlsdr_scanner.misc import nearest, limit, get_serial_ports
 
 
 class DialogDevicesRTL(wx.Dialog):
-    COLS = 10
-    COL_SEL, COL_DEV, COL_TUN, COL_SER, COL_IND, \
+    COLS = 12
+    COL_SEL, COL_MULTI, COL_DEV, COL_TYPE, COL_TUN, COL_SER, COL_IND, \
         COL_GAIN, COL_CAL, COL_LEVOFF, COL_LO, COL_OFF = range(COLS)
 
     def __init__(self, parent, devices, settings):
@@ -55,7 +55,9 @@ class DialogDevicesRTL(wx.Dialog):
         self.gridDev.CreateGrid(len(self.devices), self.COLS)
         self.gridDev.SetRowLabelSize(0)
         self.gridDev.SetColLabelValue(self.COL_SEL, "Selected")
+        self.gridDev.SetColLabelValue(self.COL_MULTI, "Multi\nScan")
         self.gridDev.SetColLabelValue(self.COL_DEV, "Device")
+        self.gridDev.SetColLabelValue(self.COL_TYPE, "Type")
         self.gridDev.SetColLabelValue(self.COL_TUN, "Tuner")
         self.gridDev.SetColLabelValue(self.COL_SER, "Serial Number")
         self.gridDev.SetColLabelValue(self.COL_IND, "Index")
@@ -117,12 +119,20 @@ class DialogDevicesRTL(wx.Dialog):
         i = 0
         for device in self.devices:
             self.gridDev.SetReadOnly(i, self.COL_SEL, True)
+            self.gridDev.SetReadOnly(i, self.COL_MULTI, True)
             self.gridDev.SetReadOnly(i, self.COL_DEV, device.isDevice)
+            self.gridDev.SetReadOnly(i, self.COL_TYPE, device.isDevice)
             self.gridDev.SetReadOnly(i, self.COL_TUN, True)
             self.gridDev.SetReadOnly(i, self.COL_SER, True)
             self.gridDev.SetReadOnly(i, self.COL_IND, True)
             self.gridDev.SetCellRenderer(i, self.COL_SEL,
                                          TickCellRenderer())
+            self.gridDev.SetCellRenderer(i, self.COL_MULTI,
+                                         TickCellRenderer())
+            if device.multi:
+                self.gridDev.SetCellValue(i, self.COL_MULTI, "1")
+            else:
+                self.gridDev.SetCellValue(i, self.COL_MULTI, "0")
             if device.isDevice:
                 cell = grid.GridCellChoiceEditor(map(str, device.gains),
                                                  allowOthers=False)
@@ -139,13 +149,19 @@ class DialogDevicesRTL(wx.Dialog):
                 self.gridDev.SetCellValue(i, self.COL_IND, str(i))
                 self.gridDev.SetCellBackgroundColour(i, self.COL_DEV,
                                                      colourBackground)
+                self.gridDev.SetCellValue(i, self.COL_TYPE, 'USB')
+                self.gridDev.SetCellBackgroundColour(i, self.COL_TYPE,
+                                                     colourBackground)
                 self.gridDev.SetCellValue(i, self.COL_GAIN,
                                           str(nearest(device.gain,
                                                       device.gains)))
             else:
-                self.gridDev.SetCellValue(i, self.COL_DEV,
-                                          '{}:{}'.format(device.server,
-                                                         device.port))
+                self.gridDev.SetCellValue(i, self.COL_DEV, device.get_desc())
+                cell = grid.GridCellChoiceEditor(DeviceRTL.TYPE,
+                                                 allowOthers=False)
+                self.gridDev.SetCellEditor(i, self.COL_TYPE, cell)
+                self.gridDev.SetCellValue(i, self.COL_TYPE,
+                                          DeviceRTL.TYPE[device.type])
                 self.gridDev.SetCellValue(i, self.COL_SER, '')
                 self.gridDev.SetCellValue(i, self.COL_IND, '')
                 self.gridDev.SetCellValue(i, self.COL_GAIN, str(device.gain))
@@ -170,22 +186,28 @@ class DialogDevicesRTL(wx.Dialog):
         i = 0
         for device in self.devices:
             if not device.isDevice:
+                device.type = DeviceRTL.TYPE.index(self.gridDev.GetCellValue(i,
+                                                                             self.COL_TYPE))
                 server = self.gridDev.GetCellValue(i, self.COL_DEV)
-                server = '//' + server
-                url = urlparse(server)
-                if url.hostname is not None:
-                    device.server = url.hostname
-                else:
-                    device.server = 'localhost'
-                if url.port is not None:
-                    device.port = url.port
+                if device.type == DeviceRTL.SIM:
+                    device.scenario = server
                 else:
-                    device.port = 1234
+                    server = '//' + server
+                    url = urlparse(server)
+                    if url.hostname is not None:
+                        device.server = url.hostname
+                    else:
+                        device.server = 'localhost'
+                    if url.port is not None:
+                        device.port = url.port
+                    else:
+                        device.port = 1234
             device.gain = float(self.gridDev.GetCellValue(i, self.COL_GAIN))
             device.calibration = float(self.gridDev.GetCellValue(i, self.COL_CAL))
             device.levelOff = float(self.gridDev.GetCellValue(i, self.COL_LEVOFF))
             device.lo = float(self.gridDev.GetCellValue(i, self.COL_LO))
             device.offset = float(self.gridDev.GetCellValue(i, self.COL_OFF)) * 1e3
+            device.multi = self.gridDev.GetCellValue(i, self.COL_MULTI) == "1"
             i += 1
 
     def __set_button_state(self):
@@ -199,7 +221,7 @@ class DialogDevicesRTL(wx.Dialog):
     def __warn_duplicates(self):
         servers = []
         for device in self.devices:
-            if not device.isDevice:
+            if not device.isDevice and device.type != DeviceRTL.SIM:
                 servers.append("{}:{}".format(device.server, device.port))
 
         dupes = set(servers)
@@ -219,6 +241,11 @@ class DialogDevicesRTL(wx.Dialog):
         if col == self.COL_SEL:
             self.index = event.GetRow()
             self.__select_row(index)
+        elif col == self.COL_MULTI:
+            tick = "1"
+            if self.gridDev.GetCellValue(index, self.COL_MULTI) == "1":
+                tick = "0"
+            self.gridDev.SetCellValue(index, self.COL_MULTI, tick)
         elif col == self.COL_OFF:
             device = self.devices[index]
             dlg = DialogOffset(self, device,
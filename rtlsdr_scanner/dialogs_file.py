@@ -27,10 +27,8 @@ import Queue
 import cPickle
 import os
 
-from PIL import Image
 from matplotlib import mlab, patheffects
 import matplotlib
-import matplotlib.tri
 from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
 from matplotlib.ticker import ScalarFormatter
@@ -42,12 +40,12 @@ from wx.lib.masked.numctrl import NumCtrl, EVT_NUM
 
 from rtlsdr_scanner.constants import SAMPLE_RATE, TUNER
 from rtlsdr_scanner.events import Event
-from rtlsdr_scanner.file import export_image, File
+from rtlsdr_scanner.export_seq import ExportSeq
 from rtlsdr_scanner.misc import format_time
 from rtlsdr_scanner.panels import PanelColourBar
 from rtlsdr_scanner.plot_line import Plotter
 from rtlsdr_scanner.spectrum import Extent, count_points
-from rtlsdr_scanner.utils_mpl import get_colours, create_heatmap
+from rtlsdr_scanner.utils_mpl import get_colours
 from rtlsdr_scanner.utils_wx import ValidatorCoord
 from rtlsdr_scanner.widgets import TickCellRenderer
 
@@ -318,6 +316,62 @@ class DialogImageSize(wx.Dialog):
         self.EndModal(wx.ID_OK)
 
 
+class DialogExportCont(wx.Dialog):
+    def __init__(self, parent, settings):
+        wx.Dialog.__init__(self, parent=parent, title='Continuous export')
+
+        self.settings = settings
+
+        textSize = wx.StaticText(self, label="New file every (MB)")
+        self.spinSize = wx.SpinCtrl(self)
+        self.spinSize.SetRange(0, 100000)
+        self.spinSize.SetValue(settings.exportContSize)
+        self.spinSize.SetToolTipString('Start a new file at this size, '
+                                       '0 to disable')
+
+        textTime = wx.StaticText(self, label="New file every (minutes)")
+        self.spinTime = wx.SpinCtrl(self)
+        self.spinTime.SetRange(0, 100000)
+        self.spinTime.SetValue(settings.exportContTime)
+        self.spinTime.SetToolTipString('Start a new file after this time, '
+                                       '0 to disable')
+
+        self.checkCompress = wx.CheckBox(self, wx.ID_ANY,
+                                         "Compress finished files")
+        self.checkCompress.SetValue(settings.exportContCompress)
+
+        sizerButtons = wx.StdDialogButtonSizer()
+        buttonOk = wx.Button(self, wx.ID_OK)
+        buttonCancel = wx.Button(self, wx.ID_CANCEL)
+        sizerButtons.AddButton(buttonOk)
+        sizerButtons.AddButton(buttonCancel)
+        sizerButtons.Realize()
+        self.Bind(wx.EVT_BUTTON, self.__on_ok, buttonOk)
+
+        sizer = wx.GridBagSizer(5, 5)
+        sizer.Add(textSize, pos=(0, 0),
+                  flag=wx.ALL, border=5)
+        sizer.Add(self.spinSize, pos=(0, 1),
+                  flag=wx.ALL, border=5)
+        sizer.Add(textTime, pos=(1, 0),
+                  flag=wx.ALL, border=5)
+        sizer.Add(self.spinTime, pos=(1, 1),
+                  flag=wx.ALL, border=5)
+        sizer.Add(self.checkCompress, pos=(2, 0), span=(1, 2),
+                  flag=wx.ALL, border=5)
+        sizer.Add(sizerButtons, pos=(3, 0), span=(1, 2),
+                  flag=wx.ALL | wx.ALIGN_RIGHT, border=5)
+
+        self.SetSizerAndFit(sizer)
+
+    def __on_ok(self, _event):
+        self.settings.exportContSize = self.spinSize.GetValue()
+        self.settings.exportContTime = self.spinTime.GetValue()
+        self.settings.exportContCompress = self.checkCompress.GetValue()
+
+        self.EndModal(wx.ID_OK)
+
+
 class DialogExportSeq(wx.Dialog):
     POLL = 250
 
@@ -325,7 +379,7 @@ class DialogExportSeq(wx.Dialog):
         self.spectrum = spectrum
         self.settings = settings
         self.sweeps = None
-        self.isExporting = False
+        self.export = None
 
         wx.Dialog.__init__(self, parent=parent, title='Export Plot Sequence')
 
@@ -479,47 +533,30 @@ class DialogExportSeq(wx.Dialog):
 
     def __on_timer(self, _event):
         self.timer.Stop()
-        if not self.isExporting:
-            while not self.queue.empty():
-                event = self.queue.get()
-                status = event.data.get_status()
+        while not self.queue.empty():
+            event = self.queue.get()
+            status = event.data.get_status()
 
-                if status == Event.DRAW:
-                    self.canvas.draw()
+            if status == Event.DRAW:
+                self.canvas.draw()
 
         self.timer.Start(self.POLL)
 
     def __on_ok(self, _event):
-        self.isExporting = True
-        extent = Extent(self.spectrum)
-        dlgProgress = wx.ProgressDialog('Exporting', '', len(self.sweeps),
-                                        style=wx.PD_AUTO_HIDE | 
-                                        wx.PD_CAN_ABORT | 
-                                        wx.PD_REMAINING_TIME)
+        if not len(self.sweeps):
+            return
 
         try:
-            count = 1
-            for timeStamp, sweep in self.sweeps.items():
-                name = '{0:.0f}.png'.format(timeStamp)
-                directory = self.editDir.GetValue()
-                filename = os.path.join(directory, name)
-
-                thread = self.plot.set_plot({timeStamp: sweep}, extent, False)
-                thread.join()
-                filename = os.path.join(directory, '{}.png'.format(timeStamp))
-                export_image(filename, File.ImageType.PNG,
-                             self.figure,
-                             self.settings)
-
-                cont, _skip = dlgProgress.Update(count, name)
-                if not cont:
-                    break
-                count += 1
-        except IOError as error:
+            self.export = ExportSeq(self.sweeps, Extent(self.spectrum),
+                                    self.settings, self.editDir.GetValue(),
+                                    self.checkAxes.GetValue(),
+                                    self.checkGrid.GetValue(),
+                                    self.checkBar.GetValue())
+        except OSError as error:
             wx.MessageBox(error.strerror, 'Error', wx.OK | wx.ICON_WARNING)
-        finally:
-            dlgProgress.Destroy()
-            self.EndModal(wx.ID_OK)
+            return
+
+        self.EndModal(wx.ID_OK)
 
     def __spectrum_range(self, start, end):
         sweeps = {}
@@ -554,6 +591,9 @@ class DialogExportSeq(wx.Dialog):
 
         return start, end
 
+    def get_export(self):
+        return self.export
+
 
 class DialogExportGeo(wx.Dialog):
     IMAGE_SIZE = 500
@@ -736,6 +776,9 @@ class DialogExportGeo(wx.Dialog):
         self.axes.yaxis.set_major_formatter(formatter)
 
     def __draw_plot(self):
+        import matplotlib.tri
+        from rtlsdr_scanner.utils_mpl import create_heatmap
+
         freqCentre = self.spinCentre.GetValue()
         freqBw = self.spinBw.GetValue()
         freqMin = (freqCentre - freqBw) / 1000.
@@ -881,6 +924,8 @@ class DialogExportGeo(wx.Dialog):
         return self.extent
 
     def get_image(self):
+        from PIL import Image
+
         width = self.extent[1] - self.extent[0]
         height = self.extent[3] - self.extent[2]
         self.figure.set_size_inches((6, 6. * width / height))
@@ -1034,7 +1079,7 @@ class DialogRestore(wx.Dialog):
         try:
             self.restored = self.backups.load(self.selected)
         except (cPickle.UnpicklingError, AttributeError,
-                EOFError, ImportError, IndexError, ValueError):
+                EOFError, ImportError, IndexError, ValueError, IOError):
             wx.MessageBox('The file could not be restored', 'Restore failed',
                           wx.OK | wx.ICON_ERROR)
             return
@@ -27,7 +27,6 @@ import multiprocessing
 import platform
 import sys
 
-from PIL import Image
 import matplotlib
 import numpy
 import serial
@@ -57,6 +56,8 @@ class DialogSysInfo(wx.Dialog):
         self.Centre()
 
     def __populate_versions(self, control):
+        from PIL import Image
+
         imageType = 'Pillow'
         try:
             imageVer = Image.PILLOW_VERSION
@@ -34,7 +34,9 @@ from wx.lib.agw.cubecolourdialog import CubeColourDialog
 from wx.lib.masked.numctrl import NumCtrl
 
 from rtlsdr_scanner.constants import F_MIN, F_MAX, SAMPLE_RATE, BANDWIDTH, WINFUNC
+from rtlsdr_scanner.devices import DeviceRTL
 from rtlsdr_scanner.panels import PanelColourBar
+from rtlsdr_scanner.rtlsim import RtlSim
 from rtlsdr_scanner.rtltcp import RtlTcp
 from rtlsdr_scanner.utils_mpl import get_colours
 
@@ -152,6 +154,8 @@ class DialogOffset(wx.Dialog):
         try:
             if self.device.isDevice:
                 sdr = rtlsdr.RtlSdr(self.device.indexRtl)
+            elif self.device.type == DeviceRTL.SIM:
+                sdr = RtlSim(self.device.scenario)
             else:
                 sdr = RtlTcp(self.device.server, self.device.port, None)
             sdr.set_sample_rate(SAMPLE_RATE)
@@ -36,6 +36,7 @@ from wx.lib import masked
 from rtlsdr_scanner.constants import F_MIN, F_MAX, Cal, WINFUNC, PlotFunc
 from rtlsdr_scanner.events import Event
 from rtlsdr_scanner.file import File, open_plot
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import format_precision, format_time
 from rtlsdr_scanner.panels import PanelGraphCompare, PanelLine
 from rtlsdr_scanner.plot_line import Plotter
@@ -437,6 +438,17 @@ class DialogLog(wx.Dialog):
         sizerFilter.Add(textFilter, flag=wx.ALL, border=5)
         sizerFilter.Add(self.choiceFilter, flag=wx.ALL, border=5)
 
+        boxMetrics = wx.StaticBox(self, label='Pipeline')
+        self.textMetrics = wx.TextCtrl(self, size=(-1, 150),
+                                       style=wx.TE_MULTILINE | wx.TE_READONLY)
+        self.textMetrics.SetFont(wx.Font(8, wx.FONTFAMILY_MODERN,
+                                         wx.FONTSTYLE_NORMAL,
+                                         wx.FONTWEIGHT_NORMAL))
+        self.textMetrics.SetToolTipString('Stage timings since the scan started')
+        sizerMetrics = wx.StaticBoxSizer(boxMetrics, wx.VERTICAL)
+        sizerMetrics.Add(self.textMetrics, 1, flag=wx.ALL | wx.EXPAND,
+                         border=5)
+
         buttonRefresh = wx.Button(self, wx.ID_ANY, label='Refresh')
         buttonRefresh.SetToolTipString('Refresh the log')
         buttonClose = wx.Button(self, wx.ID_CLOSE)
@@ -446,6 +458,7 @@ class DialogLog(wx.Dialog):
         sizer = wx.BoxSizer(wx.VERTICAL)
         sizer.Add(self.gridLog, 1, flag=wx.ALL | wx.EXPAND, border=5)
         sizer.Add(sizerFilter, 0, flag=wx.ALL, border=5)
+        sizer.Add(sizerMetrics, 0, flag=wx.ALL | wx.EXPAND, border=5)
         sizer.Add(buttonRefresh, 0, flag=wx.ALL, border=5)
         sizer.Add(buttonClose, 0, flag=wx.ALL | wx.ALIGN_RIGHT, border=5)
 
@@ -472,6 +485,7 @@ class DialogLog(wx.Dialog):
         self.Close()
 
     def __update_grid(self, level=None):
+        self.textMetrics.SetValue(metrics.format_summary())
         self.gridLog.ClearGrid()
 
         fontCell = self.gridLog.GetDefaultCellFont()
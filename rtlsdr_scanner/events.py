@@ -36,7 +36,8 @@ class Event(object):
     STARTING, STEPS, INFO, DATA, STOPPED, ERROR, FINISHED, PROCESSED, \
         CAL, LEVEL, UPDATED, DRAW, \
         DELAY_COUNT, DELAY_START, \
-        LOC, LOC_RAW, LOC_WARN, LOC_ERR, LOC_SAT = range(19)
+        LOC, LOC_RAW, LOC_WARN, LOC_ERR, LOC_SAT, \
+        SCAN_WARN, EXPORTED = range(21)
 
 
 class Status(object):
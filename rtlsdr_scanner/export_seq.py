@@ -0,0 +1,132 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import Queue
+import copy
+import multiprocessing
+import os
+import signal
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from rtlsdr_scanner.file import export_image, File
+from rtlsdr_scanner.plot_line import Plotter
+
+
+worker = {}
+
+
+def init_worker(settings, extent, axes, grid, bar):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    figure = Figure(facecolor='white')
+    FigureCanvasAgg(figure)
+    figure.set_size_inches((settings.exportWidth, settings.exportHeight))
+    figure.set_dpi(settings.exportDpi)
+    queue = Queue.Queue()
+    plot = Plotter(queue, figure, settings)
+    plot.set_axes(axes)
+    plot.set_grid(grid)
+    plot.set_bar(bar)
+
+    worker.update({'figure': figure,
+                   'queue': queue,
+                   'plot': plot,
+                   'settings': settings,
+                   'extent': extent})
+
+
+def export_frame(task):
+    timeStamp, sweep, filename = task
+    plot = worker['plot']
+    plot.clear_plots()
+    thread = plot.set_plot({timeStamp: sweep}, worker['extent'], False)
+    thread.join()
+    export_image(filename, File.ImageType.PNG, worker['figure'],
+                 worker['settings'])
+
+    queue = worker['queue']
+    while not queue.empty():
+        queue.get()
+
+    return filename
+
+
+class ExportSeq(object):
+    def __init__(self, sweeps, extent, settings, directory,
+                 axes=True, grid=True, bar=True, processes=None):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        tasks = []
+        for timeStamp in sorted(sweeps):
+            filename = os.path.join(directory, '{}.png'.format(timeStamp))
+            tasks.append((timeStamp, sweeps[timeStamp], filename))
+        self.total = len(tasks)
+        self.done = 0
+        self.last = None
+
+        self.pool = multiprocessing.Pool(processes, init_worker,
+                                         (self.__get_settings(settings),
+                                          extent, axes, grid, bar))
+        self.results = self.pool.imap_unordered(export_frame, tasks)
+        self.pool.close()
+
+    @staticmethod
+    def __get_settings(settings):
+        snapshot = copy.copy(settings)
+        snapshot.__dict__ = dict((key, value)
+                                 for key, value in vars(settings).iteritems()
+                                 if isinstance(value, (bool, int, long, float,
+                                                       basestring,
+                                                       type(None))))
+
+        return snapshot
+
+    def poll(self):
+        while self.done < self.total:
+            try:
+                self.last = self.results.next(0)
+            except multiprocessing.TimeoutError:
+                break
+            self.done += 1
+
+        if self.is_done():
+            self.pool.join()
+
+        return self.done
+
+    def is_done(self):
+        return self.done == self.total
+
+    def cancel(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
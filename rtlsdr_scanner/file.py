@@ -23,27 +23,35 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import Queue
 import cPickle
 from collections import OrderedDict
 import datetime
 import glob
+import gzip
+import itertools
 import json
 import os
+import shutil
 import subprocess
 import sys
 import tempfile
 import threading
+import time
 import uuid
 import zipfile
 
-from PIL import Image
+from matplotlib import cm
 import matplotlib
-from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy
 import wx
 
 from rtlsdr_scanner.constants import APP_NAME
-from rtlsdr_scanner.misc import format_iso_time
-from rtlsdr_scanner.spectrum import create_mesh, sort_spectrum
+from rtlsdr_scanner.misc import format_iso_time, format_time, get_resource
+from rtlsdr_scanner.rfb import Rfb, RfbReader, RfbWriter
+from rtlsdr_scanner.rfs import RfsReader, RfsWriter
+from rtlsdr_scanner.spectrum import sort_spectrum, create_matrix, \
+    create_axis
 
 
 class File(object):
@@ -51,10 +59,10 @@ class File(object):
         SAVE, PLOT, IMAGE, GEO, GMAP, TRACK, CONT = range(7)
 
     class SaveType(object):
-        RFS = 0
+        RFS, RFB = range(2)
 
     class PlotType(object):
-        CSV, GNUPLOT, FREEMAT, WWB = range(4)
+        CSV, GNUPLOT, FREEMAT, WWB, NPZ, NPY = range(6)
 
     class ImageType(object):
         BMP, EPS, GIF, JPEG, PDF, PNG, PPM, TIFF = range(8)
@@ -68,14 +76,17 @@ class File(object):
     class TrackType(object):
         GPX = 0
 
-    SAVE = [''] * 1
+    SAVE = [''] * 2
     SAVE[SaveType.RFS] = 'RTLSDR frequency scan (*.rfs)|*.rfs'
+    SAVE[SaveType.RFB] = 'RTLSDR binary scan (*.rfb)|*.rfb'
 
-    PLOT = [''] * 4
+    PLOT = [''] * 6
     PLOT[PlotType.CSV] = "CSV table (*.csv)|*.csv"
     PLOT[PlotType.GNUPLOT] = "gnuplot script (*.plt)|*.plt"
     PLOT[PlotType.FREEMAT] = "FreeMat script (*.m)|*.m"
     PLOT[PlotType.WWB] = "Wireless Workbench (*.sdb2)|*.sdb2"
+    PLOT[PlotType.NPZ] = "NumPy archive (*.npz)|*.npz"
+    PLOT[PlotType.NPY] = "NumPy array (*.npy)|*.npy"
 
     IMAGE = [''] * 8
     IMAGE[ImageType.BMP] = 'Bitmap image (*.bmp)|*.bmp'
@@ -111,6 +122,19 @@ class File(object):
     HEADER = APP_NAME
     VERSION = 9
 
+    BUFFER = 1024 * 1024
+    ROWS = 65536
+    WWB_NO_DATA = -140
+    WWB_GAP = 1.5
+
+    WATERFALL_PIXELS = 32 * 1024 * 1024
+    WATERFALL_TILE = 4096
+    WATERFALL_LABEL = 256
+
+    TILE = 256
+    TILE_INFO = 'pyramid.json'
+    TILE_VIEWER = 'waterfall.html'
+
     @staticmethod
     def __get_types(type):
         return [File.SAVE, File.PLOT, File.IMAGE,
@@ -184,10 +208,7 @@ class ScanInfo(object):
         self.dwell = settings.dwell
         self.nfft = settings.nfft
         device = settings.devicesRtl[settings.indexRtl]
-        if device.isDevice:
-            self.name = device.name
-        else:
-            self.name = device.server + ":" + str(device.port)
+        self.name = device.get_desc()
         self.gain = device.gain
         self.lo = device.lo
         self.calibration = device.calibration
@@ -199,9 +220,41 @@ class ScanInfo(object):
         settings.dwell = self.dwell
         settings.nfft = self.nfft
 
+    def get_dict(self):
+        return {'Version': File.VERSION,
+                'Start': self.start,
+                'Stop': self.stop,
+                'Dwell': self.dwell,
+                'Nfft': self.nfft,
+                'Device': self.name,
+                'Gain': self.gain,
+                'LO': self.lo,
+                'Calibration': self.calibration,
+                'Tuner': self.tuner,
+                'Time': self.time,
+                'Latitude': self.lat,
+                'Longitude': self.lon,
+                'Description': self.desc}
+
+    def set_from_dict(self, data):
+        self.start = data['Start']
+        self.stop = data['Stop']
+        self.dwell = data['Dwell']
+        self.nfft = data['Nfft']
+        self.name = data['Device']
+        self.gain = data['Gain']
+        self.lo = data['LO']
+        self.calibration = data['Calibration']
+        self.tuner = data['Tuner']
+        self.time = data['Time']
+        self.lat = data['Latitude']
+        self.lon = data['Longitude']
+        self.desc = data['Description']
+
 
 class Backups(object):
     PREFIX = 'rsba_'
+    SYNC = 30
 
     def __init__(self):
         self.homeDir = os.path.expanduser('~')
@@ -209,9 +262,17 @@ class Backups(object):
         if not os.path.exists(self.homeDir):
             os.mkdir(self.homeDir)
         self.thread = None
+        self.queue = Queue.Queue()
+        self.writer = None
+        self.failed = False
+        self.synced = 0
+        self.sweeps = {}
+        self.written = 0
+        self.locations = set()
         self.backup = None
-        self.tempFd, self.tempFile = tempfile.mkstemp(prefix=self.PREFIX,
-                                                      dir=self.homeDir)
+        tempFd, self.tempFile = tempfile.mkstemp(prefix=self.PREFIX,
+                                                 dir=self.homeDir)
+        os.close(tempFd)
         self.backups = self.__get()
 
     def __get(self):
@@ -234,24 +295,94 @@ class Backups(object):
 
         return files
 
-    def __save(self, data):
-        handle = open(self.tempFile, 'wb')
-        cPickle.dump(data, handle)
-        handle.close()
-        self.thread = None
+    @staticmethod
+    def __get_new(data, saved):
+        new = []
+        for key in reversed(data):
+            if key in saved:
+                return new[::-1], True
+            new.append(key)
+
+        return new[::-1], not len(saved)
+
+    def __get_changed(self, spectrum):
+        sweeps, found = self.__get_new(spectrum, self.sweeps)
+        changed = [timeStamp for timeStamp, size in self.sweeps.iteritems()
+                   if timeStamp in spectrum and
+                   len(spectrum[timeStamp]) != size]
+        if len(spectrum) and not len(sweeps):
+            changed.append(next(reversed(spectrum)))
+        changed = [timeStamp for timeStamp in spectrum
+                   if timeStamp in changed]
+
+        return list(OrderedDict.fromkeys(changed + sweeps)), found
+
+    def __write(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                break
+            scanInfo, sweeps, locations, restart = data
+            if not restart and self.writer is None:
+                continue
+            try:
+                if restart:
+                    if self.writer is not None:
+                        self.writer.close()
+                    self.writer = create_rfb(self.tempFile, scanInfo)
+                for timeStamp, sweep in sweeps:
+                    self.writer.add_sweep(timeStamp, sweep)
+                for timeStamp, location in locations:
+                    self.writer.add_location(timeStamp, location)
+                if time.time() - self.synced >= self.SYNC:
+                    self.writer.sync()
+                    self.synced = time.time()
+                else:
+                    self.writer.flush()
+            except (IOError, OSError):
+                self.writer = None
+                self.failed = True
+
+        if self.writer is not None:
+            self.writer.close()
 
     def set(self, backup):
         self.backup = backup
 
     def save(self, scanInfo, spectrum, location):
+        sweeps, found = self.__get_changed(spectrum)
+        locations, _found = self.__get_new(location, self.locations)
+        restart = not found or self.failed or self.thread is None or \
+            self.written + len(sweeps) > max(len(spectrum) * 2, 10)
+        if restart:
+            self.failed = False
+            self.sweeps.clear()
+            self.written = 0
+            self.locations.clear()
+            sweeps = spectrum.keys()
+            locations = location.keys()
+
+        for timeStamp in sweeps:
+            self.sweeps[timeStamp] = len(spectrum[timeStamp])
+        self.written += len(sweeps)
+        self.locations.update(locations)
+        data = (scanInfo,
+                [(timeStamp, OrderedDict(spectrum[timeStamp]))
+                 for timeStamp in sweeps],
+                [(timeStamp, location[timeStamp]) for timeStamp in locations],
+                restart)
+        self.queue.put(data)
+
         if self.thread is None:
-            data = scanInfo, spectrum, location
-            self.thread = threading.Thread(target=self.__save, args=(data,),
+            self.thread = threading.Thread(target=self.__write,
                                            name='Backup')
             self.thread.start()
 
     def load(self, index):
         backup = self.backups[index][0]
+        if Rfb.is_rfb(backup):
+            return load_rfb(backup)
+
         handle = open(backup, 'rb')
         data = cPickle.load(handle)
         handle.close()
@@ -264,8 +395,151 @@ class Backups(object):
         self.backups = self.__get()
 
     def close(self):
-        os.close(self.tempFd)
-        os.remove(self.tempFile)
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if os.path.exists(self.tempFile):
+            os.remove(self.tempFile)
+
+
+class ThreadSave(threading.Thread):
+    def __init__(self, filename, scanInfo, spectrum, location, lock):
+        threading.Thread.__init__(self)
+        self.name = 'Save'
+        self.filename = filename
+        self.scanInfo = scanInfo
+        self.spectrum = spectrum
+        self.location = location
+        self.lock = lock
+        self.progress = 0
+        self.saved = False
+        self.error = None
+        self.cancel = False
+
+        self.start()
+
+    def __progress(self, count, total):
+        self.progress = count * 100 / total
+
+        return not self.cancel
+
+    def run(self):
+        try:
+            self.saved = save_plot(self.filename, self.scanInfo,
+                                   self.spectrum, self.location,
+                                   self.lock, self.__progress)
+        except (IOError, OSError) as error:
+            self.error = error
+
+    def abort(self):
+        self.cancel = True
+
+
+class ThreadExportCont(threading.Thread):
+    QUEUE = 64
+
+    def __init__(self, filename, size=0, period=0, compress=False):
+        threading.Thread.__init__(self)
+        self.name = 'Export'
+        self.filename = filename
+        self.size = size * 1024 * 1024
+        self.period = period * 60
+        self.compress = compress
+        self.queue = Queue.Queue(self.QUEUE)
+        self.segment = None
+        self.handle = None
+        self.opened = None
+        self.dropped = 0
+        self.error = None
+
+        self.__open()
+        self.start()
+
+    def __get_name(self):
+        if not self.size and not self.period:
+            return self.filename
+
+        base, ext = os.path.splitext(self.filename)
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.gmtime())
+        name = '{}_{}{}'.format(base, stamp, ext)
+        i = 1
+        while os.path.exists(name) or os.path.exists(name + '.gz'):
+            name = '{}_{}_{}{}'.format(base, stamp, i, ext)
+            i += 1
+
+        return name
+
+    def __open(self):
+        self.segment = self.__get_name()
+        self.handle = open(self.segment, 'wb', File.BUFFER)
+        self.opened = time.time()
+        export_csv(self.handle, None)
+
+    def __close(self):
+        handle = self.handle
+        self.handle = None
+        handle.close()
+        if self.compress:
+            with open(self.segment, 'rb') as source:
+                dest = gzip.GzipFile(self.segment + '.gz', 'wb', 6)
+                shutil.copyfileobj(source, dest, File.BUFFER)
+                dest.close()
+            os.remove(self.segment)
+
+    def __is_full(self):
+        if self.size and self.handle.tell() >= self.size:
+            return True
+        if self.period and time.time() - self.opened >= self.period:
+            return True
+
+        return False
+
+    def run(self):
+        while True:
+            spectrum = self.queue.get()
+            if spectrum is None:
+                break
+            try:
+                if self.handle is None:
+                    self.__open()
+                export_csv(self.handle, spectrum, False)
+                if self.__is_full():
+                    self.__close()
+            except (IOError, OSError) as error:
+                self.error = error
+                if self.handle is not None:
+                    try:
+                        self.__close()
+                    except Exception:
+                        pass
+            except Exception as error:
+                self.error = error
+
+        if self.handle is not None:
+            try:
+                self.__close()
+            except Exception as error:
+                self.error = error
+
+    def add(self, spectrum):
+        try:
+            self.queue.put_nowait(spectrum)
+        except Queue.Full:
+            self.dropped += 1
+            return False
+
+        return True
+
+    def get_error(self):
+        error = self.error
+        self.error = None
+
+        return error
+
+    def stop(self):
+        self.queue.put(None)
+        self.join()
 
 
 def run_file(runFile):
@@ -280,6 +554,22 @@ def run_file(runFile):
 
 
 def open_plot(dirname, filename):
+    path = os.path.join(dirname, filename)
+    if not os.path.exists(path):
+        return None, None, None
+
+    try:
+        return load_plot(path)
+    except IOError:
+        wx.MessageBox('Invalid or corrupted file', 'Warning',
+                      wx.OK | wx.ICON_WARNING)
+        return None, None, None
+
+
+def load_plot(path):
+    if Rfb.is_rfb(path):
+        return load_rfb(path)
+
     pickle = True
     error = False
     dwell = 0.131
@@ -296,9 +586,6 @@ def open_plot(dirname, filename):
     desc = ''
     location = OrderedDict()
 
-    path = os.path.join(dirname, filename)
-    if not os.path.exists(path):
-        return None, None, None
     handle = open(path, 'rb')
     try:
         header = cPickle.load(handle)
@@ -314,45 +601,35 @@ def open_plot(dirname, filename):
             stop = cPickle.load(handle)
             spectrum[1] = {}
             spectrum[1] = cPickle.load(handle)
+            spectrum = sort_spectrum(spectrum)
         except pickle.PickleError:
             error = True
     else:
         try:
             handle.seek(0)
-            data = json.loads(handle.read())
-            header = data[0]
-            version = data[1]['Version']
-            start = data[1]['Start']
-            stop = data[1]['Stop']
+            header, data = RfsReader(handle).read()
+            version = data['Version']
+            start = data['Start']
+            stop = data['Stop']
             if version > 1:
-                dwell = data[1]['Dwell']
-                nfft = data[1]['Nfft']
+                dwell = data['Dwell']
+                nfft = data['Nfft']
             if version > 2:
-                name = data[1]['Device']
-                gain = data[1]['Gain']
-                lo = data[1]['LO']
-                calibration = data[1]['Calibration']
+                name = data['Device']
+                gain = data['Gain']
+                lo = data['LO']
+                calibration = data['Calibration']
             if version > 4:
-                tuner = data[1]['Tuner']
+                tuner = data['Tuner']
             if version > 5:
-                time = data[1]['Time']
-                lat = data[1]['Latitude']
-                lon = data[1]['Longitude']
-            if version < 7:
-                spectrum[1] = {}
-                for f, p in data[1]['Spectrum'].iteritems():
-                    spectrum[1][float(f)] = p
-            else:
-                for t, s in data[1]['Spectrum'].iteritems():
-                    spectrum[float(t)] = {}
-                    for f, p in s.iteritems():
-                        spectrum[float(t)][float(f)] = p
+                time = data['Time']
+                lat = data['Latitude']
+                lon = data['Longitude']
+            spectrum = data['Spectrum']
             if version > 7:
-                desc = data[1]['Description']
+                desc = data['Description']
             if version > 8:
-                location = {}
-                for t, l in data[1]['Location'].iteritems():
-                    location[float(t)] = l
+                location = data['Location']
 
         except ValueError:
             error = True
@@ -362,9 +639,7 @@ def open_plot(dirname, filename):
     handle.close()
 
     if error or header != File.HEADER:
-        wx.MessageBox('Invalid or corrupted file', 'Warning',
-                      wx.OK | wx.ICON_WARNING)
-        return None, None, None
+        raise IOError('Invalid or corrupted file')
 
     scanInfo = ScanInfo()
     scanInfo.start = start
@@ -381,36 +656,89 @@ def open_plot(dirname, filename):
     scanInfo.lon = lon
     scanInfo.desc = desc
 
-    spectrum = sort_spectrum(spectrum)
+    return scanInfo, spectrum, location
+
+
+def load_rfb(path):
+    with RfbReader(path) as reader:
+        info = reader.get_info()
+        if info.get('Header') != File.HEADER:
+            raise IOError('Invalid or corrupted file')
+        scanInfo = ScanInfo()
+        try:
+            scanInfo.set_from_dict(info)
+        except KeyError:
+            raise IOError('Invalid or corrupted file')
+        spectrum = reader.get_spectrum()
+        location = reader.get_locations()
 
     return scanInfo, spectrum, location
 
 
-def save_plot(filename, scanInfo, spectrum, location):
-    data = [File.HEADER, {'Version': File.VERSION,
-                          'Start': scanInfo.start,
-                          'Stop': scanInfo.stop,
-                          'Dwell': scanInfo.dwell,
-                          'Nfft': scanInfo.nfft,
-                          'Device': scanInfo.name,
-                          'Gain': scanInfo.gain,
-                          'LO': scanInfo.lo,
-                          'Calibration': scanInfo.calibration,
-                          'Tuner': scanInfo.tuner,
-                          'Time': scanInfo.time,
-                          'Latitude': scanInfo.lat,
-                          'Longitude': scanInfo.lon,
-                          'Description': scanInfo.desc,
-                          'Spectrum': spectrum,
-                          'Location': location}]
-
-    handle = open(os.path.join(filename), 'wb')
-    handle.write(json.dumps(data, indent=4))
-    handle.close()
+def create_rfb(filename, scanInfo, append=False):
+    info = scanInfo.get_dict()
+    info['Header'] = File.HEADER
 
+    return RfbWriter(filename, info, append)
 
-def export_plot(filename, exportType, spectrum):
-    handle = open(filename, 'wb')
+
+def create_rfs(filename, scanInfo):
+    return RfsWriter(filename, File.HEADER, scanInfo.get_dict())
+
+
+def save_plot(filename, scanInfo, spectrum, location, lock=None,
+              progress=None):
+    if lock is None:
+        lock = threading.Lock()
+    with lock:
+        timeStamps = spectrum.keys()
+    total = len(timeStamps)
+
+    temp = filename + '.part'
+    if os.path.splitext(filename)[1].lower() == '.rfb':
+        writer = create_rfb(temp, scanInfo)
+    else:
+        writer = create_rfs(temp, scanInfo)
+
+    cancelled = False
+    try:
+        with writer:
+            for count, timeStamp in enumerate(timeStamps, 1):
+                with lock:
+                    sweep = spectrum.get(timeStamp)
+                    if sweep is not None:
+                        writer.add_sweep(timeStamp, sweep)
+                if progress is not None and not progress(count, total):
+                    cancelled = True
+                    break
+            with lock:
+                writer.add_locations(location)
+    except:
+        os.remove(temp)
+        raise
+
+    if cancelled:
+        os.remove(temp)
+        return False
+
+    if os.path.exists(filename):
+        os.remove(filename)
+    os.rename(temp, filename)
+
+    return True
+
+
+def convert_plot(source, dest):
+    scanInfo, spectrum, location = load_plot(source)
+    save_plot(dest, scanInfo, spectrum, location)
+
+
+def export_plot(filename, exportType, spectrum, locations=None):
+    if exportType in [File.PlotType.NPZ, File.PlotType.NPY]:
+        export_numpy(filename, exportType, spectrum, locations)
+        return
+
+    handle = open_export(filename)
     if exportType == File.PlotType.CSV:
         export_csv(handle, spectrum)
     elif exportType == File.PlotType.GNUPLOT:
@@ -422,17 +750,10 @@ def export_plot(filename, exportType, spectrum):
     handle.close()
 
 
-def export_cont(handle, filename, spectrum):
-    if handle is None and filename is not None:
-        handle = open(filename, 'wb')
-        export_csv(handle, None)
-    else:
-        export_csv(handle, spectrum, False)
-
-    return handle
-
-
 def export_image(filename, format, figure, settings):
+    from PIL import Image
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
     oldSize = figure.get_size_inches()
     oldDpi = figure.get_dpi()
     figure.set_size_inches((settings.exportWidth, settings.exportHeight))
@@ -447,15 +768,287 @@ def export_image(filename, format, figure, settings):
         buf = renderer.buffer_rgba(0, 0)
     size = canvas.get_width_height()
     image = Image.frombuffer('RGBA', size, buf, 'raw', 'RGBA', 0, 1)
-    image = image.convert('RGB')
-    ext = File.get_type_ext(format, File.Types.IMAGE)
-    image.save(filename, format=ext[1::], dpi=(settings.exportDpi,
-                                               settings.exportDpi))
+    save_image(filename, format, image.convert('RGB'), settings.exportDpi)
 
     figure.set_size_inches(oldSize)
     figure.set_dpi(oldDpi)
 
 
+def save_image(filename, format, image, dpi):
+    ext = File.get_type_ext(format, File.Types.IMAGE)
+    image.save(filename, format=ext[1::], dpi=(dpi, dpi))
+
+
+def export_waterfall(filename, spectrum, colourMap, annotate=False):
+    from PIL import Image
+
+    axis = create_axis(spectrum)
+    timeStamps = spectrum.keys()
+    width = len(axis)
+    height = len(timeStamps)
+    lMin, lMax = get_level_range(spectrum)
+    lut = create_lut(colourMap)
+
+    tileWidth = tileHeight = File.WATERFALL_TILE
+    base, ext = os.path.splitext(filename)
+    tiled = width * height > File.WATERFALL_PIXELS and \
+        (width > tileWidth or height > tileHeight)
+    image = None
+    if not tiled:
+        image = Image.new('RGB', (width, height))
+
+    files = []
+    for row in xrange(0, height, tileHeight):
+        band = OrderedDict((timeStamp, spectrum[timeStamp])
+                           for timeStamp in timeStamps[row:row + tileHeight])
+        times = numpy.array(band.keys(), dtype=numpy.float64)
+        for col, levels in split_columns(band, axis, tileWidth):
+            rgb = colour_levels(levels, lut, lMin, lMax)
+            tile = Image.fromarray(rgb, 'RGB')
+            if not tiled:
+                image.paste(tile, (col, row))
+                continue
+
+            if annotate:
+                annotate_waterfall(tile, axis[col:col + tileWidth], times)
+            name = '{}_{}_{}{}'.format(base, row / tileHeight,
+                                       col / tileWidth, ext)
+            tile.save(name)
+            files.append(name)
+
+    if not tiled:
+        if annotate:
+            annotate_waterfall(image, axis, timeStamps)
+        image.save(filename)
+        files.append(filename)
+
+    return files
+
+
+def export_tiles(directory, spectrum, colourMap):
+    axis = create_axis(spectrum)
+    timeStamps = spectrum.keys()
+    width = len(axis)
+    height = len(timeStamps)
+    lMin, lMax = get_level_range(spectrum)
+    lut = create_lut(colourMap)
+
+    count = 1
+    levelWidth = width
+    levelHeight = height
+    while levelWidth > File.TILE or levelHeight > File.TILE:
+        levelWidth = (levelWidth + 1) / 2
+        levelHeight = (levelHeight + 1) / 2
+        count += 1
+
+    pyramid = None
+    for level in xrange(count):
+        pyramid = TileLevel(directory, level, level == count - 1,
+                            lut, lMin, lMax, pyramid)
+
+    for row in xrange(0, height, File.TILE):
+        block = OrderedDict((timeStamp, spectrum[timeStamp])
+                            for timeStamp in timeStamps[row:row + File.TILE])
+        _axis, _times, levels = create_matrix(block, axis)
+        pyramid.add(levels, levels)
+    pyramid.flush()
+
+    info = {'Width': width,
+            'Height': height,
+            'Tile': File.TILE,
+            'Levels': count,
+            'FreqStart': axis[0],
+            'FreqStop': axis[-1],
+            'TimeStart': timeStamps[0],
+            'TimeStop': timeStamps[-1],
+            'LevelMin': lMin,
+            'LevelMax': lMax,
+            'ColourMap': colourMap}
+    with open(os.path.join(directory, File.TILE_INFO), 'w') as handle:
+        json.dump(info, handle, indent=4)
+    shutil.copyfile(get_resource(File.TILE_VIEWER),
+                    os.path.join(directory, 'index.html'))
+
+    return pyramid.get_count()
+
+
+class TileLevel(object):
+    def __init__(self, directory, level, full, lut, lMin, lMax, parent):
+        self.directory = directory
+        self.level = level
+        self.full = full
+        self.lut = lut
+        self.lMin = lMin
+        self.lMax = lMax
+        self.parent = parent
+
+        self.row = 0
+        self.count = 0
+        self.buffer = []
+        self.buffered = 0
+        self.pending = None
+
+        kinds = ['max'] if full else ['max', 'min']
+        for kind in kinds:
+            path = os.path.join(directory, kind, str(level))
+            if not os.path.isdir(path):
+                os.makedirs(path)
+
+    def __write(self, rows):
+        from PIL import Image
+
+        maxima = numpy.concatenate([block[0] for block in self.buffer])
+        minima = numpy.concatenate([block[1] for block in self.buffer])
+        remainder = maxima[rows:], minima[rows:]
+        self.buffer = [remainder] if len(remainder[0]) else []
+        self.buffered = len(remainder[0])
+
+        strips = [('max', maxima[:rows])]
+        if not self.full:
+            strips.append(('min', minima[:rows]))
+        for kind, levels in strips:
+            rgb = colour_levels(levels, self.lut, self.lMin, self.lMax)
+            for col in xrange(0, rgb.shape[1], File.TILE):
+                tile = rgb[:, col:col + File.TILE].copy()
+                name = '{}_{}.png'.format(self.row, col / File.TILE)
+                path = os.path.join(self.directory, kind, str(self.level),
+                                    name)
+                Image.fromarray(tile, 'RGB').save(path)
+                self.count += 1
+        self.row += 1
+
+    def __reduce(self, maxima, minima, final=False):
+        if self.pending is not None:
+            maxima = numpy.concatenate((self.pending[0], maxima))
+            minima = numpy.concatenate((self.pending[1], minima))
+            self.pending = None
+        if len(maxima) % 2 and not final:
+            self.pending = maxima[-1:], minima[-1:]
+            maxima = maxima[:-1]
+            minima = minima[:-1]
+        if len(maxima):
+            self.parent.add(reduce_levels(maxima, numpy.fmax),
+                            reduce_levels(minima, numpy.fmin))
+
+    def add(self, maxima, minima):
+        self.buffer.append((maxima, minima))
+        self.buffered += len(maxima)
+        while self.buffered >= File.TILE:
+            self.__write(File.TILE)
+        if self.parent is not None:
+            self.__reduce(maxima, minima)
+
+    def flush(self):
+        if self.buffered:
+            self.__write(self.buffered)
+        if self.parent is not None:
+            if self.pending is not None:
+                self.__reduce(self.pending[0][:0], self.pending[1][:0], True)
+            self.parent.flush()
+
+    def get_count(self):
+        count = self.count
+        if self.parent is not None:
+            count += self.parent.get_count()
+        return count
+
+
+def reduce_levels(levels, function):
+    rows, cols = levels.shape
+    if cols % 2:
+        levels = numpy.hstack((levels,
+                               numpy.full((rows, 1), numpy.nan, levels.dtype)))
+    if rows % 2:
+        levels = numpy.vstack((levels,
+                               numpy.full((1, levels.shape[1]), numpy.nan,
+                                          levels.dtype)))
+    levels = function(levels[:, ::2], levels[:, 1::2])
+    return function(levels[::2], levels[1::2])
+
+
+def get_level_range(spectrum):
+    lMin = float('inf')
+    lMax = float('-inf')
+    for sweep in spectrum.itervalues():
+        if len(sweep):
+            levels = numpy.fromiter(sweep.itervalues(), numpy.float64,
+                                    len(sweep))
+            lMin = min(lMin, numpy.nanmin(levels))
+            lMax = max(lMax, numpy.nanmax(levels))
+    if lMin >= lMax:
+        lMax = lMin + 0.001
+
+    return lMin, lMax
+
+
+def create_lut(colourMap):
+    colours = cm.get_cmap(colourMap)(numpy.linspace(0, 1, 256))
+    lut = numpy.empty((257, 3), dtype=numpy.uint8)
+    lut[:256] = colours[:, :3] * 255
+    lut[256] = 255
+
+    return lut
+
+
+def split_columns(spectrum, axis, blockWidth):
+    bounds = axis[blockWidth::blockWidth]
+    sweeps = []
+    for sweep in spectrum.itervalues():
+        freqs = numpy.fromiter(sweep.iterkeys(), numpy.float64, len(sweep))
+        if numpy.any(freqs[1:] < freqs[:-1]):
+            sweep = OrderedDict(sorted(sweep.iteritems()))
+            freqs.sort()
+        ends = numpy.searchsorted(freqs, bounds).tolist() + [len(freqs)]
+        sweeps.append((sweep.iterkeys(), sweep.itervalues(), ends))
+
+    for block, col in enumerate(xrange(0, len(axis), blockWidth)):
+        levels = numpy.empty((len(sweeps), min(blockWidth, len(axis) - col)),
+                             dtype=numpy.float32)
+        levels.fill(numpy.nan)
+        for i, (keys, values, ends) in enumerate(sweeps):
+            count = ends[block] - (ends[block - 1] if block else 0)
+            if count:
+                keys = itertools.islice(keys, count)
+                values = itertools.islice(values, count)
+                freqs = numpy.fromiter(keys, numpy.float64, count)
+                indices = numpy.searchsorted(axis, freqs) - col
+                levels[i, indices] = numpy.fromiter(values, numpy.float32,
+                                                    count)
+
+        yield col, levels
+
+
+def colour_levels(levels, lut, lMin, lMax):
+    indices = numpy.empty(levels.shape, dtype=numpy.int16)
+    scaled = (levels - lMin) * (255. / (lMax - lMin))
+    numpy.clip(scaled, 0, 255, scaled)
+    scaled[numpy.isnan(scaled)] = 256
+    indices[:] = scaled
+
+    return lut[indices]
+
+
+def annotate_waterfall(image, freqs, timeStamps):
+    from PIL import ImageDraw
+
+    draw = ImageDraw.Draw(image)
+    width, height = image.size
+
+    labels = []
+    for x in xrange(0, width, File.WATERFALL_LABEL):
+        draw.line([(x, 0), (x, 8)], fill=(255, 255, 255))
+        labels.append((x + 2, 0, '{:.4f} MHz'.format(freqs[x])))
+    for y in xrange(File.WATERFALL_LABEL, height, File.WATERFALL_LABEL):
+        draw.line([(0, y), (8, y)], fill=(255, 255, 255))
+        labels.append((10, y, format_time(timeStamps[y], True)))
+
+    for x, y, text in labels:
+        textWidth, textHeight = draw.textsize(text)
+        draw.rectangle([x, y, x + textWidth + 3, y + textHeight + 3],
+                       fill=(0, 0, 0))
+        draw.text((x + 2, y + 2), text, fill=(255, 255, 255))
+
+
 def export_map(filename, exportType, bounds, image, xyz):
     if exportType == File.GeoType.KMZ:
         export_kmz(filename, bounds, image)
@@ -469,9 +1062,9 @@ def export_csv(handle, spectrum, header=True):
     if header:
         handle.write(u"Time (UTC), Frequency (MHz),Level (dB/Hz)\n")
     if spectrum is not None:
-        for plot in spectrum.iteritems():
-            for freq, pwr in plot[1].iteritems():
-                handle.write("{}, {}, {}\n".format(plot[0], freq, pwr))
+        for timeStamp, sweep in spectrum.iteritems():
+            write_rows(handle, sweep.items(),
+                       '{}, {{}}, {{}}\n'.format(timeStamp))
 
 
 def export_plt(handle, spectrum):
@@ -486,17 +1079,29 @@ def export_plt(handle, spectrum):
     handle.write('set hidden3d\n')
     handle.write('set palette rgb 33,13,10\n')
     handle.write('splot "-" using 1:2:3 notitle with lines \n')
-    for plot in spectrum.iteritems():
+    for timeStamp, sweep in spectrum.iteritems():
         handle.write('\n')
-        for freq, pwr in plot[1].iteritems():
-            handle.write("{} {} {}\n".format(freq, plot[0], pwr))
+        write_rows(handle, sweep.items(), '{{}} {} {{}}\n'.format(timeStamp))
 
 
 def export_freemat(handle, spectrum):
-    x, y, z = create_mesh(spectrum, False)
-    write_numpy(handle, x, 'x')
-    write_numpy(handle, y, 'y')
-    write_numpy(handle, z, 'z')
+    width = len(spectrum[min(spectrum)])
+    xs = []
+    ys = []
+    zs = []
+    for timeStamp, sweep in spectrum.iteritems():
+        count = min(len(sweep), width)
+        freqs = numpy.fromiter(sweep.iterkeys(), numpy.float64, count)
+        if len(xs) and numpy.array_equal(freqs, xs[-1][0]):
+            freqs = xs[-1][0]
+        xs.append((freqs, count))
+        ys.append((timeStamp, count))
+        zs.append((numpy.fromiter(sweep.itervalues(), numpy.float64, count),
+                   count))
+
+    write_mesh(handle, xs, width, 'x')
+    write_mesh(handle, ys, width, 'y', 1)
+    write_mesh(handle, zs, width, 'z')
     handle.write('\n')
     handle.write('surf(x,y,z)\n')
     handle.write('view(3)\n')
@@ -515,40 +1120,48 @@ def export_wwb(handle, spectrum):
               '<scan_data_source ver="0.0.0.1" id="{{{}}}" model="TODO" '
               'name="{}" date="{}" time="{}" color="#00ff00">\n'
               '\t<data_sets count="{}" '
-              'no_data_value="-140">\n').format(fileUuid,
-                                                APP_NAME,
-                                                fileTime.strftime('%a %b %d %Y'),
-                                                fileTime.strftime('%H:%M:%S'),
-                                                len(spectrum))
+              'no_data_value="{}">\n').format(fileUuid,
+                                              APP_NAME,
+                                              fileTime.strftime('%a %b %d %Y'),
+                                              fileTime.strftime('%H:%M:%S'),
+                                              len(spectrum),
+                                              File.WWB_NO_DATA)
     handle.write(header)
 
-    freqs = '\t\t<freq_set>\n'
-    for freq in spectrum[min(spectrum)]:
-        freqs += '\t\t\t<f>{}</f>\n'.format(freq * 1e3)
-    freqs += '\t\t</freq_set>\n'
-    handle.write(freqs)
+    first = spectrum[min(spectrum)]
+    axis = numpy.fromiter(first.iterkeys(), numpy.float64, len(first))
+    axis.sort()
+    handle.write('\t\t<freq_set>\n')
+    write_rows(handle, [(freq * 1e3,) for freq in sorted(first)],
+               '\t\t\t<f>{}</f>\n')
+    handle.write('\t\t</freq_set>\n')
 
-    i = 0
-    for sweep in spectrum.items():
-        dataTime = datetime.datetime.utcfromtimestamp(sweep[0])
+    for i, (timeStamp, sweep) in enumerate(spectrum.iteritems()):
+        dataTime = datetime.datetime.utcfromtimestamp(timeStamp)
         dataSet = ('\t\t<data_set index="{}" freq_units="KHz" ampl_units="dBm" '
                    'start_freq="{}" stop_freq="{}" step_freq="{}" '
                    'res_bandwidth="TODO" scale_factor="1" '
                    'date="{}" time="{}" '
                    'date_time="{}">\n').format(i,
-                                               min(sweep[1]) * 1e3,
-                                               max(sweep[1]) * 1e3,
+                                               axis[0] * 1e3,
+                                               axis[-1] * 1e3,
                                                1.953125,
                                                dataTime.strftime('%a %b %d %Y'),
                                                dataTime.strftime('%H:%M:%S'),
-                                               sweep[0])
+                                               timeStamp)
         handle.write(dataSet)
-        i += 1
 
-        values = ''
-        for scan in sweep[1].items():
-            values += '\t\t\t<v>{:.1f}</v>\n'.format(scan[1])
-        handle.write(values)
+        freqs = numpy.fromiter(sweep.iterkeys(), numpy.float64, len(sweep))
+        levels = numpy.fromiter(sweep.itervalues(), numpy.float64, len(sweep))
+        if not numpy.array_equal(freqs, axis):
+            if len(freqs):
+                order = numpy.argsort(freqs)
+                freqs = freqs[order]
+                levels = resample_wwb(axis, freqs, levels[order])
+            else:
+                levels = numpy.empty(len(axis))
+                levels.fill(File.WWB_NO_DATA)
+        write_rows(handle, levels.reshape(-1, 1), '\t\t\t<v>{:.1f}</v>\n')
 
         handle.write('\t\t</data_set>\n')
 
@@ -557,6 +1170,40 @@ def export_wwb(handle, spectrum):
     handle.write('</scan_data_source>\n')
 
 
+def resample_wwb(axis, freqs, levels):
+    resampled = numpy.interp(axis, freqs, levels,
+                             File.WWB_NO_DATA, File.WWB_NO_DATA)
+    if len(freqs) > 1:
+        steps = numpy.diff(freqs)
+        upper = numpy.searchsorted(freqs, axis)
+        between = (upper > 0) & (upper < len(freqs))
+        between[between] = freqs[upper[between]] != axis[between]
+        gaps = steps > numpy.median(steps) * File.WWB_GAP
+        gaps = gaps[numpy.clip(upper - 1, 0, len(steps) - 1)]
+        resampled[between & gaps] = File.WWB_NO_DATA
+
+    return resampled
+
+
+def export_numpy(filename, exportType, spectrum, locations):
+    freqs, times, levels = create_matrix(spectrum)
+    location = numpy.empty((0, 4))
+    if locations:
+        location = numpy.array([(timeStamp, lat, lon, alt)
+                                for timeStamp, (lat, lon, alt)
+                                in locations.iteritems()], dtype=numpy.float64)
+
+    if exportType == File.PlotType.NPZ:
+        numpy.savez(filename, freqs=freqs, times=times, levels=levels,
+                    locations=location)
+    else:
+        name = os.path.splitext(filename)[0]
+        numpy.save(filename, levels)
+        numpy.save(name + '.freqs.npy', freqs)
+        numpy.save(name + '.times.npy', times)
+        numpy.save(name + '.locations.npy', location)
+
+
 def export_kmz(filename, bounds, image):
     tempPath = tempfile.mkdtemp()
 
@@ -643,15 +1290,47 @@ def export_gpx(filename, locations, name):
 
 def write_numpy(handle, array, name):
     handle.write('{}=[\n'.format(name))
-    for i in array:
-        for j in i:
-            handle.write('{} '.format(j))
-        handle.write(';\n')
+    write_rows(handle, array, '{} ' * array.shape[1] + ';\n')
     handle.write(']\n')
 
 
+def write_mesh(handle, columns, width, name, offset=0):
+    handle.write('{}=[\n'.format(name))
+    rows = max(1, File.ROWS / (len(columns) + 1))
+    row = '{} ' * (len(columns) + 1) + ';\n'
+    for start in xrange(0, width, rows):
+        stop = min(start + rows, width)
+        block = numpy.empty((stop - start, len(columns) + 1))
+        block.fill(numpy.nan)
+        for j, (values, count) in enumerate(columns, 1):
+            if count > start:
+                if numpy.isscalar(values):
+                    block[:count - start, j] = values
+                else:
+                    block[:count - start, j] = values[start:stop]
+        block[:, 0] = block[:, 1] - offset
+        write_rows(handle, block, row)
+    handle.write(']\n')
+
+
+def write_rows(handle, table, row):
+    for i in xrange(0, len(table), File.ROWS):
+        rows = table[i:i + File.ROWS]
+        values = itertools.chain.from_iterable(rows)
+        handle.write((row * len(rows)).format(*values))
+
+
+def open_export(filename):
+    if filename.lower().endswith('.gz'):
+        return gzip.GzipFile(filename, 'wb', 6)
+
+    return open(filename, 'wb', File.BUFFER)
+
+
 def extension_add(fileName, index, fileType):
-    _name, extCurrent = os.path.splitext(fileName)
+    name, extCurrent = os.path.splitext(fileName)
+    if fileType == File.Types.PLOT and extCurrent.lower() == '.gz':
+        extCurrent = os.path.splitext(name)[1]
     ext = File.get_type_ext(index, fileType)
     if extCurrent != ext:
         return fileName + ext
@@ -40,6 +40,7 @@ from serial.serialutil import SerialException
 from rtlsdr_scanner.constants import LOCATION_PORT, APP_NAME
 from rtlsdr_scanner.devices import DeviceGPS
 from rtlsdr_scanner.events import post_event, EventThread, Event, Log
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import format_iso_time, haversine, format_time, \
     limit_to_ascii, limit, get_resource
 
@@ -389,19 +390,23 @@ class ThreadLocation(threading.Thread):
 
 
 class LocationServer(object):
-    def __init__(self, locations, currentLoc, lock, log):
-        self.server = HTTPServer(('127.0.0.1', LOCATION_PORT),
+    def __init__(self, locations, currentLoc, lock, log, address='127.0.0.1'):
+        self.server = HTTPServer((address, LOCATION_PORT),
                                  LocationServerHandler)
         self.server.locations = locations
         self.server.currentLoc = currentLoc
         self.server.lock = lock
         self.server.log = log
+        self.server.tiles = None
         self.thread = threading.Thread(target=self.__serve, name='Location')
         self.thread.start()
 
     def __serve(self):
         self.server.serve_forever()
 
+    def set_tiles(self, directory):
+        self.server.tiles = directory
+
     def close(self):
         self.server.shutdown()
 
@@ -567,6 +572,30 @@ class LocationServerHandler(BaseHTTPRequestHandler):
 
         self.wfile.write(json.dumps(data, indent=4))
 
+    def __get_fix(self):
+        location = self.server.currentLoc
+        if location[0] is None or location[3] is None:
+            return False
+        return time.time() - location[3] < TIMEOUT
+
+    def __send_metrics(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'text/plain; version=0.0.4')
+        self.end_headers()
+
+        self.wfile.write(metrics.format_prometheus(self.__get_fix()))
+
+    def __send_metrics_json(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        data = metrics.get_results()
+        data['gps'] = self.__get_fix()
+
+        self.wfile.write(json.dumps(data))
+
     def __send_file(self):
         url = urlparse(self.path)
         _dir, filename = os.path.split(url.path)
@@ -586,11 +615,42 @@ class LocationServerHandler(BaseHTTPRequestHandler):
         self.wfile.write(f.read())
         f.close()
 
+    def __send_tile(self):
+        url = urlparse(self.path)
+        path = url.path[len('/tiles/'):]
+        if not len(path):
+            path = 'index.html'
+        path = os.path.normpath(urllib.unquote(path))
+        localFile = None
+        if self.server.tiles is not None and not os.path.isabs(path) and \
+                not path.startswith(os.pardir):
+            localFile = os.path.join(self.server.tiles, path)
+        if localFile is None or not os.path.isfile(localFile):
+            self.send_error(404)
+            self.server.log.add('Tile not found: {}'.format(self.path),
+                                Log.WARN)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', mimetypes.guess_type(localFile)[0])
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        f = open(localFile, 'rb')
+        self.wfile.write(f.read())
+        f.close()
+
     def do_GET(self):
         if self.path == '/kml':
             self.__send_kml()
         elif self.path == '/gjson':
             self.__send_geojson()
+        elif self.path == '/metrics':
+            self.__send_metrics()
+        elif self.path == '/metrics.json':
+            self.__send_metrics_json()
+        elif self.path.startswith('/tiles/'):
+            self.__send_tile()
         else:
             self.__send_file()
 
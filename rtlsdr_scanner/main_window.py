@@ -44,25 +44,28 @@ from misc import RemoteControl, calc_samples, get_dwells, calc_real_dwell, \
     format_iso_time, limit
 from rtlsdr_scanner.constants import F_MIN, F_MAX, MODE, NFFT, DISPLAY, Warn, \
     Cal, Mode, APP_NAME, LOCATION_PORT
-from rtlsdr_scanner.devices import get_devices_rtl
+from rtlsdr_scanner.devices import get_devices_rtl, DeviceRTL
 from rtlsdr_scanner.dialogs_devices import DialogDevicesRTL, DialogDevicesGPS
 from rtlsdr_scanner.dialogs_file import DialogImageSize, DialogExportSeq, DialogExportGeo, \
-    DialogProperties, DialogSaveWarn, DialogRestore
+    DialogProperties, DialogSaveWarn, DialogRestore, DialogExportCont
 from rtlsdr_scanner.dialogs_help import DialogSysInfo, DialogAbout
 from rtlsdr_scanner.dialogs_prefs import DialogPrefs, DialogAdvPrefs, DialogFormatting
 from rtlsdr_scanner.dialogs_scan import DialogScanDelay
-from rtlsdr_scanner.dialogs_tools import DialogCompare, DialogAutoCal, DialogSats, DialogSmooth, \
-    DialogLog
-from rtlsdr_scanner.events import EVENT_THREAD, Event, Log, EventTimer
-from rtlsdr_scanner.file import save_plot, export_plot, export_cont, open_plot, ScanInfo, export_image, \
-    export_map, extension_add, File, run_file, export_gpx, Backups
+from rtlsdr_scanner.dialogs_tools import DialogAutoCal, DialogSats, DialogSmooth, DialogLog
+from rtlsdr_scanner.events import EVENT_THREAD, Event, Log, EventTimer, \
+    EventThread, post_event
+from rtlsdr_scanner.file import export_plot, open_plot, ScanInfo, \
+    export_map, extension_add, File, run_file, export_gpx, Backups, ThreadSave, \
+    ThreadExportCont, export_waterfall, export_tiles
+from rtlsdr_scanner.metrics import metrics
+from rtlsdr_scanner.node import ThreadScanNode
 from rtlsdr_scanner.panels import PanelGraph
-from rtlsdr_scanner.printer import PrintOut
-from rtlsdr_scanner.scan import ThreadScan, update_spectrum, ThreadProcess
+from rtlsdr_scanner.scan import ThreadScan, update_spectrum, ThreadProcess, \
+    ThreadScanMulti, LevelCorrection
 from rtlsdr_scanner.settings import Settings
-from rtlsdr_scanner.spectrum import count_points, Extent
+from rtlsdr_scanner.snapshot import Snapshot, ThreadSnapshot
+from rtlsdr_scanner.spectrum import count_points, ExtentTracker
 from rtlsdr_scanner.toolbars import Statusbar, NavigationToolbar
-from rtlsdr_scanner.utils_google import create_gearth
 from rtlsdr_scanner.utils_mpl import add_colours
 from rtlsdr_scanner.utils_wx import load_icon
 from rtlsdr_scanner.widgets import MultiButton
@@ -99,6 +102,7 @@ class FrameMain(wx.Frame):
         self.sdr = None
         self.threadScan = None
         self.threadLocation = None
+        self.levelCorrection = None
 
         self.queueScan = Queue.Queue()
 
@@ -136,6 +140,7 @@ class FrameMain(wx.Frame):
         self.choiceDisplay = None
 
         self.spectrum = OrderedDict()
+        self.extentTracker = ExtentTracker()
         self.scanInfo = ScanInfo()
         self.locations = OrderedDict()
         self.lastLocation = [None] * 4
@@ -149,6 +154,8 @@ class FrameMain(wx.Frame):
                                        0, len(self.devicesRtl) - 1)
         self.filename = ""
         self.exportCont = None
+        self.exportSeq = None
+        self.dlgExportSeq = None
 
         self.oldCal = 0
 
@@ -166,6 +173,8 @@ class FrameMain(wx.Frame):
 
         self.timerGpsRetry = wx.Timer(self)
         self.Bind(wx.EVT_TIMER, self.__on_gps_retry, self.timerGpsRetry)
+        self.timerExportSeq = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.__on_export_seq, self.timerExportSeq)
 
         self.Bind(wx.EVT_CLOSE, self.__on_exit)
 
@@ -335,6 +344,8 @@ class FrameMain(wx.Frame):
         self.Bind(wx.EVT_MENU, self.__on_export_scan, self.menuMain.exportScan)
         self.Bind(wx.EVT_MENU, self.__on_export_image, self.menuMain.exportImage)
         self.Bind(wx.EVT_MENU, self.__on_export_image_seq, self.menuMain.exportSeq)
+        self.Bind(wx.EVT_MENU, self.__on_export_waterfall, self.menuMain.exportWaterfall)
+        self.Bind(wx.EVT_MENU, self.__on_export_tiles, self.menuMain.exportTiles)
         self.Bind(wx.EVT_MENU, self.__on_export_geo, self.menuMain.exportGeo)
         self.Bind(wx.EVT_MENU, self.__on_export_track, self.menuMain.exportTrack)
         self.Bind(wx.EVT_MENU, self.__on_export_cont, self.menuMain.exportCont)
@@ -415,6 +426,7 @@ class FrameMain(wx.Frame):
         if self.__save_warn(Warn.NEW):
             return True
         self.spectrum.clear()
+        self.extentTracker.reset()
         self.locations.clear()
         self.__saved(True)
         self.__set_plot(self.spectrum, False)
@@ -454,9 +466,11 @@ class FrameMain(wx.Frame):
             data = dlg.get_restored()
             self.scanInfo, spectrum, locations = data
             self.spectrum.clear()
+            self.extentTracker.reset()
             self.locations.clear()
             self.spectrum.update(OrderedDict(sorted(spectrum.items())))
             self.locations.update(OrderedDict(sorted(locations.items())))
+            self.__limit_spectrum()
             self.__set_plot(self.spectrum, self.settings.annotate)
             self.graph.scale_plot(True)
             self.status.set_general("Finished")
@@ -482,10 +496,29 @@ class FrameMain(wx.Frame):
             fileName = extension_add(fileName, dlg.GetFilterIndex(),
                                      File.Types.SAVE)
             fullName = os.path.join(dirName, fileName)
-            save_plot(fullName, self.scanInfo, self.spectrum, self.locations)
-            self.__saved(True)
-            self.status.set_general("Finished")
-            self.settings.fileHistory.AddFileToHistory(fullName)
+            thread = ThreadSave(fullName, self.scanInfo, self.spectrum,
+                                self.locations, self.lock)
+            dlgProgress = wx.ProgressDialog('Saving', fileName, 100, self,
+                                            style=wx.PD_APP_MODAL |
+                                            wx.PD_CAN_ABORT |
+                                            wx.PD_REMAINING_TIME)
+            while thread.isAlive():
+                thread.join(0.1)
+                cont, _skip = dlgProgress.Update(thread.progress)
+                if not cont:
+                    thread.abort()
+            dlgProgress.Destroy()
+
+            if thread.error is not None:
+                self.status.set_general("Save failed", level=Log.ERROR)
+                wx.MessageBox(str(thread.error), 'Error',
+                              wx.OK | wx.ICON_ERROR)
+            elif thread.saved:
+                self.__saved(True)
+                self.status.set_general("Finished")
+                self.settings.fileHistory.AddFileToHistory(fullName)
+            else:
+                self.status.set_general("Save cancelled")
         dlg.Destroy()
 
     def __on_export_scan(self, _event):
@@ -500,7 +533,8 @@ class FrameMain(wx.Frame):
             fileName = extension_add(fileName, dlg.GetFilterIndex(),
                                      File.Types.PLOT)
             fullName = os.path.join(dirName, fileName)
-            export_plot(fullName, dlg.GetFilterIndex(), self.spectrum)
+            export_plot(fullName, dlg.GetFilterIndex(), self.spectrum,
+                        self.locations)
             self.status.set_general("Finished")
         dlg.Destroy()
 
@@ -525,17 +559,124 @@ class FrameMain(wx.Frame):
                                      File.Types.IMAGE)
             fullName = os.path.join(dirName, fileName)
             exportType = dlgFile.GetFilterIndex()
-            export_image(fullName, exportType,
-                         self.graph.get_figure(),
-                         self.settings)
-            self.status.set_general("Finished")
+            snapshot = Snapshot(self.graph, self.settings, self.lock)
+            ThreadSnapshot(self, snapshot, fullName, exportType, self.settings)
+        dlgFile.Destroy()
+
+    def __on_export_waterfall(self, _event):
+        dlgFile = wx.FileDialog(self, "Export waterfall to file",
+                                self.settings.dirExport,
+                                self.filename,
+                                File.IMAGE[File.ImageType.PNG],
+                                wx.SAVE | wx.OVERWRITE_PROMPT)
+        if dlgFile.ShowModal() == wx.ID_OK:
+            dlgLabel = wx.MessageDialog(self, 'Label the frequency and time axes?',
+                                        'Export waterfall',
+                                        wx.YES_NO | wx.ICON_QUESTION)
+            annotate = dlgLabel.ShowModal() == wx.ID_YES
+            dlgLabel.Destroy()
+
+            self.status.set_general("Exporting...")
+            fileName = dlgFile.GetFilename()
+            dirName = dlgFile.GetDirectory()
+            self.settings.dirExport = dirName
+            fileName = extension_add(fileName, File.ImageType.PNG,
+                                     File.Types.IMAGE)
+            fullName = os.path.join(dirName, fileName)
+            dlgBusy = wx.BusyInfo('Please wait...')
+            try:
+                with self.lock:
+                    files = export_waterfall(fullName, self.spectrum,
+                                             self.settings.colourMap,
+                                             annotate)
+            except IOError as error:
+                self.status.set_general("Export failed", level=Log.ERROR)
+                wx.MessageBox(error.strerror, 'Error', wx.OK | wx.ICON_WARNING)
+            else:
+                if len(files) > 1:
+                    self.status.set_general("Finished, {} tiles".format(len(files)))
+                else:
+                    self.status.set_general("Finished")
+            finally:
+                dlgBusy.Destroy()
         dlgFile.Destroy()
 
+    def __on_export_tiles(self, _event):
+        dlgDir = wx.DirDialog(self, 'Export waterfall tiles to directory',
+                              self.settings.dirExport)
+        if dlgDir.ShowModal() == wx.ID_OK:
+            dirName = dlgDir.GetPath()
+            self.settings.dirExport = dirName
+            self.status.set_general("Exporting...")
+            dlgBusy = wx.BusyInfo('Please wait...')
+            try:
+                with self.lock:
+                    count = export_tiles(dirName, self.spectrum,
+                                         self.settings.colourMap)
+            except (IOError, OSError) as error:
+                dlgBusy.Destroy()
+                self.status.set_general("Export failed", level=Log.ERROR)
+                wx.MessageBox(error.strerror, 'Error', wx.OK | wx.ICON_WARNING)
+            else:
+                dlgBusy.Destroy()
+                self.status.set_general("Finished, {} tiles".format(count))
+                dlgView = wx.MessageDialog(self, 'View the tiles in a browser?',
+                                           'Export waterfall tiles',
+                                           wx.YES_NO | wx.ICON_QUESTION)
+                if dlgView.ShowModal() == wx.ID_YES and self.serverLocation:
+                    self.serverLocation.set_tiles(dirName)
+                    webbrowser.open_new('http://localhost:{}/tiles/'.format(LOCATION_PORT))
+                dlgView.Destroy()
+        dlgDir.Destroy()
+
     def __on_export_image_seq(self, _event):
+        if self.exportSeq is not None:
+            wx.MessageBox('A sequence is already being exported', 'Warning',
+                          wx.OK | wx.ICON_WARNING)
+            return
+
         dlgSeq = DialogExportSeq(self, self.spectrum, self.settings)
-        dlgSeq.ShowModal()
+        if dlgSeq.ShowModal() == wx.ID_OK:
+            self.exportSeq = dlgSeq.get_export()
+            self.dlgExportSeq = wx.ProgressDialog('Exporting', '',
+                                                  self.exportSeq.total,
+                                                  style=wx.PD_CAN_ABORT |
+                                                  wx.PD_REMAINING_TIME)
+            self.timerExportSeq.Start(250)
+            self.status.set_general("Exporting sequence...")
         dlgSeq.Destroy()
 
+    def __on_export_seq(self, _event):
+        try:
+            done = self.exportSeq.poll()
+        except IOError as error:
+            self.__export_seq_stop(True)
+            self.status.set_general("Export failed", level=Log.ERROR)
+            wx.MessageBox(error.strerror, 'Error', wx.OK | wx.ICON_WARNING)
+            return
+
+        name = ''
+        if self.exportSeq.last is not None:
+            name = os.path.basename(self.exportSeq.last)
+        # Reaching the maximum waits for the dialog to be closed
+        cont, _skip = self.dlgExportSeq.Update(min(done,
+                                                   self.exportSeq.total - 1),
+                                               name)
+        if not cont:
+            self.__export_seq_stop(True)
+            self.status.set_general("Export cancelled")
+        elif self.exportSeq.is_done():
+            self.__export_seq_stop(False)
+            self.status.set_general("Finished")
+
+    def __export_seq_stop(self, cancel):
+        self.timerExportSeq.Stop()
+        if cancel:
+            self.exportSeq.cancel()
+        self.exportSeq = None
+        self.dlgExportSeq.Destroy()
+        self.dlgExportSeq = None
+
     def __on_export_geo(self, _event):
         dlgGeo = DialogExportGeo(self, self.spectrum, self.locations, self.settings)
         if dlgGeo.ShowModal() == wx.ID_OK:
@@ -597,11 +738,21 @@ class FrameMain(wx.Frame):
                 fileName = extension_add(fileName, dlg.GetFilterIndex(),
                                          File.Types.CONT)
                 fullName = os.path.join(dirName, fileName)
-                self.exportCont = export_cont(self.exportCont, fullName, None)
-                self.status.set_general('Continuous export started')
+                dlgCont = DialogExportCont(self, self.settings)
+                if dlgCont.ShowModal() == wx.ID_OK:
+                    try:
+                        self.exportCont = ThreadExportCont(fullName,
+                                                           self.settings.exportContSize,
+                                                           self.settings.exportContTime,
+                                                           self.settings.exportContCompress)
+                        self.status.set_general('Continuous export started')
+                    except IOError as error:
+                        wx.MessageBox(error.strerror, 'Error',
+                                      wx.OK | wx.ICON_WARNING)
+                dlgCont.Destroy()
             dlg.Destroy()
         else:
-            self.exportCont.close()
+            self.exportCont.stop()
             self.exportCont = None
             self.status.set_general('Continuous export stopped')
 
@@ -613,8 +764,11 @@ class FrameMain(wx.Frame):
         dlg.Destroy()
 
     def __on_preview(self, _event):
-        printout = PrintOut(self.graph, self.filename, self.pageConfig)
-        printoutPrinting = PrintOut(self.graph, self.filename, self.pageConfig)
+        from rtlsdr_scanner.printer import PrintOut
+
+        snapshot = Snapshot(self.graph, self.settings, self.lock)
+        printout = PrintOut(snapshot, self.filename, self.pageConfig)
+        printoutPrinting = PrintOut(snapshot, self.filename, self.pageConfig)
         preview = wx.PrintPreview(printout, printoutPrinting, self.printConfig)
         frame = wx.PreviewFrame(preview, self, 'Print Preview')
         frame.Initialize()
@@ -622,8 +776,11 @@ class FrameMain(wx.Frame):
         frame.Show(True)
 
     def __on_print(self, _event):
+        from rtlsdr_scanner.printer import PrintOut
+
         printer = wx.Printer(self.printConfig)
-        printout = PrintOut(self.graph, self.filename, self.pageConfig)
+        snapshot = Snapshot(self.graph, self.settings, self.lock)
+        printout = PrintOut(snapshot, self.filename, self.pageConfig)
         if printer.Print(self, printout, True):
             self.printConfig = wx.PrintDialogData(printer.GetPrintDialogData())
             self.pageConfig.SetPrintData(self.printConfig.GetPrintData())
@@ -639,10 +796,15 @@ class FrameMain(wx.Frame):
 
     def __on_exit(self, _event):
         self.Unbind(wx.EVT_CLOSE)
-        self.backups.close()
         if self.__save_warn(Warn.EXIT):
             self.Bind(wx.EVT_CLOSE, self.__on_exit)
             return
+        self.backups.close()
+        if self.exportSeq is not None:
+            self.__export_seq_stop(True)
+        if self.exportCont is not None:
+            self.exportCont.stop()
+            self.exportCont = None
         self.__scan_stop(False)
         self.__stop_gps(False)
         self.__stop_location_server()
@@ -709,6 +871,8 @@ class FrameMain(wx.Frame):
         dlg.Destroy()
 
     def __on_compare(self, _event):
+        from rtlsdr_scanner.dialogs_tools import DialogCompare
+
         dlg = DialogCompare(self, self.settings, self.filename)
         dlg.Show()
 
@@ -719,6 +883,7 @@ class FrameMain(wx.Frame):
             self.isSaved = False
             if not self.__on_new(None):
                 self.spectrum.clear()
+                self.extentTracker.reset()
                 spectrum = dlg.get_spectrum()
                 self.spectrum.update(spectrum.items())
                 self.__set_plot(self.spectrum, False)
@@ -759,6 +924,8 @@ class FrameMain(wx.Frame):
         self.dlgCal.ShowModal()
 
     def __on_gearth(self, _event):
+        from rtlsdr_scanner.utils_google import create_gearth
+
         tempPath = tempfile.mkdtemp()
         tempFile = os.path.join(tempPath, 'RTLSDRScannerLink.kml')
         handle = open(tempFile, 'wb')
@@ -906,18 +1073,26 @@ class FrameMain(wx.Frame):
             if self.threadScan is not None:
                 self.sdr = self.threadScan.get_sdr()
                 if arg2 is not None:
-                    self.devicesRtl[self.settings.indexRtl].tuner = arg2
+                    if isinstance(self.threadScan, ThreadScan):
+                        device = self.devicesRtl[self.settings.indexRtl]
+                        device.tuner = arg2
+                        if arg1 is not None:
+                            device.gains = arg1
                     self.scanInfo.tuner = arg2
         elif status == Event.DATA:
             self.__saved(False)
-            cal = self.devicesRtl[self.settings.indexRtl].calibration
-            levelOff = self.devicesRtl[self.settings.indexRtl].levelOff
-            freq, scan = self.queueScan.get()
-            process = ThreadProcess(self, freq, scan, cal, levelOff,
-                                    self.settings.nfft,
-                                    self.settings.overlap,
-                                    self.settings.winFunc)
-            process.start()
+            if arg2 is not None:
+                post_event(self, EventThread(Event.PROCESSED, arg2))
+            else:
+                freq, scan, device = self.queueScan.get()
+                cal = self.devicesRtl[device].calibration
+                levelOff = self.devicesRtl[device].levelOff
+                process = ThreadProcess(self, freq, scan, cal, levelOff,
+                                        self.settings.nfft,
+                                        self.settings.overlap,
+                                        self.settings.winFunc,
+                                        device, self.levelCorrection)
+                process.start()
             self.__progress()
         elif status == Event.STOPPED:
             self.__cleanup()
@@ -925,6 +1100,7 @@ class FrameMain(wx.Frame):
         elif status == Event.FINISHED:
             self.threadScan = None
         elif status == Event.ERROR:
+            metrics.add_count('errors')
             self.__cleanup()
             self.status.set_general("Error: {}".format(arg2), level=Log.ERROR)
             if self.dlgCal is not None:
@@ -954,8 +1130,11 @@ class FrameMain(wx.Frame):
                 wx.MessageBox('Out of memory', 'Error',
                               wx.OK | wx.ICON_ERROR)
         elif status == Event.LEVEL:
+            metrics.set_value('alert', time.time())
             wx.Bell()
         elif status == Event.UPDATED:
+            if arg2:
+                self.extentTracker.mark(arg1)
             if arg2 and self.settings.liveUpdate:
                 self.__set_plot(self.spectrum,
                                 self.settings.annotate and
@@ -972,6 +1151,16 @@ class FrameMain(wx.Frame):
         elif status == Event.DELAY_START:
             self.status.hide_progress()
             self.__scan_start()
+        elif status == Event.EXPORTED:
+            if arg2 is None:
+                self.status.set_general("Finished")
+            else:
+                self.status.set_general("Export failed", level=Log.ERROR)
+                wx.MessageBox('Could not export {}\n{}'.format(arg1, arg2),
+                              'Error', wx.OK | wx.ICON_WARNING)
+        elif status == Event.SCAN_WARN:
+            metrics.add_count('errors')
+            self.status.set_general("{}".format(arg2), level=Log.WARN)
         elif status == Event.LOC_WARN:
             self.status.set_gps("{}".format(arg2), level=Log.WARN)
             self.status.warn_gps()
@@ -1000,6 +1189,7 @@ class FrameMain(wx.Frame):
                 self.devicesRtl[self.settings.indexRtl].calibration = 0
                 self.__get_controls()
                 self.spectrum.clear()
+                self.extentTracker.reset()
                 self.locations.clear()
                 if not self.__scan_start(isCal=True):
                     self.dlgCal.reset_cal()
@@ -1048,11 +1238,14 @@ class FrameMain(wx.Frame):
             self.scanInfo.set_from_settings(self.settings)
             if self.isNewScan:
                 self.spectrum.clear()
+                self.extentTracker.reset()
                 self.locations.clear()
                 self.graph.clear_plots()
+                self.levelCorrection = None
 
                 self.isNewScan = False
                 self.status.set_info('', level=None)
+                metrics.clear()
                 self.scanInfo.time = format_iso_time(time.time())
                 self.scanInfo.lat = None
                 self.scanInfo.lon = None
@@ -1060,11 +1253,30 @@ class FrameMain(wx.Frame):
 
             self.stopAtEnd = False
             self.stopScan = False
-            self.threadScan = ThreadScan(self, self.queueScan, self.sdr, self.settings,
-                                         self.settings.indexRtl, samples, isCal)
+            devices = self.__get_devices_multi()
+            if self.__is_node(self.settings.indexRtl):
+                if len(devices) < 2 or isCal:
+                    devices = [self.settings.indexRtl]
+                    self.levelCorrection = None
+                elif self.levelCorrection is None:
+                    self.levelCorrection = LevelCorrection(devices[0])
+                self.threadScan = ThreadScanNode(self, self.sdr, self.settings,
+                                                 devices, samples, isCal,
+                                                 self.levelCorrection)
+            elif len(devices) > 1 and not isCal:
+                if self.levelCorrection is None:
+                    self.levelCorrection = LevelCorrection(devices[0])
+                self.threadScan = ThreadScanMulti(self, self.queueScan, self.sdr,
+                                                  self.settings, devices,
+                                                  samples, isCal)
+            else:
+                self.levelCorrection = None
+                self.threadScan = ThreadScan(self, self.queueScan, self.sdr, self.settings,
+                                             self.settings.indexRtl, samples, isCal)
             self.filename = "Scan {0:.1f}-{1:.1f}MHz".format(self.settings.start,
                                                              self.settings.stop)
             self.graph.set_plot_title()
+            metrics.start_sweep()
 
             self.__start_gps()
 
@@ -1092,13 +1304,25 @@ class FrameMain(wx.Frame):
             self.status.show_progress()
         else:
             if self.settings.backup:
-                self.backups.save(self.scanInfo, self.spectrum, self.locations)
+                with self.lock:
+                    self.backups.save(self.scanInfo, self.spectrum,
+                                      self.locations)
             self.status.hide_progress()
+            metrics.end_sweep()
+            self.status.set_info(metrics.format_status(), level=None)
             self.__set_plot(self.spectrum, self.settings.annotate)
             if self.exportCont is not None:
-                last = next(reversed(self.spectrum))
-                sweep = OrderedDict({last: self.spectrum[last]})
-                export_cont(self.exportCont, None, sweep)
+                with self.lock:
+                    last = next(reversed(self.spectrum))
+                    sweep = OrderedDict(self.spectrum[last])
+                sweep = OrderedDict({last: sweep})
+                if not self.exportCont.add(sweep):
+                    self.status.set_general('Continuous export falling behind, '
+                                            'sweep dropped', level=Log.WARN)
+                error = self.exportCont.get_error()
+                if error is not None:
+                    self.status.set_general('Continuous export: {}'.format(error),
+                                            level=Log.ERROR)
 
             if self.stopScan:
                 self.status.set_general("Stopped")
@@ -1216,7 +1440,8 @@ class FrameMain(wx.Frame):
         if len(spectrum) > 0:
             total = count_points(spectrum)
             if total > 0:
-                extent = Extent(spectrum)
+                with self.lock:
+                    extent = self.extentTracker.update(spectrum)
                 self.graph.set_plot(spectrum,
                                     self.settings.pointsLimit,
                                     self.settings.pointsMax,
@@ -1349,6 +1574,19 @@ class FrameMain(wx.Frame):
 
         return False
 
+    def __is_node(self, index):
+        device = self.devicesRtl[index]
+        return not device.isDevice and device.type == DeviceRTL.NODE
+
+    def __get_devices_multi(self):
+        node = self.__is_node(self.settings.indexRtl)
+        devices = []
+        for i in range(len(self.devicesRtl)):
+            if self.devicesRtl[i].multi and self.__is_node(i) == node:
+                devices.append(i)
+
+        return devices
+
     def __refresh_devices(self):
         self.settings.devicesRtl = get_devices_rtl(self.devicesRtl, self.status)
         self.settings.indexRtl = limit(self.settings.indexRtl,
@@ -1370,6 +1608,7 @@ class FrameMain(wx.Frame):
 
         if len(spectrum) > 0:
             self.spectrum.clear()
+            self.extentTracker.reset()
             self.locations.clear()
             self.spectrum.update(OrderedDict(sorted(spectrum.items())))
             self.locations.update(OrderedDict(sorted(locations.items())))
@@ -1399,6 +1638,7 @@ class FrameMain(wx.Frame):
         if len(spectrum) > 0:
             self.scanInfo.set_to_settings(self.settings)
             self.spectrum = spectrum
+            self.extentTracker.reset()
             self.locations.clear()
             self.locations.update(location)
             self.__saved(True)
@@ -52,6 +52,10 @@ class MenuMain(object):
                                        "Export image")
         self.exportSeq = file.Append(wx.ID_ANY, "Export image sequence...",
                                      "Export sweep plots in sequence")
+        self.exportWaterfall = file.Append(wx.ID_ANY, "Export waterfall...",
+                                           "Export a full resolution waterfall")
+        self.exportTiles = file.Append(wx.ID_ANY, "Export waterfall tiles...",
+                                       "Export a zoomable waterfall")
         self.exportGeo = file.Append(wx.ID_ANY, "Export map...",
                                      "Export maps")
         self.exportTrack = file.Append(wx.ID_ANY, "Export GPS track...",
@@ -172,6 +176,8 @@ class MenuMain(object):
         self.exportScan.Enable(state and len(spectrum))
         self.exportImage.Enable(state)
         self.exportSeq.Enable(state and len(spectrum))
+        self.exportWaterfall.Enable(state and len(spectrum))
+        self.exportTiles.Enable(state and len(spectrum))
         self.exportGeo.Enable(state and len(spectrum) and len(locations) > 4)
         self.exportTrack.Enable(state and len(locations))
         self.exportCont.Enable(state)
@@ -0,0 +1,306 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from collections import OrderedDict
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class Histogram(object):
+    BUCKETS = [1e-5 * 2 ** i for i in range(24)]
+    PERCENTILES = [50, 90, 99]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def get_mean(self):
+        if not self.count:
+            return 0.
+        return self.total / self.count
+
+    def get_percentile(self, percentile):
+        if not self.count:
+            return 0.
+        target = self.count * percentile / 100.
+        total = 0
+        for index, count in enumerate(self.counts):
+            if count and total + count >= target:
+                if index == len(self.BUCKETS):
+                    return self.max
+                lower = self.BUCKETS[index - 1] if index else 0.
+                upper = self.BUCKETS[index]
+                value = lower + (upper - lower) * (target - total) / count
+                return min(max(value, self.min), self.max)
+            total += count
+
+        return self.max
+
+    def get_summary(self):
+        summary = OrderedDict([('count', self.count),
+                               ('total', self.total * 1000),
+                               ('mean', self.get_mean() * 1000),
+                               ('min', (self.min or 0.) * 1000)])
+        for percentile in self.PERCENTILES:
+            summary['p{}'.format(percentile)] = self.get_percentile(percentile) * 1000
+        summary['max'] = (self.max or 0.) * 1000
+
+        return summary
+
+    def get_buckets(self):
+        buckets = []
+        for index, count in enumerate(self.counts):
+            if count:
+                if index < len(self.BUCKETS):
+                    upper = self.BUCKETS[index] * 1000
+                else:
+                    upper = None
+                buckets.append([upper, count])
+
+        return buckets
+
+
+class Metrics(object):
+    STAGES = ['tune', 'settle', 'capture', 'fft', 'stitch', 'lock',
+              'plot', 'draw', 'sweep']
+    STATUS = ['tune', 'capture', 'fft', 'stitch', 'plot', 'draw']
+    COUNTERS = ['steps', 'dropped', 'skipped', 'sweeps', 'errors']
+    LABELS = {'fft': 'FFT'}
+    PREFIX = 'rtlsdr_scan_'
+    NAMES = {'queue': 'queue_depth',
+             'rate': 'steps_per_second',
+             'alert': 'last_alert_timestamp_seconds',
+             'memory': 'memory_bytes',
+             'gps': 'gps_fix'}
+    HELP = {'steps': 'Steps captured',
+            'dropped': 'Short or failed captures',
+            'skipped': 'Plot updates deferred while drawing',
+            'sweeps': 'Sweeps completed',
+            'errors': 'Device errors and warnings',
+            'queue': 'Captures waiting to be processed',
+            'rate': 'Steps per second in the last sweep',
+            'alert': 'Time of the last level alert',
+            'memory': 'Resident memory in use',
+            'gps': 'GPS fix (1 = fixed)'}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.timeStart = time.time()
+            self.timers = OrderedDict([(stage, Histogram())
+                                       for stage in self.STAGES])
+            self.counters = OrderedDict([(counter, 0)
+                                         for counter in self.COUNTERS])
+            self.levels = OrderedDict()
+            self.values = OrderedDict([('rate', 0.), ('alert', None)])
+            self.sweepStart = None
+            self.sweepSteps = 0
+
+    def add_time(self, name, elapsed):
+        with self.lock:
+            if name not in self.timers:
+                self.timers[name] = Histogram()
+            self.timers[name].add(elapsed)
+
+    def add_count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_level(self, name, value):
+        with self.lock:
+            _last, peak = self.levels.get(name, (0, 0))
+            self.levels[name] = (value, max(peak, value))
+
+    def set_value(self, name, value):
+        with self.lock:
+            self.values[name] = value
+
+    def start_sweep(self):
+        with self.lock:
+            self.sweepStart = time.time()
+            self.sweepSteps = self.counters['steps']
+
+    def end_sweep(self):
+        with self.lock:
+            if self.sweepStart is None:
+                return
+            elapsed = max(time.time() - self.sweepStart, 1e-6)
+            self.timers['sweep'].add(elapsed)
+            self.counters['sweeps'] += 1
+            self.values['rate'] = (self.counters['steps'] -
+                                   self.sweepSteps) / elapsed
+            self.sweepStart = None
+
+    @staticmethod
+    def get_memory():
+        if resource is None:
+            return None
+        try:
+            with open('/proc/self/statm', 'rb') as f:
+                return int(f.read().split()[1]) * resource.getpagesize()
+        except (IOError, IndexError, ValueError):
+            memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform.startswith('linux'):
+                memory *= 1024
+            return memory
+
+    def format_status(self):
+        with self.lock:
+            stages = ['{} {:.1f}ms'.format(self.LABELS.get(stage,
+                                                           stage.capitalize()),
+                                           self.timers[stage].get_mean() * 1000)
+                      for stage in self.STATUS if self.timers[stage].count]
+            if self.counters['dropped']:
+                stages.append('{} dropped'.format(self.counters['dropped']))
+
+        return ', '.join(stages)
+
+    def format_summary(self):
+        lines = ['{:<10}{:>8}{:>10}{:>10}{:>10}{:>10}'.format('Stage', 'Count',
+                                                              'Mean',
+                                                              'p90', 'p99',
+                                                              'Max')]
+        with self.lock:
+            for stage, histogram in self.timers.iteritems():
+                if not histogram.count:
+                    continue
+                summary = histogram.get_summary()
+                lines.append('{:<10}{:>8}{:>8.1f}ms{:>8.1f}ms'
+                             '{:>8.1f}ms{:>8.1f}ms'.format(stage,
+                                                           summary['count'],
+                                                           summary['mean'],
+                                                           summary['p90'],
+                                                           summary['p99'],
+                                                           summary['max']))
+            lines.append('')
+            for counter, value in self.counters.iteritems():
+                lines.append('{:<10}{:>8}'.format(counter, value))
+            for level, (last, peak) in self.levels.iteritems():
+                lines.append('{:<10}{:>8} (peak {})'.format(level, last, peak))
+
+        return os.linesep.join(lines)
+
+    def get_results(self):
+        with self.lock:
+            timers = OrderedDict()
+            for stage, histogram in self.timers.iteritems():
+                summary = histogram.get_summary()
+                summary['buckets'] = histogram.get_buckets()
+                timers[stage] = summary
+
+            return OrderedDict([('start', self.timeStart),
+                                ('elapsed', time.time() - self.timeStart),
+                                ('stages', timers),
+                                ('counters', OrderedDict(self.counters)),
+                                ('values', OrderedDict(self.values)),
+                                ('memory', self.get_memory()),
+                                ('levels', OrderedDict([(level, {'last': last,
+                                                                 'peak': peak})
+                                                        for level, (last, peak)
+                                                        in self.levels.iteritems()]))])
+
+    def format_prometheus(self, gps=None):
+        lines = []
+
+        def add(name, kind, value, labels='', suffix=''):
+            metric = self.PREFIX + self.NAMES.get(name, name) + suffix
+            if kind is not None:
+                lines.append('# HELP {} {}'.format(metric,
+                                                   self.HELP.get(name, name)))
+                lines.append('# TYPE {} {}'.format(metric, kind))
+            lines.append('{}{} {!r}'.format(metric, labels, value))
+
+        memory = self.get_memory()
+        with self.lock:
+            for counter, value in self.counters.iteritems():
+                add(counter, 'counter', value, suffix='_total')
+            for level, (last, _peak) in self.levels.iteritems():
+                add(level, 'gauge', last)
+            add('rate', 'gauge', float(self.values['rate']))
+            if self.values['alert'] is not None:
+                add('alert', 'gauge', float(self.values['alert']))
+
+            name = 'stage_seconds'
+            lines.append('# HELP {}{} Pipeline stage durations'.format(self.PREFIX,
+                                                                       name))
+            lines.append('# TYPE {}{} histogram'.format(self.PREFIX, name))
+            for stage, histogram in self.timers.iteritems():
+                if not histogram.count:
+                    continue
+                total = 0
+                for index, upper in enumerate(Histogram.BUCKETS):
+                    total += histogram.counts[index]
+                    add(name + '_bucket', None, total,
+                        '{{stage="{}",le="{:g}"}}'.format(stage, upper))
+                add(name + '_bucket', None, histogram.count,
+                    '{{stage="{}",le="+Inf"}}'.format(stage))
+                add(name + '_sum', None, histogram.total,
+                    '{{stage="{}"}}'.format(stage))
+                add(name + '_count', None, histogram.count,
+                    '{{stage="{}"}}'.format(stage))
+
+        if memory is not None:
+            add('memory', 'gauge', memory)
+        if gps is not None:
+            add('gps', 'gauge', int(gps))
+
+        return '\n'.join(lines) + '\n'
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            json.dump(self.get_results(), f, indent=4)
+            f.write(os.linesep)
+
+
+metrics = Metrics()
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
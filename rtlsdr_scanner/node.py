@@ -0,0 +1,429 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import Queue
+import SocketServer
+from collections import OrderedDict
+import json
+import math
+import socket
+import struct
+import threading
+import time
+
+import numpy
+
+from rtlsdr_scanner.constants import LOCATION_PORT, WINFUNC
+from rtlsdr_scanner.devices import DeviceRTL, get_devices_rtl
+from rtlsdr_scanner.events import Event, EventThread, Log, post_event
+from rtlsdr_scanner.location import LocationServer
+from rtlsdr_scanner.metrics import metrics
+from rtlsdr_scanner.scan import ThreadScan, SdrMulti, calc_psd, \
+    create_spectrum
+from rtlsdr_scanner.settings import Settings
+
+
+class NodeFrame(object):
+    INFO = 'INFO'
+    AXIS = 'AXIS'
+    DATA = 'DATA'
+    DONE = 'DONE'
+    ERROR = 'ERR '
+
+    HEADER = struct.Struct('>4sI')
+    CENTRE = struct.Struct('>d')
+
+    FLOAT32, INT16 = range(2)
+    FORMATS = ['float32', 'int16']
+
+
+def send_frame(sock, kind, payload=''):
+    sock.sendall(NodeFrame.HEADER.pack(kind, len(payload)) + payload)
+
+
+def recv_frame(sock):
+    kind, length = NodeFrame.HEADER.unpack(__recv_all(sock,
+                                                      NodeFrame.HEADER.size))
+    return kind, __recv_all(sock, length)
+
+
+def __recv_all(sock, length):
+    data = []
+    while length > 0:
+        recv = sock.recv(length)
+        if not len(recv):
+            raise socket.error('Connection closed')
+        data.append(recv)
+        length -= len(recv)
+
+    return ''.join(data)
+
+
+def encode_levels(powers, dataFormat):
+    if dataFormat == NodeFrame.INT16:
+        levels = 1000 * numpy.log10(numpy.maximum(powers, 1e-30))
+        levels = numpy.clip(numpy.round(levels), -32768, 32767)
+        return levels.astype('>i2').tostring()
+
+    return numpy.asarray(powers).astype('>f4').tostring()
+
+
+def decode_levels(data, dataFormat):
+    if dataFormat == NodeFrame.INT16:
+        levels = numpy.fromstring(data, '>i2')
+        return numpy.power(10, levels / 1000.)
+
+    return numpy.fromstring(data, '>f4').astype(numpy.float64)
+
+
+class Node(object):
+    def __init__(self, index, port, scenario=None, metricsBind='127.0.0.1'):
+        self.settings = Settings(load=False)
+        if scenario is not None:
+            device = DeviceRTL()
+            device.isDevice = False
+            device.type = DeviceRTL.SIM
+            device.scenario = scenario
+            self.settings.devicesRtl = [device]
+            index = 0
+        else:
+            self.settings.devicesRtl = get_devices_rtl()
+        self.index = index
+
+        count = len(self.settings.devicesRtl)
+        if index > count - 1:
+            print "Error: Device not found ({} devices in total)".format(count)
+            exit(1)
+
+        self.server = NodeServer(('', port), NodeHandler)
+        self.server.node = self
+
+        print 'Serving {} on port {}'.format(self.settings.devicesRtl[index].get_desc(),
+                                             port)
+
+        try:
+            self.serverMetrics = LocationServer(OrderedDict(), [None] * 4,
+                                                threading.Lock(), Log(),
+                                                metricsBind)
+            print 'Metrics on http://{}:{}/metrics'.format(metricsBind,
+                                                           LOCATION_PORT)
+        except socket.error as error:
+            self.serverMetrics = None
+            print 'Warning: metrics unavailable ({})'.format(error)
+
+    def serve(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if self.serverMetrics is not None:
+                self.serverMetrics.close()
+
+    def sweep(self, sock, request, sdr, tuner):
+        start = float(request['start'])
+        stop = float(request['stop'])
+        gain = float(request['gain'])
+        lo = float(request['lo'])
+        offset = float(request['offset'])
+        samples = int(request['samples'])
+        nfft = int(request['nfft'])
+        winFunc = request['winFunc']
+        if winFunc not in WINFUNC[::2]:
+            raise ValueError('Unknown window {}'.format(winFunc))
+        dataFormat = NodeFrame.FORMATS.index(request.get('format',
+                                                         'float32'))
+
+        self.settings.start = start
+        self.settings.stop = stop
+        device = self.settings.devicesRtl[self.index]
+        device.gain = gain
+        device.lo = lo
+        device.offset = offset
+        if sdr is not None:
+            sdr.set_gain(device.gain)
+
+        notify = Queue.Queue()
+        queue = Queue.Queue()
+        metrics.start_sweep()
+        threadScan = ThreadScan(notify, queue, sdr, self.settings,
+                                self.index, samples, False)
+        steps = 0
+        axis = False
+        try:
+            while True:
+                event = notify.get()
+                status = event.data.get_status()
+                arg1 = event.data.get_arg1()
+                arg2 = event.data.get_arg2()
+                if status == Event.STEPS:
+                    steps = arg1
+                elif status == Event.INFO:
+                    if arg2 is not None:
+                        tuner = arg2
+                    send_frame(sock, NodeFrame.INFO,
+                               json.dumps({'steps': steps,
+                                           'tuner': tuner}))
+                elif status == Event.DATA:
+                    freq, scan, _device = queue.get()
+                    freqs, powers = calc_psd(scan[1], nfft, winFunc)
+                    if not axis:
+                        send_frame(sock, NodeFrame.AXIS,
+                                   freqs.astype('>f4').tostring())
+                        axis = True
+                    send_frame(sock, NodeFrame.DATA,
+                               NodeFrame.CENTRE.pack(freq) +
+                               encode_levels(powers, dataFormat))
+                elif status == Event.ERROR:
+                    threadScan.join()
+                    metrics.add_count('errors')
+                    send_frame(sock, NodeFrame.ERROR, str(arg2))
+                    if threadScan.get_sdr() is not None:
+                        threadScan.rtl_close()
+                    return None, tuner
+                elif status == Event.FINISHED:
+                    threadScan.join()
+                    metrics.end_sweep()
+                    send_frame(sock, NodeFrame.DONE)
+                    return threadScan.get_sdr(), tuner
+        except:
+            threadScan.abort()
+            threadScan.join()
+            if threadScan.get_sdr() not in [None, sdr]:
+                threadScan.rtl_close()
+            raise
+
+
+class NodeServer(SocketServer.TCPServer):
+    allow_reuse_address = True
+
+
+class NodeHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        node = self.server.node
+        sdr = None
+        tuner = 0
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    send_frame(self.request, NodeFrame.ERROR,
+                               'Invalid request')
+                    continue
+                try:
+                    sdr, tuner = node.sweep(self.request, request, sdr,
+                                            tuner)
+                except (AttributeError, KeyError, TypeError,
+                        ValueError) as error:
+                    send_frame(self.request, NodeFrame.ERROR,
+                               'Invalid request: {}'.format(error))
+        except socket.error:
+            pass
+        finally:
+            if sdr is not None:
+                sdr.close()
+
+
+class NodeClient(object):
+    TIMEOUT = 30
+
+    def __init__(self, host, port):
+        self.socket = socket.create_connection((host, port), self.TIMEOUT)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.axis = None
+
+    def request(self, **request):
+        self.socket.sendall(json.dumps(request) + '\n')
+
+    def read(self):
+        return recv_frame(self.socket)
+
+    def close(self):
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.socket.close()
+
+
+class ThreadScanNode(threading.Thread):
+    def __init__(self, notify, sdr, settings, devices, samples, isCal,
+                 correction=None, dataFormat=NodeFrame.FLOAT32):
+        threading.Thread.__init__(self)
+        self.name = 'Scan'
+        self.notify = notify
+        if isinstance(sdr, SdrMulti):
+            self.sdr = sdr
+        else:
+            self.sdr = SdrMulti()
+        self.settings = settings
+        self.devices = devices
+        self.devicesRtl = settings.devicesRtl
+        self.samples = int(samples)
+        self.isCal = isCal
+        self.correction = correction
+        self.dataFormat = dataFormat
+        self.error = None
+        self.cancel = False
+
+        post_event(self.notify, EventThread(Event.STARTING))
+        self.start()
+
+    def __connect(self):
+        for device in self.devices:
+            if device in self.sdr.sdrs:
+                continue
+            deviceRtl = self.devicesRtl[device]
+            try:
+                self.sdr.sdrs[device] = NodeClient(deviceRtl.server,
+                                                   deviceRtl.port)
+            except socket.error as error:
+                self.sdr.close()
+                post_event(self.notify,
+                           EventThread(Event.ERROR, 0,
+                                       '{}:{}: {}'.format(deviceRtl.server,
+                                                          deviceRtl.port,
+                                                          error)))
+                return False
+
+        return True
+
+    def __request(self):
+        start = self.settings.start
+        span = float(self.settings.stop - start) / len(self.sdr.sdrs)
+        for device, client in self.sdr.sdrs.iteritems():
+            deviceRtl = self.devicesRtl[device]
+            client.request(start=start, stop=start + span,
+                           gain=deviceRtl.gain, lo=deviceRtl.lo,
+                           offset=deviceRtl.offset,
+                           samples=self.samples,
+                           nfft=self.settings.nfft,
+                           winFunc=self.settings.winFunc,
+                           format=NodeFrame.FORMATS[self.dataFormat])
+            start += span
+
+        steps = 0
+        tuner = 0
+        for client in self.sdr.sdrs.itervalues():
+            kind, payload = client.read()
+            if kind == NodeFrame.ERROR:
+                raise socket.error(payload)
+            info = json.loads(payload)
+            steps += info['steps'] + 1
+            tuner = info['tuner']
+
+        return steps, tuner
+
+    def __receive(self, device, client, timeStamp):
+        cal = self.devicesRtl[device].calibration
+        levelOff = math.pow(10, self.devicesRtl[device].levelOff / 10.0)
+        try:
+            while not self.cancel:
+                kind, payload = client.read()
+                if kind == NodeFrame.AXIS:
+                    client.axis = numpy.fromstring(payload, '>f4').astype(numpy.float64)
+                elif kind == NodeFrame.DATA:
+                    size = NodeFrame.CENTRE.size
+                    freq = NodeFrame.CENTRE.unpack(payload[:size])[0]
+                    powers = decode_levels(payload[size:], self.dataFormat)
+                    if self.correction is not None:
+                        powers = self.correction.correct(device, freq,
+                                                         client.axis + freq / 1e6,
+                                                         powers)
+                    spectrum = create_spectrum(freq, client.axis, powers,
+                                               cal, levelOff)
+                    metrics.add_count('steps')
+                    post_event(self.notify,
+                               EventThread(Event.DATA, None,
+                                           (timeStamp, freq, spectrum)))
+                elif kind == NodeFrame.ERROR:
+                    self.__abort(payload)
+                    return
+                elif kind == NodeFrame.DONE:
+                    return
+        except socket.error as error:
+            if not self.cancel:
+                self.__abort(str(error))
+
+    def __abort(self, error):
+        if self.error is None:
+            self.error = error
+        self.cancel = True
+
+    def run(self):
+        if not self.__connect():
+            return
+
+        try:
+            steps, tuner = self.__request()
+        except (socket.error, ValueError, KeyError) as error:
+            self.rtl_close()
+            post_event(self.notify, EventThread(Event.ERROR, 0, str(error)))
+            return
+        post_event(self.notify, EventThread(Event.INFO, None, tuner))
+        post_event(self.notify, EventThread(Event.STEPS, steps - 1))
+
+        timeStamp = math.floor(time.time())
+        threads = []
+        for device, client in self.sdr.sdrs.iteritems():
+            thread = threading.Thread(target=self.__receive,
+                                      args=(device, client, timeStamp),
+                                      name='Node {}'.format(device))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        if self.error is not None:
+            self.rtl_close()
+            post_event(self.notify, EventThread(Event.ERROR, 0, self.error))
+            return
+        if self.cancel:
+            post_event(self.notify, EventThread(Event.STOPPED))
+            self.rtl_close()
+            return
+
+        post_event(self.notify, EventThread(Event.FINISHED, 0, None))
+
+        if self.isCal:
+            post_event(self.notify, EventThread(Event.CAL))
+
+    def abort(self):
+        self.cancel = True
+        self.rtl_close()
+
+    def rtl_close(self):
+        self.sdr.close()
+
+    def get_sdr(self):
+        return self.sdr
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
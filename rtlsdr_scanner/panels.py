@@ -28,6 +28,7 @@ import math
 import os
 import re
 import threading
+import time
 
 from matplotlib import cm
 import matplotlib
@@ -43,17 +44,16 @@ import wx
 import wx.grid as wxGrid
 
 from rtlsdr_scanner.constants import Display
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import format_precision
-from rtlsdr_scanner.plot_3d import Plotter3d
 from rtlsdr_scanner.plot_controls import MouseZoom, MouseSelect
 from rtlsdr_scanner.plot_line import Plotter
-from rtlsdr_scanner.plot_preview import PlotterPreview
 from rtlsdr_scanner.plot_spect import Spectrogram
 from rtlsdr_scanner.plot_status import PlotterStatus
 from rtlsdr_scanner.plot_time import PlotterTime
 from rtlsdr_scanner.spectrum import split_spectrum_sort, Measure, reduce_points
 from rtlsdr_scanner.toolbars import NavigationToolbar, NavigationToolbarCompare
-from rtlsdr_scanner.utils_mpl import find_artists
+from rtlsdr_scanner.utils_mpl import find_artists, set_plot_fonts
 from rtlsdr_scanner.utils_wx import close_modeless
 from rtlsdr_scanner.widgets import GridToolTips, CheckBoxCellRenderer
 
@@ -126,18 +126,6 @@ class PanelGraph(wx.Panel):
         self.timer = wx.Timer(self)
         self.Bind(wx.EVT_TIMER, self.__on_timer, self.timer)
   
-    def __set_fonts(self):
-        axes = self.plot.get_axes()
-        if axes is not None:
-            axes.xaxis.label.set_size('small')
-            axes.yaxis.label.set_size('small')
-            if self.settings.display == Display.SURFACE:
-                axes.zaxis.label.set_size('small')
-            axes.tick_params(axis='both', which='major', labelsize='small')
-        axes = self.plot.get_axes_bar()
-        if axes is not None:
-            axes.tick_params(axis='both', which='major', labelsize='small')
-
     def __enable_menu(self, state):
         for menu in self.menuClearSelect:
             menu.Enable(state)
@@ -146,7 +134,7 @@ class PanelGraph(wx.Panel):
         if self.settings.clickTune and matplotlib.__version__ >= '1.2' and event.dblclick:
             frequency = int(event.xdata * 1e6)
             self.remoteControl.tune(frequency)
-        elif isinstance(self.plot, PlotterPreview):
+        elif self.settings.display == Display.PREVIEW:
             self.plot.to_front()
 
     def __on_enter(self, _event):
@@ -260,7 +248,9 @@ class PanelGraph(wx.Panel):
     def __draw_canvas(self):
         try:
             self.isDrawing = True
+            timeStart = time.time()
             self.canvas.draw()
+            metrics.add_time('draw', time.time() - timeStart)
         except wx.PyDeadObjectError:
             pass
 
@@ -300,16 +290,18 @@ class PanelGraph(wx.Panel):
         elif self.settings.display == Display.SPECT:
             self.plot = Spectrogram(self.notify, self.figure, self.settings)
         elif self.settings.display == Display.SURFACE:
+            from rtlsdr_scanner.plot_3d import Plotter3d
             self.plot = Plotter3d(self.notify, self.figure, self.settings)
         elif self.settings.display == Display.STATUS:
             self.plot = PlotterStatus(self.notify, self.figure, self.settings)
         elif self.settings.display == Display.TIMELINE:
             self.plot = PlotterTime(self.notify, self.figure, self.settings)
         elif self.settings.display == Display.PREVIEW:
+            from rtlsdr_scanner.plot_preview import PlotterPreview
             self.plot = PlotterPreview(self.notify, self.figure, self.settings)
             self.plot.set_window(self)
 
-        self.__set_fonts()
+        set_plot_fonts(self.plot, self.settings.display)
 
         self.toolbar.set_plot(self.plot)
         self.toolbar.set_type(self.settings.display)
@@ -369,16 +361,19 @@ class PanelGraph(wx.Panel):
                 self.status.set_busy(False)
 
         else:
+            metrics.add_count('skipped')
             self.timer.Start(200, oneShot=True)
 
-    def set_plot_title(self):
+    def get_plot_title(self):
         if len(self.settings.devicesRtl) > 0:
             gain = self.settings.devicesRtl[self.settings.indexRtl].gain
         else:
             gain = 0
-        self.plot.set_title("Frequency Spectrogram\n{} - {} MHz,"
-                            " gain = {}dB".format(self.settings.start,
-                                                  self.settings.stop, gain))
+        return "Frequency Spectrogram\n{} - {} MHz," \
+            " gain = {}dB".format(self.settings.start, self.settings.stop, gain)
+
+    def set_plot_title(self):
+        self.plot.set_title(self.get_plot_title())
 
     def redraw_plot(self):
         if self.spectrum is not None:
@@ -37,6 +37,7 @@ from mpl_toolkits.mplot3d import Axes3D  # @UnresolvedImport @UnusedImport
 
 from rtlsdr_scanner.constants import PlotFunc
 from rtlsdr_scanner.events import post_event, EventThread, Event
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import format_time, format_precision
 from rtlsdr_scanner.spectrum import create_mesh, smooth_spectrum, Extent, diff_spectrum, \
     get_peaks
@@ -138,6 +139,8 @@ class Plotter3d(object):
                                      annotate)
         self.threadPlot.start()
 
+        return self.threadPlot
+
     def clear_plots(self):
         children = self.axes.get_children()
         for child in children:
@@ -181,6 +184,7 @@ class ThreadPlot(threading.Thread):
             self.parent.threadPlot = None
             return
 
+        timeStart = time.time()
         total = len(self.data)
         if total > 0:
             if self.settings.plotFunc == PlotFunc.NONE:
@@ -201,6 +205,7 @@ class ThreadPlot(threading.Thread):
             self.parent.scale_plot()
             self.parent.redraw_plot()
 
+        metrics.add_time('plot', time.time() - timeStart)
         self.parent.threadPlot = None
 
     def __plot(self, spectrum):
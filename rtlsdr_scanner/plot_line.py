@@ -25,6 +25,7 @@
 
 from collections import OrderedDict
 import threading
+import time
 
 from matplotlib import patheffects
 import matplotlib
@@ -40,6 +41,7 @@ import numpy
 
 from rtlsdr_scanner.constants import Markers, PlotFunc
 from rtlsdr_scanner.events import EventThread, Event, post_event
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import format_precision
 from rtlsdr_scanner.spectrum import Measure, Extent, smooth_spectrum, \
     diff_spectrum, delta_spectrum, get_peaks
@@ -438,6 +440,7 @@ class ThreadPlot(threading.Thread):
             self.parent.threadPlot = None
             return
 
+        timeStart = time.time()
         total = len(self.data)
         if total > 0:
             self.parent.clear_plots()
@@ -470,6 +473,7 @@ class ThreadPlot(threading.Thread):
             self.parent.scale_plot()
             self.parent.redraw_plot()
 
+        metrics.add_time('plot', time.time() - timeStart)
         self.parent.threadPlot = None
 
     def __plot_all(self, spectrum):
@@ -39,6 +39,7 @@ import numpy
 
 from rtlsdr_scanner.constants import Markers, PlotFunc
 from rtlsdr_scanner.events import EventThread, Event, post_event
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import format_time, format_precision
 from rtlsdr_scanner.spectrum import split_spectrum, Measure, smooth_spectrum, Extent, \
     diff_spectrum, get_peaks
@@ -263,6 +264,8 @@ class Spectrogram(object):
                                      annotate)
         self.threadPlot.start()
 
+        return self.threadPlot
+
     def clear_plots(self):
         children = self.axes.get_children()
         for child in children:
@@ -310,6 +313,7 @@ class ThreadPlot(threading.Thread):
             self.parent.threadPlot = None
             return
 
+        timeStart = time.time()
         total = len(self.data)
         if total > 0:
             if self.settings.plotFunc == PlotFunc.NONE:
@@ -328,6 +332,7 @@ class ThreadPlot(threading.Thread):
             self.parent.scale_plot()
             self.parent.redraw_plot()
 
+        metrics.add_time('plot', time.time() - timeStart)
         self.parent.threadPlot = None
 
     def __plot(self, spectrum):
@@ -23,11 +23,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import threading
+import time
 
 from matplotlib.font_manager import FontProperties
 from matplotlib.table import Table
 
 from rtlsdr_scanner.events import post_event, EventThread, Event
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.misc import format_time, format_precision
 from rtlsdr_scanner.utils_mpl import find_artists, set_table_colour
 
@@ -114,6 +116,7 @@ class ThreadPlot(threading.Thread):
         self.extent = extent
 
     def run(self):
+        timeStart = time.time()
         self.parent.clear_plots()
         if self.data is None:
             length, tMin, tMax, fMin, fMax, lMin, lMax, peakF, peakL, peakT = ('-',) * 10
@@ -177,6 +180,7 @@ class ThreadPlot(threading.Thread):
         self.axes.add_table(table)
         self.parent.redraw_plot()
 
+        metrics.add_time('plot', time.time() - timeStart)
         self.parent.threadPlot = None
 
 
@@ -28,6 +28,7 @@ import time
 from matplotlib.ticker import ScalarFormatter, AutoMinorLocator
 
 from rtlsdr_scanner.events import post_event, EventThread, Event
+from rtlsdr_scanner.metrics import metrics
 from rtlsdr_scanner.utils_mpl import utc_to_mpl, set_date_ticks
 
 
@@ -139,6 +140,7 @@ class ThreadPlot(threading.Thread):
             self.parent.threadPlot = None
             return
 
+        timeStart = time.time()
         total = len(self.data)
         if total > 0:
             self.parent.clear_plots()
@@ -152,6 +154,7 @@ class ThreadPlot(threading.Thread):
             self.parent.scale_plot()
             self.parent.redraw_plot()
 
+        metrics.add_time('plot', time.time() - timeStart)
         self.parent.threadPlot = None
 
 
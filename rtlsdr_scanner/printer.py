@@ -23,16 +23,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from PIL import Image
-import matplotlib
-from matplotlib.backends.backend_agg import FigureCanvasAgg
 import wx
 
 
 class PrintOut(wx.Printout):
-    def __init__(self, graph, filename, pageConfig):
+    def __init__(self, snapshot, filename, pageConfig):
         wx.Printout.__init__(self, title=filename)
-        self.figure = graph.get_figure()
+        self.snapshot = snapshot
+        self.cache = {}
         margins = (pageConfig.GetMarginTopLeft().Get()[0],
                    pageConfig.GetMarginTopLeft().Get()[1],
                    pageConfig.GetMarginBottomRight().Get()[0],
@@ -40,28 +38,15 @@ class PrintOut(wx.Printout):
         self.margins = [v / 25.4 for v in margins]
 
     def __draw_image(self, sizeInches, ppi):
-        oldSize = self.figure.get_size_inches()
-        oldDpi = self.figure.get_dpi()
-        self.figure.set_size_inches(sizeInches)
-        self.figure.set_dpi(ppi)
+        key = (sizeInches, ppi)
+        if key not in self.cache:
+            image = self.snapshot.render(sizeInches, ppi)
+            imageWx = wx.EmptyImage(image.size[0], image.size[1])
+            imageWx.SetData(image.tostring())
+            self.cache.clear()
+            self.cache[key] = imageWx
 
-        canvas = FigureCanvasAgg(self.figure)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        if matplotlib.__version__ >= '1.2':
-            buf = renderer.buffer_rgba()
-        else:
-            buf = renderer.buffer_rgba(0, 0)
-        size = canvas.get_width_height()
-        image = Image.frombuffer('RGBA', size, buf, 'raw', 'RGBA', 0, 1)
-
-        self.figure.set_size_inches(oldSize)
-        self.figure.set_dpi(oldDpi)
-
-        imageWx = wx.EmptyImage(image.size[0], image.size[1])
-        imageWx.SetData(image.convert('RGB').tostring())
-
-        return imageWx
+        return self.cache[key]
 
     def GetPageInfo(self):
         return 1, 1, 1, 1
@@ -0,0 +1,413 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from collections import OrderedDict
+import json
+import os
+import struct
+
+import numpy
+
+
+# Layout (little endian):
+#  header   'RFB1', version (H)
+#  chunks   type (4s), length (I), payload
+#           INFO  scan information (JSON)
+#           AXIS  axis id (I), frequencies (float64)
+#           SWEP  time (d), axis id (I), levels against the axis (float32,
+#                 NaN where the sweep has no point)
+#           LOCN  time (d), latitude, longitude, altitude (d, NaN if unknown)
+#           INDX  sweep, axis and location offsets, written on close
+#  trailer  'RFBI', offset of the INDX chunk (Q)
+# A file without a trailer (still being written or not closed) is indexed by
+# walking the chunk headers, so sweeps can be appended at any time.
+
+class Rfb(object):
+    MAGIC = 'RFB1'
+    VERSION = 1
+
+    INFO = 'INFO'
+    AXIS = 'AXIS'
+    SWEEP = 'SWEP'
+    LOCATION = 'LOCN'
+    INDEX = 'INDX'
+    TRAILER_MAGIC = 'RFBI'
+
+    HEADER = struct.Struct('<4sH')
+    CHUNK = struct.Struct('<4sI')
+    TRAILER = struct.Struct('<4sQ')
+    AXIS_HEADER = struct.Struct('<I')
+    SWEEP_HEADER = struct.Struct('<dI')
+    LOCATION_DATA = struct.Struct('<dddd')
+    INDEX_HEADER = struct.Struct('<III')
+    INDEX_SWEEP = struct.Struct('<dIQ')
+    INDEX_AXIS = struct.Struct('<IQ')
+    INDEX_LOCATION = struct.Struct('<dQ')
+
+    @staticmethod
+    def is_rfb(path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read(len(Rfb.MAGIC)) == Rfb.MAGIC
+        except IOError:
+            return False
+
+
+class RfbIndex(object):
+    def __init__(self):
+        self.info = None
+        self.sweeps = OrderedDict()
+        self.axes = OrderedDict()
+        self.locations = OrderedDict()
+        self.end = Rfb.HEADER.size
+
+    def load(self, handle):
+        handle.seek(0)
+        magic, version = Rfb.HEADER.unpack(self.__read(handle,
+                                                       Rfb.HEADER.size))
+        if magic != Rfb.MAGIC:
+            raise IOError('Not a binary scan file')
+        if version > Rfb.VERSION:
+            raise IOError('Unsupported file version {}'.format(version))
+
+        if not self.__load_trailer(handle):
+            self.__walk(handle)
+
+        if self.info is None:
+            raise IOError('Missing scan information')
+
+    def __read(self, handle, length):
+        data = handle.read(length)
+        if len(data) != length:
+            raise EOFError()
+        return data
+
+    def __load_trailer(self, handle):
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        if size < Rfb.HEADER.size + Rfb.TRAILER.size:
+            return False
+        handle.seek(size - Rfb.TRAILER.size)
+        magic, offset = Rfb.TRAILER.unpack(handle.read(Rfb.TRAILER.size))
+        if magic != Rfb.TRAILER_MAGIC or offset >= size:
+            return False
+
+        try:
+            handle.seek(offset)
+            kind, length = Rfb.CHUNK.unpack(self.__read(handle,
+                                                        Rfb.CHUNK.size))
+            if kind != Rfb.INDEX:
+                return False
+            payload = self.__read(handle, length)
+        except EOFError:
+            return False
+
+        sweeps, axes, locations = Rfb.INDEX_HEADER.unpack_from(payload)
+        pos = Rfb.INDEX_HEADER.size
+        for _i in xrange(sweeps):
+            timeStamp, axis, chunk = Rfb.INDEX_SWEEP.unpack_from(payload, pos)
+            self.sweeps[timeStamp] = (axis, chunk)
+            pos += Rfb.INDEX_SWEEP.size
+        for _i in xrange(axes):
+            axis, chunk = Rfb.INDEX_AXIS.unpack_from(payload, pos)
+            self.axes[axis] = chunk
+            pos += Rfb.INDEX_AXIS.size
+        for _i in xrange(locations):
+            timeStamp, chunk = Rfb.INDEX_LOCATION.unpack_from(payload, pos)
+            self.locations[timeStamp] = chunk
+            pos += Rfb.INDEX_LOCATION.size
+
+        self.info = self.__read_info(handle)
+        self.end = offset
+
+        return True
+
+    def __read_info(self, handle):
+        handle.seek(Rfb.HEADER.size)
+        kind, length = Rfb.CHUNK.unpack(self.__read(handle, Rfb.CHUNK.size))
+        if kind != Rfb.INFO:
+            raise IOError('Missing scan information')
+        try:
+            return json.loads(self.__read(handle, length))
+        except (ValueError, EOFError):
+            raise IOError('Corrupt scan information')
+
+    def __walk(self, handle):
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        offset = Rfb.HEADER.size
+        while offset + Rfb.CHUNK.size <= size:
+            handle.seek(offset)
+            kind, length = Rfb.CHUNK.unpack(handle.read(Rfb.CHUNK.size))
+            end = offset + Rfb.CHUNK.size + length
+            if end > size or kind == Rfb.INDEX:
+                break
+
+            if kind == Rfb.INFO:
+                try:
+                    self.info = json.loads(handle.read(length))
+                except ValueError:
+                    break
+            elif kind == Rfb.AXIS:
+                axis, = Rfb.AXIS_HEADER.unpack(handle.read(Rfb.AXIS_HEADER.size))
+                self.axes[axis] = offset
+            elif kind == Rfb.SWEEP:
+                timeStamp, axis = Rfb.SWEEP_HEADER.unpack(handle.read(Rfb.SWEEP_HEADER.size))
+                self.sweeps.pop(timeStamp, None)
+                self.sweeps[timeStamp] = (axis, offset)
+            elif kind == Rfb.LOCATION:
+                timeStamp = Rfb.LOCATION_DATA.unpack(handle.read(Rfb.LOCATION_DATA.size))[0]
+                self.locations[timeStamp] = offset
+
+            offset = end
+            self.end = end
+
+
+class RfbReader(object):
+    def __init__(self, path):
+        self.handle = open(path, 'rb')
+        self.index = RfbIndex()
+        try:
+            self.index.load(self.handle)
+        except (EOFError, struct.error):
+            self.handle.close()
+            raise IOError('Corrupt file')
+        except IOError:
+            self.handle.close()
+            raise
+        self.axes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, _value, _traceback):
+        self.close()
+
+    def __read_chunk(self, offset, kind):
+        self.handle.seek(offset)
+        header = self.handle.read(Rfb.CHUNK.size)
+        if len(header) != Rfb.CHUNK.size:
+            raise IOError('Truncated chunk')
+        chunkKind, length = Rfb.CHUNK.unpack(header)
+        if chunkKind != kind:
+            raise IOError('Corrupt index')
+        data = self.handle.read(length)
+        if len(data) != length:
+            raise IOError('Truncated chunk')
+        return data
+
+    def __get_axis(self, axis):
+        if axis not in self.axes:
+            data = self.__read_chunk(self.index.axes[axis], Rfb.AXIS)
+            self.axes[axis] = numpy.fromstring(data[Rfb.AXIS_HEADER.size:],
+                                               '<f8')
+        return self.axes[axis]
+
+    def get_info(self):
+        return self.index.info
+
+    def get_times(self):
+        return sorted(self.index.sweeps)
+
+    def get_levels(self, timeStamp):
+        axis, offset = self.index.sweeps[timeStamp]
+        data = self.__read_chunk(offset, Rfb.SWEEP)
+        levels = numpy.fromstring(data[Rfb.SWEEP_HEADER.size:], '<f4')
+
+        return self.__get_axis(axis), levels
+
+    def get_sweep(self, timeStamp):
+        freqs, levels = self.get_levels(timeStamp)
+        valid = ~numpy.isnan(levels)
+
+        return OrderedDict(zip(freqs[valid].tolist(),
+                               levels[valid].astype(numpy.float64).tolist()))
+
+    def get_spectrum(self, start=None, end=None):
+        spectrum = OrderedDict()
+        for timeStamp in self.get_times():
+            if start is not None and timeStamp < start:
+                continue
+            if end is not None and timeStamp > end:
+                continue
+            spectrum[timeStamp] = self.get_sweep(timeStamp)
+
+        return spectrum
+
+    def get_locations(self):
+        locations = OrderedDict()
+        for timeStamp in sorted(self.index.locations):
+            data = self.__read_chunk(self.index.locations[timeStamp],
+                                     Rfb.LOCATION)
+            _time, lat, lon, alt = Rfb.LOCATION_DATA.unpack(data)
+            if numpy.isnan(alt):
+                alt = None
+            locations[timeStamp] = [lat, lon, alt]
+
+        return locations
+
+    def close(self):
+        self.handle.close()
+
+
+class RfbWriter(object):
+    def __init__(self, path, info=None, append=False):
+        self.axis = None
+        self.axisId = -1
+        self.sweeps = OrderedDict()
+        self.axes = OrderedDict()
+        self.locations = OrderedDict()
+
+        if append and os.path.exists(path):
+            self.handle = open(path, 'r+b')
+            index = RfbIndex()
+            try:
+                index.load(self.handle)
+            except (EOFError, struct.error):
+                self.handle.close()
+                raise IOError('Corrupt file')
+            except IOError:
+                self.handle.close()
+                raise
+            self.sweeps = index.sweeps
+            self.axes = index.axes
+            self.locations = index.locations
+            if len(self.axes):
+                self.axisId = max(self.axes)
+                self.axis = self.__read_axis(self.axes[self.axisId])
+            self.handle.seek(index.end)
+            self.handle.truncate()
+        else:
+            if info is None:
+                raise ValueError('Scan information required')
+            self.handle = open(path, 'wb')
+            self.handle.write(Rfb.HEADER.pack(Rfb.MAGIC, Rfb.VERSION))
+            self.__write_chunk(Rfb.INFO, json.dumps(info))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, _value, _traceback):
+        self.close()
+
+    def __read_axis(self, offset):
+        self.handle.seek(offset)
+        _kind, length = Rfb.CHUNK.unpack(self.handle.read(Rfb.CHUNK.size))
+        data = self.handle.read(length)
+        return numpy.fromstring(data[Rfb.AXIS_HEADER.size:], '<f8')
+
+    def __write_chunk(self, kind, payload):
+        offset = self.handle.tell()
+        self.handle.write(Rfb.CHUNK.pack(kind, len(payload)))
+        self.handle.write(payload)
+
+        return offset
+
+    def __get_levels(self, freqs, levels):
+        if self.axis is not None:
+            if len(freqs) == len(self.axis) and \
+                    numpy.array_equal(freqs, self.axis):
+                return levels
+            indices = numpy.searchsorted(self.axis, freqs)
+            if len(freqs) and indices[-1] < len(self.axis) and \
+                    numpy.array_equal(self.axis[indices], freqs):
+                fitted = numpy.empty(len(self.axis), numpy.float32)
+                fitted.fill(numpy.nan)
+                fitted[indices] = levels
+                return fitted
+
+        self.axisId += 1
+        self.axis = freqs
+        offset = self.__write_chunk(Rfb.AXIS,
+                                    Rfb.AXIS_HEADER.pack(self.axisId) +
+                                    freqs.astype('<f8').tostring())
+        self.axes[self.axisId] = offset
+
+        return levels
+
+    def add_sweep(self, timeStamp, sweep):
+        if not len(sweep):
+            return
+
+        freqs = numpy.fromiter(sweep.iterkeys(), numpy.float64, len(sweep))
+        levels = numpy.fromiter(sweep.itervalues(), numpy.float32, len(sweep))
+        if len(freqs) > 1 and numpy.any(numpy.diff(freqs) <= 0):
+            order = numpy.argsort(freqs)
+            freqs = freqs[order]
+            levels = levels[order]
+
+        levels = self.__get_levels(freqs, levels)
+        offset = self.__write_chunk(Rfb.SWEEP,
+                                    Rfb.SWEEP_HEADER.pack(timeStamp,
+                                                          self.axisId) +
+                                    levels.astype('<f4').tostring())
+        self.sweeps.pop(timeStamp, None)
+        self.sweeps[timeStamp] = (self.axisId, offset)
+
+    def add_spectrum(self, spectrum):
+        for timeStamp, sweep in spectrum.iteritems():
+            self.add_sweep(timeStamp, sweep)
+
+    def add_location(self, timeStamp, location):
+        lat, lon, alt = location[0], location[1], location[2]
+        if alt is None:
+            alt = numpy.nan
+        offset = self.__write_chunk(Rfb.LOCATION,
+                                    Rfb.LOCATION_DATA.pack(timeStamp, lat,
+                                                           lon, alt))
+        self.locations[timeStamp] = offset
+
+    def add_locations(self, locations):
+        for timeStamp, location in locations.iteritems():
+            self.add_location(timeStamp, location)
+
+    def flush(self):
+        self.handle.flush()
+
+    def sync(self):
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+
+    def close(self):
+        if self.handle.closed:
+            return
+
+        payload = [Rfb.INDEX_HEADER.pack(len(self.sweeps), len(self.axes),
+                                         len(self.locations))]
+        for timeStamp, (axis, offset) in self.sweeps.iteritems():
+            payload.append(Rfb.INDEX_SWEEP.pack(timeStamp, axis, offset))
+        for axis, offset in self.axes.iteritems():
+            payload.append(Rfb.INDEX_AXIS.pack(axis, offset))
+        for timeStamp, offset in self.locations.iteritems():
+            payload.append(Rfb.INDEX_LOCATION.pack(timeStamp, offset))
+
+        offset = self.__write_chunk(Rfb.INDEX, ''.join(payload))
+        self.handle.write(Rfb.TRAILER.pack(Rfb.TRAILER_MAGIC, offset))
+        self.handle.close()
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
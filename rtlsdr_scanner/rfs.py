@@ -0,0 +1,199 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from collections import OrderedDict
+import json
+
+import numpy
+
+
+# JSON scan files:
+#  ["RTLSDR Scanner", {"Version": 9, ..., "Spectrum": {...}, "Location": {...}}]
+# Both are streamed: members are decoded one at a time and each sweep is
+# converted to sorted points as soon as it is read, sweeps are written one
+# at a time, so the whole text is never held in memory.
+
+class RfsReader(object):
+    CHUNK = 65536
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder(object_pairs_hook=self.__pairs)
+
+    @staticmethod
+    def __pairs(pairs):
+        return pairs
+
+    @staticmethod
+    def __to_points(pairs):
+        freqs = numpy.array([float(f) for f, _p in pairs])
+        levels = numpy.array([p for _f, p in pairs], dtype=numpy.float64)
+        order = numpy.argsort(freqs, kind='mergesort')
+
+        return OrderedDict(zip(freqs[order].tolist(),
+                               levels[order].tolist()))
+
+    def __fill(self, size=CHUNK):
+        if self.eof:
+            return False
+        data = self.handle.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+
+        return True
+
+    def __peek(self):
+        while True:
+            while self.pos < len(self.buffer):
+                char = self.buffer[self.pos]
+                if char not in ' \t\r\n':
+                    return char
+                self.pos += 1
+            if not self.__fill():
+                raise ValueError('Unexpected end of file')
+
+    def __expect(self, chars):
+        char = self.__peek()
+        if char not in chars:
+            raise ValueError('Expected {} at {}'.format(chars, self.pos))
+        self.pos += 1
+
+        return char
+
+    def __value(self):
+        self.__peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may be incomplete
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self.__fill(max(self.CHUNK, len(self.buffer) - self.pos))
+
+    def __members(self):
+        self.__expect('{')
+        if self.__peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.__value()
+            self.__expect(':')
+            yield key
+            if self.__expect(',}') == '}':
+                return
+
+    def __spectrum(self):
+        spectrum = {}
+        legacy = []
+        for key in self.__members():
+            if self.__peek() == '{':
+                spectrum[float(key)] = self.__to_points(self.__value())
+            else:
+                legacy.append((key, self.__value()))
+        if legacy:
+            spectrum[1] = self.__to_points(legacy)
+
+        return OrderedDict(sorted(spectrum.iteritems()))
+
+    def __location(self):
+        location = {}
+        for key in self.__members():
+            location[float(key)] = self.__value()
+
+        return OrderedDict(sorted(location.iteritems()))
+
+    def read(self):
+        self.__expect('[')
+        header = self.__value()
+        self.__expect(',')
+        data = {}
+        for key in self.__members():
+            if key == 'Spectrum':
+                data[key] = self.__spectrum()
+            elif key == 'Location':
+                data[key] = self.__location()
+            else:
+                data[key] = self.__value()
+        self.__expect(']')
+
+        return header, data
+
+
+class RfsWriter(object):
+    def __init__(self, path, header, info):
+        self.sweeps = 0
+        self.location = '{}'
+
+        self.handle = open(path, 'wb')
+        self.handle.write('[{},{{'.format(self.__dumps(header)))
+        for key, value in info.iteritems():
+            self.handle.write('{}:{},'.format(self.__dumps(key),
+                                              self.__dumps(value)))
+        self.handle.write('"Spectrum":{')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, _value, _traceback):
+        self.close()
+
+    @staticmethod
+    def __dumps(value):
+        return json.dumps(value, separators=(',', ':'))
+
+    def add_sweep(self, timeStamp, sweep):
+        if self.sweeps:
+            self.handle.write(',')
+        self.handle.write('{}:{}'.format(self.__dumps(repr(timeStamp)),
+                                         self.__dumps(sweep)))
+        self.sweeps += 1
+
+    def add_spectrum(self, spectrum):
+        for timeStamp, sweep in spectrum.iteritems():
+            self.add_sweep(timeStamp, sweep)
+
+    def add_locations(self, locations):
+        self.location = self.__dumps(locations)
+
+    def close(self):
+        if self.handle.closed:
+            return
+        self.handle.write('}},"Location":{}}}]'.format(self.location))
+        self.handle.close()
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
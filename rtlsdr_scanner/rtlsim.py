@@ -0,0 +1,165 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import math
+import time
+
+import numpy
+
+from rtlsdr_scanner.metrics import metrics
+
+
+# Scenario file (JSON), all keys optional:
+# {
+#     "seed": 0,
+#     "tuner": 5,
+#     "gains": [0.0, 0.9, ...],
+#     "noise": -60,                    noise floor (dBFS)
+#     "settle": 0.0,                   tuner settle delay (s)
+#     "latency": 0.0,                  delay per read (s)
+#     "realtime": false,               read at the sample rate
+#     "quantise": true,                8 bit samples like a dongle
+#     "tones": [{"freq": 100.1, "level": -20}],
+#     "carriers": [{"freq": 433.92, "level": -30, "modulation": "fm",
+#                   "deviation": 0.005, "rate": 0.001}]
+# }
+# Frequencies are in MHz, levels in dBFS at 0dB gain.
+
+class RtlSim(object):
+    GAINS = [0.0, 0.9, 1.4, 2.7, 3.7, 7.7, 8.7, 12.5, 14.4, 15.7, 16.6,
+             19.7, 20.7, 22.9, 25.4, 28.0, 29.7, 32.8, 33.8, 36.4, 37.2,
+             38.6, 40.2, 42.1, 43.4, 43.9, 44.5, 48.0, 49.6]
+    MODULATION = ['none', 'am', 'fm']
+
+    def __init__(self, scenario):
+        self.rate = 0
+        self.freq = 0
+        self.gain = 0
+        self.sampleTime = 0.
+
+        if isinstance(scenario, dict):
+            self.scenario = scenario
+        else:
+            try:
+                with open(scenario, 'rb') as f:
+                    self.scenario = json.load(f)
+            except ValueError as error:
+                raise IOError('Invalid scenario: {}'.format(error))
+
+        self.tuner = self.scenario.get('tuner', 5)
+        self.gains = self.scenario.get('gains', self.GAINS)
+        self.noise = math.pow(10, self.scenario.get('noise', -60) / 10.)
+        self.settle = self.scenario.get('settle', 0.)
+        self.latency = self.scenario.get('latency', 0.)
+        self.realtime = self.scenario.get('realtime', False)
+        self.quantise = self.scenario.get('quantise', True)
+        self.random = numpy.random.RandomState(self.scenario.get('seed', 0))
+
+        self.signals = []
+        for tone in self.scenario.get('tones', []):
+            self.signals.append((tone['freq'] * 1e6, tone.get('level', -20),
+                                 'none', 0, 0))
+        for carrier in self.scenario.get('carriers', []):
+            modulation = carrier.get('modulation', 'am')
+            if modulation not in self.MODULATION:
+                raise IOError('Unknown modulation: {}'.format(modulation))
+            self.signals.append((carrier['freq'] * 1e6,
+                                 carrier.get('level', -30),
+                                 modulation,
+                                 carrier.get('deviation', 0.005) * 1e6,
+                                 carrier.get('rate', 0.001) * 1e6))
+
+    def __generate(self, samples):
+        t = self.sampleTime + numpy.arange(samples) / float(self.rate)
+        scale = math.pow(10, self.gain / 20.)
+
+        iq = numpy.sqrt(self.noise / 2.) * \
+            (self.random.standard_normal(samples) +
+             1j * self.random.standard_normal(samples))
+
+        for freq, level, modulation, deviation, rate in self.signals:
+            offset = freq - self.freq
+            if abs(offset) > self.rate / 2.:
+                continue
+            amplitude = math.pow(10, level / 20.)
+            phase = 2 * numpy.pi * offset * t
+            if modulation == 'am':
+                amplitude = amplitude * (1 + 0.5 * numpy.sin(2 * numpy.pi *
+                                                             rate * t))
+            elif modulation == 'fm':
+                phase += (deviation / rate) * numpy.sin(2 * numpy.pi *
+                                                        rate * t)
+            iq += amplitude * numpy.exp(1j * phase)
+
+        iq *= scale
+        if self.quantise:
+            iq.real = numpy.round(numpy.clip(iq.real, -1, 1) * 127.5) / 127.5
+            iq.imag = numpy.round(numpy.clip(iq.imag, -1, 1) * 127.5) / 127.5
+
+        self.sampleTime += samples / float(self.rate)
+
+        return iq
+
+    def set_sample_rate(self, rate):
+        self.rate = rate
+
+    def set_manual_gain_enabled(self, _mode):
+        pass
+
+    def set_gain(self, gain):
+        self.gain = gain
+
+    def set_center_freq(self, freq):
+        self.freq = freq
+        if self.settle:
+            time.sleep(self.settle)
+            metrics.add_time('settle', self.settle)
+
+    def get_tuner_type(self):
+        return self.tuner
+
+    def get_gains(self):
+        return self.gains
+
+    def read_samples(self, samples):
+        timeStart = time.time()
+        iq = self.__generate(samples)
+        delay = self.latency
+        if self.realtime:
+            delay += samples / float(self.rate)
+        delay -= time.time() - timeStart
+        if delay > 0:
+            time.sleep(delay)
+
+        return iq
+
+    def close(self):
+        pass
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
@@ -27,10 +27,12 @@ import array
 import socket
 import struct
 import threading
+import time
 
 import numpy
 
 from rtlsdr_scanner.events import post_event, EventThread, Event
+from rtlsdr_scanner.metrics import metrics
 
 
 class RtlTcpCmd(object):
@@ -95,7 +97,9 @@ class RtlTcp(object):
 
     def set_center_freq(self, freq):
         self.__send_command(RtlTcpCmd.SET_FREQ, freq)
+        timeStart = time.time()
         self.__read_raw(int(self.rate * 2 * 0.1))
+        metrics.add_time('settle', time.time() - timeStart)
 
     def get_tuner_type(self):
         return self.tuner
@@ -139,6 +143,7 @@ class ThreadBuffer(threading.Thread):
                 else:
                     self.__skip_stream()
         except socket.error as error:
+            self.buffer = bytearray()
             post_event(self.notify, EventThread(Event.ERROR, 0, error))
         finally:
             self.socket.close()
@@ -146,7 +151,7 @@ class ThreadBuffer(threading.Thread):
 
     def __do_wait(self):
         self.condition.acquire()
-        while not self.done:
+        while not self.done and self.isAlive():
             self.condition.wait(2)
         self.done = False
         self.condition.release()
@@ -0,0 +1,178 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import SocketServer
+import socket
+import struct
+import threading
+import time
+
+import numpy
+
+from rtlsdr_scanner.constants import SAMPLE_RATE
+from rtlsdr_scanner.rtlsim import RtlSim
+from rtlsdr_scanner.rtltcp import RtlTcpCmd
+
+
+class RtlTcpEmulator(object):
+    HEADER = struct.Struct('>4sII')
+    COMMAND = struct.Struct('>Bl')
+    CHUNK = 16384
+
+    def __init__(self, port, scenario=None, latency=0, bandwidth=None,
+                 stall=None, disconnect=None):
+        if scenario is None:
+            scenario = {}
+        self.scenario = scenario
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.stall = stall
+        self.disconnect = disconnect
+
+        self.server = RtlTcpServer(('', port), RtlTcpHandler)
+        self.server.emulator = self
+
+        print 'Emulating rtl_tcp on port {}'.format(port)
+
+    def serve(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+
+class RtlTcpServer(SocketServer.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class RtlTcpHandler(SocketServer.BaseRequestHandler):
+    def setup(self):
+        self.emulator = self.server.emulator
+        self.lock = threading.Lock()
+        self.commands = []
+        self.cancel = False
+        self.sent = 0
+        self.retunes = 0
+
+    def handle(self):
+        emulator = self.emulator
+        sdr = RtlSim(emulator.scenario)
+        sdr.set_sample_rate(SAMPLE_RATE)
+
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.request.sendall(RtlTcpEmulator.HEADER.pack('RTL0',
+                                                         sdr.get_tuner_type(),
+                                                         len(sdr.get_gains())))
+        thread = threading.Thread(target=self.__read_commands,
+                                  name='Commands')
+        thread.daemon = True
+        thread.start()
+
+        timeStart = time.time()
+        timeSend = timeStart
+        try:
+            while not self.cancel:
+                self.__apply_commands(sdr)
+                elapsed = time.time() - timeStart
+                if emulator.disconnect is not None and \
+                        elapsed >= emulator.disconnect:
+                    break
+                if emulator.stall is not None:
+                    after, duration = emulator.stall
+                    if after <= elapsed < after + duration:
+                        time.sleep(0.05)
+                        timeSend = time.time()
+                        continue
+
+                raw = self.__to_raw(sdr.read_samples(RtlTcpEmulator.CHUNK / 2))
+                rate = sdr.rate * 2
+                if emulator.bandwidth is not None:
+                    rate = min(rate, emulator.bandwidth)
+                timeSend += len(raw) / float(rate)
+                delay = timeSend - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                self.request.sendall(raw)
+                self.sent += len(raw)
+        except socket.error:
+            pass
+        finally:
+            self.cancel = True
+            elapsed = max(time.time() - timeStart, 1e-3)
+            print '{}: {:.1f}s, {:.0f}kB/s, {} retunes'.format(self.client_address[0],
+                                                              elapsed,
+                                                              self.sent / elapsed / 1e3,
+                                                              self.retunes)
+
+    def __to_raw(self, iq):
+        raw = numpy.empty(len(iq) * 2, numpy.uint8)
+        raw[::2] = numpy.clip(numpy.round(iq.real * 127.5 + 127.5), 0, 255)
+        raw[1::2] = numpy.clip(numpy.round(iq.imag * 127.5 + 127.5), 0, 255)
+
+        return raw.tostring()
+
+    def __read_commands(self):
+        size = RtlTcpEmulator.COMMAND.size
+        data = ''
+        try:
+            while not self.cancel:
+                recv = self.request.recv(size - len(data))
+                if not len(recv):
+                    break
+                data += recv
+                if len(data) == size:
+                    command, value = RtlTcpEmulator.COMMAND.unpack(data)
+                    with self.lock:
+                        self.commands.append((time.time() +
+                                              self.emulator.latency,
+                                              command, value))
+                    data = ''
+        except socket.error:
+            pass
+        finally:
+            self.cancel = True
+
+    def __apply_commands(self, sdr):
+        now = time.time()
+        with self.lock:
+            due = [command for command in self.commands if command[0] <= now]
+            self.commands = self.commands[len(due):]
+
+        for _time, command, value in due:
+            if command == RtlTcpCmd.SET_FREQ:
+                sdr.set_center_freq(value)
+                self.retunes += 1
+            elif command == RtlTcpCmd.SET_SAMPLE_RATE:
+                sdr.set_sample_rate(value)
+            elif command == RtlTcpCmd.SET_GAIN_MODE:
+                sdr.set_manual_gain_enabled(value)
+            elif command == RtlTcpCmd.SET_GAIN:
+                sdr.set_gain(value / 10.)
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
@@ -23,6 +23,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import Queue
 from collections import OrderedDict
 import itertools
 import math
@@ -30,10 +31,14 @@ import threading
 import time
 
 import matplotlib
+import numpy
 import rtlsdr
 
 from rtlsdr_scanner.constants import SAMPLE_RATE, BANDWIDTH, WINFUNC
+from rtlsdr_scanner.devices import DeviceRTL
 from rtlsdr_scanner.events import EventThread, Event, post_event
+from rtlsdr_scanner.metrics import metrics
+from rtlsdr_scanner.rtlsim import RtlSim
 from rtlsdr_scanner.rtltcp import RtlTcp
 
 
@@ -48,13 +53,17 @@ class ThreadScan(threading.Thread):
         self.fstop = settings.stop * 1e6
         self.samples = int(samples)
         self.isCal = isCal
-        self.indexRtl = settings.indexRtl
+        self.device = device
+        self.indexRtl = settings.devicesRtl[device].indexRtl
         self.isDevice = settings.devicesRtl[device].isDevice
+        self.type = settings.devicesRtl[device].type
+        self.scenario = settings.devicesRtl[device].scenario
         self.server = settings.devicesRtl[device].server
         self.port = settings.devicesRtl[device].port
         self.gain = settings.devicesRtl[device].gain
         self.lo = settings.devicesRtl[device].lo * 1e6
         self.offset = settings.devicesRtl[device].offset
+        self.gains = None
         self.cancel = False
 
         post_event(self.notify, EventThread(Event.STARTING))
@@ -84,9 +93,19 @@ class ThreadScan(threading.Thread):
                 self.sdr.set_sample_rate(SAMPLE_RATE)
                 self.sdr.set_gain(self.gain)
                 tuner = self.sdr.get_tuner_type()
+                self.gains = self.sdr.valid_gains_db
             except IOError as error:
                 post_event(self.notify, EventThread(Event.ERROR,
                                                     0, error.message))
+        elif self.type == DeviceRTL.SIM:
+            try:
+                self.sdr = RtlSim(self.scenario)
+                self.sdr.set_sample_rate(SAMPLE_RATE)
+                self.sdr.set_gain(self.gain)
+                tuner = self.sdr.get_tuner_type()
+            except IOError as error:
+                post_event(self.notify, EventThread(Event.ERROR,
+                                                    0, str(error)))
         else:
             try:
                 self.sdr = RtlTcp(self.server, self.port, self.notify)
@@ -103,7 +122,7 @@ class ThreadScan(threading.Thread):
         tuner = self.__rtl_setup()
         if self.sdr is None:
             return
-        post_event(self.notify, EventThread(Event.INFO, None, tuner))
+        post_event(self.notify, EventThread(Event.INFO, self.gains, tuner))
 
         freq = self.__f_start()
         timeStamp = math.floor(time.time())
@@ -115,7 +134,8 @@ class ThreadScan(threading.Thread):
             try:
                 scan = self.rtl_scan(freq)
                 if len(scan):
-                    self.queue.put([freq, (timeStamp, scan)])
+                    self.queue.put([freq, (timeStamp, scan), self.device])
+                    metrics.set_level('queue', self.queue.qsize())
                     post_event(self.notify, EventThread(Event.DATA))
                 else:
                     post_event(self.notify, EventThread(Event.ERROR, 0,
@@ -143,8 +163,15 @@ class ThreadScan(threading.Thread):
         self.cancel = True
 
     def rtl_scan(self, freq):
+        timeStart = time.time()
         self.sdr.set_center_freq(freq + self.lo)
+        timeTune = time.time()
         capture = self.sdr.read_samples(self.samples)
+        metrics.add_time('tune', timeTune - timeStart)
+        metrics.add_time('capture', time.time() - timeTune)
+        metrics.add_count('steps')
+        if len(capture) < self.samples:
+            metrics.add_count('dropped')
 
         return capture
 
@@ -155,8 +182,419 @@ class ThreadScan(threading.Thread):
         return self.sdr
 
 
+class SdrMulti(object):
+    def __init__(self):
+        self.sdrs = OrderedDict()
+
+    def close(self):
+        for sdr in self.sdrs.itervalues():
+            sdr.close()
+        self.sdrs.clear()
+
+
+class NodeStats(object):
+    SMOOTHING = 0.3
+
+    def __init__(self):
+        self.steps = 0
+        self.duplicates = 0
+        self.requeued = 0
+        self.failed = False
+        self.elapsed = 0.
+        self.stepTime = None
+
+    def add(self, elapsed, duplicate=False):
+        self.steps += 1
+        self.elapsed += elapsed
+        if duplicate:
+            self.duplicates += 1
+        if self.stepTime is None:
+            self.stepTime = elapsed
+        else:
+            self.stepTime += (elapsed - self.stepTime) * self.SMOOTHING
+
+    def get_rate(self):
+        if not self.elapsed:
+            return 0.
+        return self.steps / self.elapsed
+
+
+class ThreadScanMulti(threading.Thread):
+    STALL_MIN = 5.
+    STALL_FACTOR = 4.
+    POLL = 0.25
+
+    def __init__(self, notify, queue, sdr, settings, devices, samples, isCal):
+        threading.Thread.__init__(self)
+        self.name = 'Scan'
+        self.notify = notify
+        self.queue = queue
+        if isinstance(sdr, SdrMulti):
+            self.sdr = sdr
+        else:
+            self.sdr = SdrMulti()
+        self.fstart = settings.start * 1e6
+        self.fstop = settings.stop * 1e6
+        self.samples = int(samples)
+        self.isCal = isCal
+        self.devices = devices
+        self.devicesRtl = settings.devicesRtl
+        self.offset = max([self.devicesRtl[device].offset
+                           for device in devices])
+        self.condition = threading.Condition()
+        self.pending = []
+        self.active = OrderedDict()
+        self.done = set()
+        self.stalled = set()
+        self.abandoned = set()
+        self.exited = set()
+        self.stats = OrderedDict([(device, NodeStats())
+                                  for device in devices])
+        self.error = None
+        self.cancel = False
+
+        post_event(self.notify, EventThread(Event.STARTING))
+        freq = self.__f_start()
+        while freq <= self.__f_stop():
+            self.pending.append(freq)
+            freq += self.__f_step()
+        post_event(self.notify, EventThread(Event.STEPS,
+                                            len(self.pending) - 1))
+        self.start()
+
+    def __f_start(self):
+        return self.fstart - self.offset - BANDWIDTH
+
+    def __f_stop(self):
+        return self.fstop + self.offset + BANDWIDTH * 2
+
+    def __f_step(self):
+        return BANDWIDTH / 2
+
+    def __rtl_open(self, device):
+        deviceRtl = self.devicesRtl[device]
+        if deviceRtl.isDevice:
+            sdr = rtlsdr.RtlSdr(deviceRtl.indexRtl)
+        elif deviceRtl.type == DeviceRTL.SIM:
+            sdr = RtlSim(deviceRtl.scenario)
+        else:
+            sdr = RtlTcp(deviceRtl.server, deviceRtl.port, Queue.Queue())
+        sdr.set_sample_rate(SAMPLE_RATE)
+        sdr.set_gain(deviceRtl.gain)
+
+        return sdr
+
+    def __rtl_setup(self):
+        tuner = 0
+        error = None
+
+        for device in self.devices:
+            if device in self.sdr.sdrs:
+                continue
+            try:
+                self.sdr.sdrs[device] = self.__rtl_open(device)
+            except IOError as error:
+                self.__warn(device, error)
+                self.stats[device].failed = True
+
+        if not len(self.sdr.sdrs):
+            post_event(self.notify, EventThread(Event.ERROR,
+                                                0, str(error)))
+            return None
+
+        with self.condition:
+            sdr = self.sdr.sdrs.values()[0]
+
+        return sdr.get_tuner_type()
+
+    def __warn(self, device, error):
+        name = self.devicesRtl[device].get_desc()
+        post_event(self.notify, EventThread(Event.SCAN_WARN, device,
+                                            '{}: {}'.format(name, error)))
+
+    def __stall_time(self, device):
+        stepTime = self.stats[device].stepTime
+        if stepTime is None:
+            return self.STALL_MIN
+        return max(self.STALL_MIN, stepTime * self.STALL_FACTOR)
+
+    def __speculate(self, device):
+        stepTime = self.stats[device].stepTime
+        if stepTime is None:
+            return None
+
+        now = time.time()
+        selected = None
+        latest = now + stepTime
+        for freq, runners in self.active.iteritems():
+            if len(runners) > 1 or runners[0][0] == device:
+                continue
+            other, timeStart = runners[0]
+            otherTime = self.stats[other].stepTime
+            if otherTime is None:
+                continue
+            finish = timeStart + otherTime
+            if finish > latest:
+                selected, latest = freq, finish
+
+        return selected
+
+    def __next_step(self, device):
+        with self.condition:
+            while not self.cancel:
+                freq = None
+                if len(self.pending):
+                    freq = self.pending.pop(0)
+                elif not len(self.active):
+                    return None
+                else:
+                    freq = self.__speculate(device)
+
+                if freq is not None:
+                    runners = self.active.setdefault(freq, [])
+                    runners.append((device, time.time()))
+                    return freq
+
+                self.condition.wait(self.POLL)
+
+        return None
+
+    def __step_done(self, device, freq, elapsed, timeStamp, scan):
+        with self.condition:
+            self.stalled.discard(device)
+            duplicate = freq in self.done
+            self.stats[device].add(elapsed, duplicate)
+            self.active.pop(freq, None)
+            if duplicate:
+                return
+            self.done.add(freq)
+            self.condition.notify_all()
+
+        self.queue.put([freq, (timeStamp, scan), device])
+        metrics.set_level('queue', self.queue.qsize())
+        post_event(self.notify, EventThread(Event.DATA))
+
+    def __step_failed(self, device, freq, error):
+        with self.condition:
+            self.stats[device].failed = True
+            self.stalled.discard(device)
+            runners = self.active.get(freq, [])
+            runners = [runner for runner in runners if runner[0] != device]
+            if len(runners):
+                self.active[freq] = runners
+            else:
+                self.active.pop(freq, None)
+                if freq not in self.done and freq not in self.pending:
+                    self.pending.insert(0, freq)
+                    self.stats[device].requeued += 1
+            self.sdr.sdrs.pop(device, None)
+            self.abandoned.add(device)
+            self.condition.notify_all()
+
+        self.__warn(device, error)
+
+    @staticmethod
+    def __close(sdr):
+        if sdr is not None:
+            try:
+                sdr.close()
+            except (IOError, OSError):
+                pass
+
+    def __check_stalls(self):
+        now = time.time()
+        with self.condition:
+            for freq, runners in self.active.items():
+                if freq in self.pending:
+                    continue
+                stalled = [device for device, timeStart in runners
+                           if now - timeStart > self.__stall_time(device)]
+                if len(stalled) != len(runners):
+                    continue
+                for device in stalled:
+                    if device not in self.stalled:
+                        self.stalled.add(device)
+                        self.stats[device].requeued += 1
+                        self.__warn(device, 'stalled, step requeued')
+                self.pending.insert(0, freq)
+            self.condition.notify_all()
+
+    def __scan(self, device, timeStamp):
+        with self.condition:
+            sdr = self.sdr.sdrs[device]
+        try:
+            self.__scan_steps(device, sdr, timeStamp)
+        finally:
+            with self.condition:
+                self.exited.add(device)
+                abandoned = device in self.abandoned
+            if abandoned:
+                self.__close(sdr)
+
+    def __scan_steps(self, device, sdr, timeStamp):
+        lo = self.devicesRtl[device].lo * 1e6
+
+        while True:
+            freq = self.__next_step(device)
+            if freq is None:
+                return
+
+            timeStart = time.time()
+            try:
+                sdr.set_center_freq(freq + lo)
+                timeTune = time.time()
+                scan = sdr.read_samples(self.samples)
+            except (AttributeError, MemoryError, TypeError,
+                    IOError, OSError) as error:
+                metrics.add_count('dropped')
+                self.__step_failed(device, freq, error)
+                return
+            metrics.add_time('tune', timeTune - timeStart)
+            metrics.add_time('capture', time.time() - timeTune)
+            metrics.add_count('steps')
+
+            if len(scan) < self.samples:
+                metrics.add_count('dropped')
+                self.__step_failed(device, freq, 'No samples returned')
+                return
+            self.__step_done(device, freq, time.time() - timeStart,
+                             timeStamp, scan)
+
+    def __is_running(self, threads):
+        with self.condition:
+            if self.cancel:
+                return False
+            if not len(self.pending) and not len(self.active):
+                return False
+            for device, thread in threads.iteritems():
+                if thread.isAlive() and device not in self.stalled:
+                    return True
+            return False
+
+    def run(self):
+        tuner = self.__rtl_setup()
+        if tuner is None:
+            return
+        post_event(self.notify, EventThread(Event.INFO, None, tuner))
+
+        timeStamp = math.floor(time.time())
+        threads = OrderedDict()
+        with self.condition:
+            devices = self.sdr.sdrs.keys()
+        for device in devices:
+            thread = threading.Thread(target=self.__scan,
+                                      args=(device, timeStamp),
+                                      name='Scan {}'.format(device))
+            thread.daemon = True
+            thread.start()
+            threads[device] = thread
+
+        while self.__is_running(threads):
+            time.sleep(self.POLL)
+            self.__check_stalls()
+
+        with self.condition:
+            remaining = len(self.pending) + len(self.active)
+            if remaining and not self.cancel:
+                self.error = 'No devices available, ' \
+                    '{} steps not scanned'.format(remaining)
+            self.cancel = True
+            stalled = [device for device in self.stalled
+                       if device not in self.exited]
+            for device in stalled:
+                self.abandoned.add(device)
+                self.sdr.sdrs.pop(device, None)
+            self.condition.notify_all()
+        for device, thread in threads.iteritems():
+            if device not in stalled:
+                thread.join()
+
+        if self.error is not None:
+            self.rtl_close()
+            post_event(self.notify, EventThread(Event.ERROR, 0, self.error))
+            return
+        if remaining:
+            post_event(self.notify, EventThread(Event.STOPPED))
+            self.rtl_close()
+            return
+
+        post_event(self.notify, EventThread(Event.FINISHED, 0, None))
+
+        if self.isCal:
+            post_event(self.notify, EventThread(Event.CAL))
+
+    def abort(self):
+        with self.condition:
+            self.cancel = True
+            self.condition.notify_all()
+
+    def rtl_close(self):
+        with self.condition:
+            self.sdr.close()
+
+    def get_sdr(self):
+        return self.sdr
+
+    def get_stats(self):
+        with self.condition:
+            return OrderedDict([(device, (stats.steps, stats.get_rate(),
+                                          stats.duplicates, stats.requeued,
+                                          stats.failed))
+                                for device, stats in self.stats.iteritems()])
+
+
+class LevelCorrection(object):
+    def __init__(self, reference):
+        self.reference = reference
+        self.lock = threading.Lock()
+        self.steps = {}
+        self.offsets = {}
+
+    def __compare(self, device, centre, freqs, levels):
+        for centreOther, (deviceOther, freqsOther, levelsOther) in self.steps.iteritems():
+            if abs(centreOther - centre) >= BANDWIDTH * 2:
+                continue
+            if self.reference not in [device, deviceOther] or \
+                    device == deviceOther:
+                continue
+
+            low = max(centre, centreOther) - BANDWIDTH
+            high = min(centre, centreOther) + BANDWIDTH
+            mask = (freqs >= low / 1e6) & (freqs <= high / 1e6)
+            if not mask.any():
+                continue
+            interp = numpy.interp(freqs[mask], freqsOther, levelsOther)
+            diff = numpy.median(levels[mask] - interp)
+            if device == self.reference:
+                offDevice, diff = deviceOther, -diff
+            else:
+                offDevice = device
+            total, count = self.offsets.get(offDevice, (0., 0))
+            self.offsets[offDevice] = (total + diff, count + 1)
+
+    def correct(self, device, centre, freqs, powers):
+        order = numpy.argsort(freqs)
+        freqs = freqs[order]
+        levels = 10 * numpy.log10(powers[order])
+
+        with self.lock:
+            self.__compare(device, centre, freqs, levels)
+            self.steps[centre] = (device, freqs, levels)
+            total, count = self.offsets.get(device, (0., 0))
+
+        if count == 0:
+            return powers
+        return powers / math.pow(10, (total / count) / 10.0)
+
+    def get_offsets(self):
+        with self.lock:
+            return dict([(device, total / count)
+                         for device, (total, count) in self.offsets.iteritems()])
+
+
 class ThreadProcess(threading.Thread):
-    def __init__(self, notify, freq, scan, cal, levelOff, nfft, overlap, winFunc):
+    def __init__(self, notify, freq, scan, cal, levelOff, nfft, overlap, winFunc,
+                 device=None, correction=None):
         threading.Thread.__init__(self)
         self.name = 'ThreadProcess'
         self.notify = notify
@@ -167,30 +605,55 @@ class ThreadProcess(threading.Thread):
         self.nfft = nfft
         self.overlap = overlap
         self.winFunc = winFunc
+        self.device = device
+        self.correction = correction
         self.window = matplotlib.numpy.hamming(nfft)
 
     def run(self):
-        spectrum = {}
         timeStamp = self.scan[0]
         samples = self.scan[1]
-        pos = WINFUNC[::2].index(self.winFunc)
-        function = WINFUNC[1::2][pos]
-
-        powers, freqs = matplotlib.mlab.psd(samples,
-                                            NFFT=self.nfft,
-                                            Fs=SAMPLE_RATE / 1e6,
-                                            window=function(self.nfft))
-        for freqPsd, pwr in itertools.izip(freqs, powers):
-            xr = freqPsd + (self.freq / 1e6)
-            xr = xr + (xr * self.cal / 1e6)
-            spectrum[xr] = pwr * self.levelOff
+
+        timeStart = time.time()
+        freqs, powers = calc_psd(samples, self.nfft, self.winFunc)
+        metrics.add_time('fft', time.time() - timeStart)
+        if self.correction is not None:
+            powers = self.correction.correct(self.device, self.freq,
+                                             freqs + self.freq / 1e6,
+                                             powers)
+        spectrum = create_spectrum(self.freq, freqs, powers,
+                                   self.cal, self.levelOff)
         post_event(self.notify, EventThread(Event.PROCESSED,
                                             (timeStamp, self.freq, spectrum)))
 
 
+def calc_psd(samples, nfft, winFunc):
+    pos = WINFUNC[::2].index(winFunc)
+    function = WINFUNC[1::2][pos]
+
+    powers, freqs = matplotlib.mlab.psd(samples,
+                                        NFFT=nfft,
+                                        Fs=SAMPLE_RATE / 1e6,
+                                        window=function(nfft))
+
+    return freqs, powers
+
+
+def create_spectrum(freq, freqs, powers, cal, levelOff):
+    spectrum = {}
+    for freqPsd, pwr in itertools.izip(freqs, powers):
+        xr = freqPsd + (freq / 1e6)
+        xr = xr + (xr * cal / 1e6)
+        spectrum[xr] = pwr * levelOff
+
+    return spectrum
+
+
 def update_spectrum(notify, lock, start, stop, data, offset,
                     spectrum, average, alertLevel=None):
+    timeStart = time.time()
     with lock:
+        timeLock = time.time()
+        metrics.add_time('lock', timeLock - timeStart)
         updated = False
         if average:
             if len(spectrum) > 0:
@@ -230,7 +693,9 @@ def update_spectrum(notify, lock, start, stop, data, offset,
         if updated:
             spectrum[timeStamp] = OrderedDict(sorted(spectrum[timeStamp].items()))
 
-    post_event(notify, EventThread(Event.UPDATED, None, updated))
+        metrics.add_time('stitch', time.time() - timeLock)
+
+    post_event(notify, EventThread(Event.UPDATED, timeStamp, updated))
 
 
 if __name__ == '__main__':
@@ -101,6 +101,9 @@ class Settings(object):
         self.exportWidth = 8
         self.exportHeight = 4.5
         self.exportDpi = 600
+        self.exportContSize = 0
+        self.exportContTime = 0
+        self.exportContCompress = False
 
         self.devicesRtl = []
         self.indexRtl = 0
@@ -130,14 +133,20 @@ class Settings(object):
             device.name = group[1]
             device.serial = self.cfg.Read('serial', '')
             device.isDevice = self.cfg.ReadBool('isDevice', True)
+            device.type = self.cfg.ReadInt('type', DeviceRTL.TCP)
             device.server = self.cfg.Read('server', 'localhost')
             device.port = self.cfg.ReadInt('port', 1234)
+            device.scenario = self.cfg.Read('scenario', '')
             device.gain = self.cfg.ReadFloat('gain', 0)
             device.calibration = self.cfg.ReadFloat('calibration', 0)
             device.lo = self.cfg.ReadFloat('lo', 0)
             device.offset = self.cfg.ReadFloat('offset', 250e3)
             device.tuner = self.cfg.ReadInt('tuner', 0)
+            gains = self.cfg.Read('gains', '')
+            if gains:
+                device.gains = [float(gain) for gain in gains.split(',')]
             device.levelOff = self.cfg.ReadFloat('levelOff', 0)
+            device.multi = self.cfg.ReadBool('multi', False)
             self.devicesRtl.append(device)
             self.cfg.SetPath("/DevicesRTL")
             group = self.cfg.GetNextGroup(group[2])
@@ -166,21 +175,22 @@ class Settings(object):
 
         if self.devicesRtl:
             for device in self.devicesRtl:
-                if device.isDevice:
-                    name = device.name
-                else:
-                    name = "{}:{}".format(device.server, device.port)
+                name = device.get_desc()
                 self.cfg.SetPath("/DevicesRTL/" + format_device_rtl_name(name))
                 self.cfg.Write('serial', device.serial)
                 self.cfg.WriteBool('isDevice', device.isDevice)
+                self.cfg.WriteInt('type', device.type)
                 self.cfg.Write('server', device.server)
                 self.cfg.WriteInt('port', device.port)
+                self.cfg.Write('scenario', device.scenario)
                 self.cfg.WriteFloat('gain', device.gain)
                 self.cfg.WriteFloat('lo', device.lo)
                 self.cfg.WriteFloat('calibration', device.calibration)
                 self.cfg.WriteFloat('offset', device.offset)
                 self.cfg.WriteInt('tuner', device.tuner)
+                self.cfg.Write('gains', ','.join(device.get_gains_str()))
                 self.cfg.WriteFloat('levelOff', device.levelOff)
+                self.cfg.WriteBool('multi', device.multi)
 
     def __save_devices_gps(self):
         self.cfg.DeleteGroup('/DevicesGPS')
@@ -251,6 +261,12 @@ class Settings(object):
         self.exportWidth = self.cfg.ReadFloat('exportWidth', self.exportWidth)
         self.exportHeight = self.cfg.ReadFloat('exportHeight', self.exportHeight)
         self.exportDpi = self.cfg.ReadInt('exportDpi', self.exportDpi)
+        self.exportContSize = self.cfg.ReadInt('exportContSize',
+                                               self.exportContSize)
+        self.exportContTime = self.cfg.ReadInt('exportContTime',
+                                               self.exportContTime)
+        self.exportContCompress = self.cfg.ReadBool('exportContCompress',
+                                                    self.exportContCompress)
         self.indexRtl = self.cfg.ReadInt('index', self.indexRtl)
         self.indexRtl = self.cfg.ReadInt('indexRtl', self.indexRtl)
         self.indexGps = self.cfg.ReadInt('indexGps', self.indexGps)
@@ -360,6 +376,9 @@ class Settings(object):
         self.cfg.WriteFloat('exportWidth', self.exportWidth)
         self.cfg.WriteFloat('exportHeight', self.exportHeight)
         self.cfg.WriteInt('exportDpi', self.exportDpi)
+        self.cfg.WriteInt('exportContSize', self.exportContSize)
+        self.cfg.WriteInt('exportContTime', self.exportContTime)
+        self.cfg.WriteBool('exportContCompress', self.exportContCompress)
         self.cfg.WriteInt('indexRtl', self.indexRtl)
         self.cfg.WriteInt('indexGps', self.indexGps)
         self.__save_devices_rtl()
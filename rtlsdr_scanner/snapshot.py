@@ -0,0 +1,148 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import Queue
+import copy
+from collections import OrderedDict
+import threading
+
+from PIL import Image
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from rtlsdr_scanner.constants import Display
+from rtlsdr_scanner.events import post_event, EventThread, Event
+from rtlsdr_scanner.file import save_image
+from rtlsdr_scanner.plot_line import Plotter
+from rtlsdr_scanner.plot_spect import Spectrogram
+from rtlsdr_scanner.plot_status import PlotterStatus
+from rtlsdr_scanner.plot_time import PlotterTime
+from rtlsdr_scanner.utils_mpl import set_plot_fonts
+
+
+class Snapshot(object):
+    def __init__(self, graph, settings, lock):
+        with lock:
+            if graph.spectrum is None:
+                self.spectrum = None
+            else:
+                self.spectrum = OrderedDict((timeStamp, OrderedDict(sweep))
+                                            for timeStamp, sweep
+                                            in graph.spectrum.iteritems())
+
+        self.settings = copy.copy(settings)
+        self.extent = graph.extent
+        self.annotate = graph.annotate
+        self.measure = graph.measure
+        self.show = copy.copy(graph.show)
+        self.title = graph.get_plot_title()
+
+        self.limits = None
+        axes = graph.get_axes()
+        if axes is not None:
+            self.limits = axes.get_xlim(), axes.get_ylim()
+
+    def __create_plot(self, figure):
+        notify = Queue.Queue()
+        display = self.settings.display
+        if display == Display.SPECT:
+            return Spectrogram(notify, figure, self.settings)
+        elif display == Display.SURFACE:
+            from rtlsdr_scanner.plot_3d import Plotter3d
+            return Plotter3d(notify, figure, self.settings)
+        elif display == Display.STATUS:
+            return PlotterStatus(notify, figure, self.settings)
+        elif display == Display.TIMELINE:
+            return PlotterTime(notify, figure, self.settings)
+
+        return Plotter(notify, figure, self.settings)
+
+    def render(self, sizeInches, dpi):
+        figure = Figure(facecolor='white')
+        canvas = FigureCanvasAgg(figure)
+        figure.set_size_inches(sizeInches)
+        figure.set_dpi(dpi)
+
+        plot = self.__create_plot(figure)
+        set_plot_fonts(plot, self.settings.display)
+        plot.set_title(self.title)
+        figure.subplots_adjust(top=0.85)
+
+        if self.spectrum is not None and self.extent is not None:
+            thread = plot.set_plot(self.spectrum, self.extent, self.annotate)
+            if thread is not None:
+                thread.join()
+        if self.measure is not None and self.measure.is_valid():
+            plot.draw_measure(self.measure, self.show)
+
+        axes = plot.get_axes()
+        if axes is not None and self.limits is not None:
+            axes.set_xlim(self.limits[0])
+            axes.set_ylim(self.limits[1])
+
+        canvas.draw()
+        renderer = canvas.get_renderer()
+        if matplotlib.__version__ >= '1.2':
+            buf = renderer.buffer_rgba()
+        else:
+            buf = renderer.buffer_rgba(0, 0)
+        size = canvas.get_width_height()
+        image = Image.frombuffer('RGBA', size, buf, 'raw', 'RGBA', 0, 1)
+        image = image.convert('RGB')
+
+        plot.close()
+
+        return image
+
+
+class ThreadSnapshot(threading.Thread):
+    def __init__(self, notify, snapshot, filename, exportType, settings):
+        threading.Thread.__init__(self)
+        self.name = 'Snapshot'
+
+        self.notify = notify
+        self.snapshot = snapshot
+        self.filename = filename
+        self.exportType = exportType
+        self.sizeInches = (settings.exportWidth, settings.exportHeight)
+        self.dpi = settings.exportDpi
+
+        self.start()
+
+    def run(self):
+        try:
+            image = self.snapshot.render(self.sizeInches, self.dpi)
+            save_image(self.filename, self.exportType, image, self.dpi)
+        except (IOError, ValueError, KeyError) as error:
+            post_event(self.notify, EventThread(Event.EXPORTED, self.filename,
+                                                error))
+        else:
+            post_event(self.notify, EventThread(Event.EXPORTED, self.filename))
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
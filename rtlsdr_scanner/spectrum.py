@@ -22,9 +22,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from decimal import Decimal
-from operator import itemgetter, mul
+from operator import mul, lt, gt
 
 from matplotlib.dates import seconds
 import numpy
@@ -35,9 +35,10 @@ from rtlsdr_scanner.utils_mpl import utc_to_mpl
 
 
 class Extent(object):
-    def __init__(self, spectrum):
+    def __init__(self, spectrum=None):
         self.__clear()
-        self.__calc_extent(spectrum)
+        if spectrum is not None:
+            self.__calc_extent(spectrum)
 
     def __clear(self):
         self.fMin = float('inf')
@@ -54,21 +55,25 @@ class Extent(object):
         self.tMin = min(spectrum)
         self.tMax = max(spectrum)
 
-        for timeStamp in spectrum:
-            points = spectrum[timeStamp].items()
-            if len(points) > 0:
-                fMin = min(points, key=itemgetter(0))[0]
-                fMax = max(points, key=itemgetter(0))[0]
-                lMin = min(points, key=itemgetter(1))[1]
-                lMax = max(points, key=itemgetter(1))[1]
+        for timeStamp, sweep in spectrum.iteritems():
+            if len(sweep) > 0:
+                fMin, fMax, lMin, lMax, fPeak = Extent.summarise(sweep)
                 self.fMin = min(self.fMin, fMin)
                 self.fMax = max(self.fMax, fMax)
                 self.lMin = min(self.lMin, lMin)
                 if(lMax >= self.lMax):
                     self.lMax = lMax
-                    self.fPeak, self.lPeak = max(points, key=lambda(_f, l): l)
+                    self.fPeak, self.lPeak = fPeak, lMax
                     self.tPeak = timeStamp
 
+    @staticmethod
+    def summarise(sweep):
+        freqs = numpy.fromiter(sweep.iterkeys(), numpy.float64, len(sweep))
+        levels = numpy.fromiter(sweep.itervalues(), numpy.float64, len(sweep))
+        peak = levels.argmax()
+
+        return freqs.min(), freqs.max(), levels.min(), levels[peak], freqs[peak]
+
     def get_f(self):
         if self.fMin == self.fMax:
             return self.fMin, self.fMax - 0.001
@@ -93,6 +98,105 @@ class Extent(object):
         return self.fPeak, self.lPeak, self.tPeak
 
 
+class ExtentTracker(object):
+    def __init__(self):
+        self.__reset(None)
+
+    def __reset(self, spectrum):
+        self.spectrum = spectrum
+        self.dirty = set()
+        self.sweeps = deque()
+        self.fMins = deque()
+        self.fMaxs = deque()
+        self.lMins = deque()
+        self.lMaxs = deque()
+
+    @staticmethod
+    def __push(queue, entry, keep):
+        while len(queue) and not keep(queue[-1][0], entry[0]):
+            queue.pop()
+        queue.append(entry)
+
+    def __add(self, timeStamp, sweep):
+        self.sweeps.append(timeStamp)
+        if len(sweep) > 0:
+            fMin, fMax, lMin, lMax, fPeak = Extent.summarise(sweep)
+            self.__push(self.fMins, (fMin, timeStamp), lt)
+            self.__push(self.fMaxs, (fMax, timeStamp), gt)
+            self.__push(self.lMins, (lMin, timeStamp), lt)
+            self.__push(self.lMaxs, (lMax, timeStamp, fPeak), gt)
+
+    def __remove(self):
+        timeStamp = self.sweeps.popleft()
+        for queue in [self.fMins, self.fMaxs, self.lMins, self.lMaxs]:
+            if len(queue) and queue[0][1] == timeStamp:
+                queue.popleft()
+
+    def __get_new(self, spectrum):
+        new = []
+        for timeStamp in reversed(spectrum):
+            if len(self.sweeps) and timeStamp == self.sweeps[-1]:
+                break
+            new.append(timeStamp)
+
+        return new
+
+    def __is_dirty(self, spectrum, new):
+        for timeStamp in self.dirty:
+            if timeStamp in spectrum and timeStamp not in new:
+                return True
+
+        return False
+
+    def reset(self):
+        self.__reset(None)
+
+    def mark(self, timeStamp):
+        self.dirty.add(timeStamp)
+
+    def update(self, spectrum):
+        if spectrum is not self.spectrum:
+            self.__reset(spectrum)
+
+        while len(self.sweeps) and self.sweeps[0] not in spectrum:
+            self.__remove()
+        new = self.__get_new(spectrum)
+        if not len(new) or len(self.sweeps) + len(new) != len(spectrum) or \
+                self.__is_dirty(spectrum, new):
+            self.__reset(spectrum)
+            new = self.__get_new(spectrum)
+        self.dirty.clear()
+
+        for timeStamp in reversed(new[1:]):
+            self.__add(timeStamp, spectrum[timeStamp])
+
+        extent = Extent()
+        if not len(new):
+            return extent
+
+        extent.tMin = self.sweeps[0] if len(self.sweeps) else new[0]
+        extent.tMax = new[0]
+        if len(self.fMins):
+            extent.fMin = self.fMins[0][0]
+            extent.fMax = self.fMaxs[0][0]
+            extent.lMin = self.lMins[0][0]
+            extent.lMax, extent.tPeak, extent.fPeak = self.lMaxs[0]
+            extent.lPeak = extent.lMax
+
+        sweep = spectrum[new[0]]
+        if len(sweep) > 0:
+            fMin, fMax, lMin, lMax, fPeak = Extent.summarise(sweep)
+            extent.fMin = min(extent.fMin, fMin)
+            extent.fMax = max(extent.fMax, fMax)
+            extent.lMin = min(extent.lMin, lMin)
+            if lMax >= extent.lMax:
+                extent.lMax = extent.lPeak = lMax
+                extent.fPeak = fPeak
+                extent.tPeak = new[0]
+
+        return extent
+
+
 class Measure(object):
     MIN, MAX, AVG, GMEAN, HBW, OBW = range(6)
 
@@ -272,10 +376,10 @@ def create_mesh(spectrum, mplTime):
     for ys in spectrum:
         time = utc_to_mpl(ys) if mplTime else ys
         xs, zs = split_spectrum(spectrum[ys])
-        for i in range(len(xs)):
-            x[i, j] = xs[i]
-            y[i, j] = time
-            z[i, j] = zs[i]
+        count = len(xs)
+        x[:count, j] = xs
+        y[:count, j] = time
+        z[:count, j] = zs
         j += 1
 
     x[:, 0] = x[:, 1]
@@ -288,6 +392,37 @@ def create_mesh(spectrum, mplTime):
     return x, y, z
 
 
+def create_axis(spectrum):
+    unique = []
+    for sweep in spectrum.itervalues():
+        freqs = numpy.fromiter(sweep.iterkeys(), numpy.float64, len(sweep))
+        if not len(unique) or not numpy.array_equal(freqs, unique[-1]):
+            unique.append(freqs)
+
+    if len(unique) == 1:
+        return numpy.sort(unique[0])
+    elif len(unique):
+        return numpy.unique(numpy.concatenate(unique))
+
+    return numpy.empty(0)
+
+
+def create_matrix(spectrum, axis=None):
+    if axis is None:
+        axis = create_axis(spectrum)
+    times = numpy.array(spectrum.keys(), dtype=numpy.float64)
+
+    levels = numpy.empty((len(times), len(axis)), dtype=numpy.float32)
+    levels.fill(numpy.nan)
+    for i, sweep in enumerate(spectrum.itervalues()):
+        freqs = numpy.fromiter(sweep.iterkeys(), numpy.float64, len(sweep))
+        indices = numpy.searchsorted(axis, freqs)
+        levels[i, indices] = numpy.fromiter(sweep.itervalues(),
+                                            numpy.float32, len(sweep))
+
+    return axis, times, levels
+
+
 def sort_spectrum(spectrum):
     newSpectrum = OrderedDict()
     for timeStamp in sorted(spectrum):
@@ -0,0 +1,90 @@
+#
+# rtlsdr_scan
+#
+# http://eartoearoak.com/software/rtlsdr-scanner
+#
+# Copyright 2012 - 2015 Al Brown
+#
+# A frequency scanning GUI for the OsmoSDR rtl-sdr library at
+# http://sdr.osmocom.org/trac/wiki/rtl-sdr
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import __builtin__
+import sys
+import time
+
+
+class StartupProfile(object):
+    MAX_ENTRIES = 25
+
+    def __init__(self):
+        self.timeStart = time.time()
+        self.imports = {}
+        self.stages = []
+        self.stack = []
+        self.importer = None
+
+    def __import(self, name, *args, **kwargs):
+        loaded = len(sys.modules)
+        self.stack.append(0.0)
+        timeStart = time.time()
+        try:
+            return self.importer(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - timeStart
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            if len(sys.modules) > loaded:
+                total, own = self.imports.get(name, (0.0, 0.0))
+                self.imports[name] = (total + elapsed,
+                                      own + elapsed - children)
+
+    def install(self):
+        if self.importer is None:
+            self.importer = __builtin__.__import__
+            __builtin__.__import__ = self.__import
+
+    def uninstall(self):
+        if self.importer is not None:
+            __builtin__.__import__ = self.importer
+            self.importer = None
+
+    def stage(self, name):
+        self.stages.append((name, time.time() - self.timeStart))
+
+    def report(self):
+        self.uninstall()
+
+        print '\nStartup profile:'
+        last = 0
+        for name, elapsed in self.stages:
+            print '\t{:<24}{:8.3f}s (+{:.3f}s)'.format(name, elapsed,
+                                                       elapsed - last)
+            last = elapsed
+
+        print '\nSlowest imports (own / cumulative):'
+        imports = sorted(self.imports.items(), key=lambda i: i[1][1],
+                         reverse=True)
+        for name, (total, own) in imports[:self.MAX_ENTRIES]:
+            print '\t{:<40}{:8.3f}s {:8.3f}s'.format(name, own, total)
+        print ''
+
+
+if __name__ == '__main__':
+    print 'Please run rtlsdr_scan.py'
+    exit(1)
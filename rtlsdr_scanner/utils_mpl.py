@@ -26,13 +26,13 @@ import datetime
 import math
 import time
 
-from PIL import ImageDraw, ImageFilter, Image, ImageChops
 from matplotlib import cm
 from matplotlib.cm import ScalarMappable
 from matplotlib.colors import LinearSegmentedColormap, Normalize
 from matplotlib.dates import date2num, AutoDateLocator, AutoDateFormatter, \
     DateFormatter, MinuteLocator
-from matplotlib.image import pil_to_array
+
+from rtlsdr_scanner.constants import Display
 
 
 def add_colours():
@@ -74,6 +74,19 @@ def find_artists(figure, gid):
     return figure.findobj(lambda x: x.get_gid() == gid)
 
 
+def set_plot_fonts(plot, display):
+    axes = plot.get_axes()
+    if axes is not None:
+        axes.xaxis.label.set_size('small')
+        axes.yaxis.label.set_size('small')
+        if display == Display.SURFACE:
+            axes.zaxis.label.set_size('small')
+        axes.tick_params(axis='both', which='major', labelsize='small')
+    axes = plot.get_axes_bar()
+    if axes is not None:
+        axes.tick_params(axis='both', which='major', labelsize='small')
+
+
 def set_table_colour(table, colour):
     for _loc, cell in table.get_celld().items():
         cell.set_edgecolor(colour)
@@ -101,6 +114,9 @@ def set_date_ticks(axis, auto=True):
 
 
 def create_heatmap(xs, ys, imageSize, blobSize, cmap):
+    from PIL import ImageDraw, ImageFilter, Image, ImageChops
+    from matplotlib.image import pil_to_array
+
     blob = Image.new('RGBA', (blobSize * 2, blobSize * 2), '#000000')
     blob.putalpha(0)
     colour = 255 / int(math.sqrt(len(xs)))